@@ -0,0 +1,67 @@
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from account.cache import get_cached_user, get_user_state
+from account.models import User
+from ims.routers import set_request_user
+
+
+class RoleClaimJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that doesn't load the user row on every request.
+
+    Tokens carry the user's role (see RoleTokenObtainPairSerializer), and
+    the role and active flag are checked against a cached per-user entry
+    (account.cache.get_user_state). Read requests then get an unsaved
+    User with only the id and role set, which is all the permission
+    classes and queryset scoping need; other requests get the full user
+    from a short-lived cache.
+
+    A token whose role no longer matches the user's is rejected, and the
+    client has to log in again.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        try:
+            # The claim holds the id as a string
+            user_id = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValidationError):
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        state = get_user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not state['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if validated_token.get('role') != state['role']:
+            raise InvalidToken(_('Token role is out of date, please log in again'))
+        # Users who have just written read from the primary
+        set_request_user(user_id)
+
+        if request.method in SAFE_METHODS:
+            return self.get_token_user(user_id, state['role']), validated_token
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        return user, validated_token
+
+    @staticmethod
+    def get_token_user(user_id, role):
+        user = User(pk=user_id, role=role)
+        # Behave like a loaded row (e.g. in equality checks), not a new one
+        user._state.adding = False
+        return user
@@ -1,6 +1,20 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from account.models import User
 
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Put the user's role in the tokens, so that RoleClaimJWTAuthentication
+    doesn't have to load the user to check permissions.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['role'] = user.role
+        return token
+
+
 class UserSerializer(serializers.ModelSerializer):
 
     password2 = serializers.CharField(write_only = True)
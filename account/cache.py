@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+def user_state_key(user_id):
+    return f'account:user-state:{user_id}'
+
+
+def user_key(user_id):
+    return f'account:user:{user_id}'
+
+
+def get_user_state(user_id):
+    """
+    Return {'role': ..., 'is_active': ...} for a user, or None if the user
+    doesn't exist.
+
+    The entry is dropped whenever the user is saved or deleted (see
+    account.signals); USER_STATE_CACHE_TIMEOUT only bounds how long a
+    change that skips the signals (a queryset update()) can go unnoticed.
+    """
+    from account.models import User
+
+    key = user_state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        # Never from a replica: it may not have seen the change that
+        # dropped the entry yet, and would cache the old state again
+        state = User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id).values('role', 'is_active').first()
+        if state is not None:
+            cache.set(key, state, settings.USER_STATE_CACHE_TIMEOUT)
+    return state
+
+
+def get_cached_user(user_id):
+    """
+    Return the full user, loaded at most once per USER_CACHE_TIMEOUT, or
+    None if the user doesn't exist.
+    """
+    from account.models import User
+
+    key = user_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id).first()
+        if user is not None:
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+    return user
+
+
+def forget_user(user_id):
+    """
+    Drop the cached state and full user, immediately and again once the
+    surrounding transaction commits, so that a request running in between
+    (which still sees the old row) can't cache it for long.
+    """
+    keys = [user_state_key(user_id), user_key(user_id)]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
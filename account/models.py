@@ -23,6 +23,7 @@ class User(AbstractBaseUser,TimeStampModel,PermissionsMixin):
     last_name = models.CharField(max_length=100)
     phone = models.CharField(max_length=20)
     is_staff = models.BooleanField(default=False)
+    is_active = models.BooleanField(default=True)
     role = models.CharField(max_length=15,choices=USER_ROLES,default='candidate')
 
     USERNAME_FIELD = 'email'
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from account.cache import forget_user
+from account.models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    # Tokens carrying an old role, or of a deactivated or deleted user, are
+    # rejected from the next request on
+    forget_user(instance.pk)
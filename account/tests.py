@@ -1,3 +1,78 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from account.api.authentication import RoleClaimJWTAuthentication
+from account.models import User
+
+
+class RoleClaimAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='interviewer@ims.com', password='secret', first_name='Ada', last_name='Test', role='interviewer'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post(reverse('login'), {'email': 'interviewer@ims.com', 'password': 'secret'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data['access']
+
+    def authenticate(self, method, token):
+        request = getattr(APIRequestFactory(), method)('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return RoleClaimJWTAuthentication().authenticate(request)[0]
+
+    def test_tokens_carry_the_role(self):
+        self.assertEqual(AccessToken(self.login())['role'], 'interviewer')
+
+    def test_reads_do_not_load_the_user(self):
+        token = self.login()
+        self.authenticate('get', token)
+        with self.assertNumQueries(0):
+            user = self.authenticate('get', token)
+        self.assertEqual((user.pk, user.role), (self.user.pk, 'interviewer'))
+        self.assertTrue(user.is_authenticated)
+
+    def test_writes_get_the_cached_full_user(self):
+        token = self.login()
+        self.assertEqual(self.authenticate('post', token).email, 'interviewer@ims.com')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate('post', token).email, 'interviewer@ims.com')
+
+    def test_role_changes_reject_old_tokens(self):
+        token = self.login()
+        self.authenticate('get', token)
+        self.user.role = 'admin'
+        self.user.save()
+        with self.assertRaises(InvalidToken):
+            self.authenticate('get', token)
+        self.assertEqual(self.authenticate('get', self.login()).role, 'admin')
+
+    def test_deactivated_users_are_rejected(self):
+        token = self.login()
+        self.authenticate('post', token)
+        self.user.is_active = False
+        self.user.save()
+        for method in ('get', 'post'):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(method, token)
+
+    def test_deleted_users_are_rejected(self):
+        token = self.login()
+        self.authenticate('get', token)
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate('get', token)
+
+    def test_api_requests_with_a_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.login()}')
+        self.assertEqual(self.client.get(reverse('upcoming-interviews')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('my-applications')).status_code, 403)
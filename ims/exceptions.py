@@ -10,9 +10,11 @@ def custom_exception_handler(exc, context):
     response = exception_handler(exc, context)
     
     if isinstance(exc, Throttled):
-        # Add user-friendly details to throttled responses
-        throttle_instance = getattr(context['view'], 'throttle_classes', [])
-        throttle_class_name = throttle_instance[0].__name__ if throttle_instance else None
+        # Add user-friendly details to throttled responses, for the limit
+        # that keeps the client waiting longest (exc.wait is that wait)
+        exceeded = getattr(context['request'], 'exceeded_throttles', [])
+        throttle = max(exceeded, key=lambda throttle: throttle.wait() or 0, default=None)
+        throttle_class_name = throttle.__class__.__name__ if throttle else None
         
         custom_error_messages = {
             'FeedbackRateThrottle': 'You have reached the daily limit for submitting feedback. Please try again tomorrow.',
@@ -0,0 +1,119 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from ims import routers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def accepts_encoding(accept_encoding, coding):
+    """
+    Whether an Accept-Encoding header allows `coding` (listed without q=0).
+    """
+    for item in accept_encoding.split(','):
+        name, _, params = item.partition(';')
+        if name.strip().lower() != coding:
+            continue
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def compress_sequence_brotli(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for item in sequence:
+        # Flush after every chunk so a streamed response keeps streaming
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress responses of at least COMPRESSION_MIN_SIZE bytes, with brotli
+    when the client accepts it and the brotli package is installed, and
+    with gzip otherwise (see GZipMiddleware).
+    """
+    brotli_quality = 5
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        if (
+            brotli is None
+            or response.has_header('Content-Encoding')
+            or getattr(response, 'is_async', False)
+            or not accepts_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), 'br')
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if response.streaming:
+            response.streaming_content = compress_sequence_brotli(response.streaming_content, self.brotli_quality)
+            # The compressed size isn't known until the stream ends
+            del response.headers['Content-Length']
+        else:
+            compressed_content = brotli.compress(response.content, quality=self.brotli_quality)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+        # Compressed bodies only match the ETag weakly (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Route the database reads of each request through ims.routers: to a
+    replica for safe methods, to the primary for writes and for users who
+    have just written. Must come before anything that reads the database.
+
+    Async-capable, so under ASGI the async views aren't pushed into a
+    thread; the routing state is a contextvar and carries across awaits.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = routers.start_request(request.method)
+        response = None
+        try:
+            response = self.get_response(request)
+            return response
+        finally:
+            routers.end_request(state, token, response)
+
+    async def __acall__(self, request):
+        state, token = routers.start_request(request.method)
+        response = None
+        try:
+            response = await self.get_response(request)
+            return response
+        finally:
+            routers.end_request(state, token, response)
@@ -0,0 +1,95 @@
+import csv
+import io
+
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer producing the same bytes with orjson.
+
+    Types orjson doesn't handle the way DRF does (Decimal, datetime and
+    the rest of DRF's JSONEncoder cases) are passed through to
+    JSONEncoder.default, so e.g. average_rating (a Decimal) is still
+    rendered as a float and datetimes as ISO 8601 with a Z suffix.
+    Indented output (?format=json with indent=, the browsable API) is left
+    to JSONRenderer.
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+
+        # Escape \u2028 and \u2029 like JSONRenderer, so the output stays a
+        # strict javascript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class RowsRenderer(BaseRenderer):
+    """
+    Base for the row-per-line formats of streamed exports: render_header()
+    and render_rows() encode a column list and a batch of value tuples,
+    and render() writes a regular response (e.g. an error's
+    {'detail': ...}) as rows of its own keys.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        columns = list(rows[0]) if rows and isinstance(rows[0], dict) else ['detail']
+        values = [
+            tuple(row.get(column) for column in columns) if isinstance(row, dict) else (row,)
+            for row in rows
+        ]
+        return self.render_header(columns) + self.render_rows(columns, values)
+
+    def render_header(self, columns):
+        raise NotImplementedError
+
+    def render_rows(self, columns, rows):
+        raise NotImplementedError
+
+
+class CSVRenderer(RowsRenderer):
+    """
+    Comma-separated values with a header line. Values are written with
+    str(), so datetimes read e.g. 2024-05-01 09:30:00+00:00.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def render_header(self, columns):
+        return self.render_rows(columns, [columns])
+
+    def render_rows(self, columns, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode(self.charset)
+
+
+class NDJSONRenderer(RowsRenderer):
+    """
+    One JSON object per line (no header), encoded like ORJSONRenderer.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_APPEND_NEWLINE
+
+    def render_header(self, columns):
+        return b''
+
+    def render_rows(self, columns, rows):
+        default = JSONEncoder().default
+        return b''.join(orjson.dumps(dict(zip(columns, row)), default=default, option=self.options) for row in rows)
@@ -0,0 +1,110 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_routing = ContextVar('replica_routing', default=None)
+
+
+def pin_key(user_id):
+    return f'db:pin-primary:{user_id}'
+
+
+class ReplicaRouting:
+    """
+    Where the reads of one request go. Set up by ReplicaRoutingMiddleware.
+
+    Reads of safe-method requests go to one replica (picked at random, and
+    kept for the whole request), unless the user is pinned to the primary
+    because they wrote something in the last REPLICA_PIN_SECONDS. The user
+    is known once authentication has run (see set_request_user()); reads
+    made before that must not depend on having the latest data.
+    """
+
+    def __init__(self, method):
+        self.safe = method in SAFE_METHODS
+        self.user_id = None
+        self.primary_only = False
+        self._pinned = None
+        self._replica = None
+
+    def db_for_read(self):
+        if not self.safe or self.primary_only or not settings.DATABASE_REPLICAS:
+            return None
+        if self.user_id is not None:
+            if self._pinned is None:
+                self._pinned = bool(cache.get(pin_key(self.user_id)))
+            if self._pinned:
+                return None
+        if self._replica is None:
+            self._replica = random.choice(settings.DATABASE_REPLICAS)
+        return self._replica
+
+
+def start_request(method):
+    """
+    Start routing the reads of a request; returns the state and the token
+    to pass to end_request().
+    """
+    state = ReplicaRouting(method)
+    return state, _routing.set(state)
+
+
+def end_request(state, token, response):
+    # Successful writes pin the user to the primary (read-your-writes)
+    if not state.safe and state.user_id is not None and response is not None and response.status_code < 400:
+        cache.set(pin_key(state.user_id), True, settings.REPLICA_PIN_SECONDS)
+    _routing.reset(token)
+
+
+def set_request_user(user_id):
+    state = _routing.get()
+    if state is not None:
+        state.user_id = user_id
+
+
+@contextmanager
+def primary_reads():
+    """
+    Read from the primary inside the block, e.g. to fill a cache that must
+    not be filled with data a replica hasn't caught up with yet.
+    """
+    state = _routing.get()
+    if state is None:
+        yield
+        return
+    previous, state.primary_only = state.primary_only, True
+    try:
+        yield
+    finally:
+        state.primary_only = previous
+
+
+class PrimaryReplicaRouter:
+    """
+    Send writes, migrations, and the reads of anything outside a request
+    (Celery tasks, management commands) to the primary ('default'), and
+    the reads of requests where ReplicaRouting says.
+
+    Raw cursors, like the stored procedure calls in interview.db_procedures,
+    don't go through routers and always use the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        return state.db_for_read() if state is not None else None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
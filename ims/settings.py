@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 from datetime import timedelta
 
 import os
@@ -54,6 +54,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'ims.middleware.ReplicaRoutingMiddleware',
+    'ims.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -98,6 +100,30 @@ DATABASES = {
     }
 }
 
+# Read replicas, as a comma-separated list of [NAME@]HOST[:PORT] (the name
+# and port default to the primary's), e.g. replica-1.internal,ims@replica-2.internal:6432
+# Safe-method requests read from them (see ims.routers); in tests they
+# mirror the primary.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(config('DB_REPLICAS', default='', cast=Csv()), start=1):
+    name, _, address = replica.rpartition('@')
+    host, _, port = address.partition(':')
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': name or DATABASES['default']['NAME'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['ims.routers.PrimaryReplicaRouter']
+
+# How long a user's reads stay on the primary after they write, so they
+# see their own changes despite replication lag
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -144,11 +170,11 @@ AUTH_USER_MODEL = 'account.User'
 
 REST_FRAMEWORK = { 
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'account.api.authentication.RoleClaimJWTAuthentication',
     ),
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'interview.api.throttling.AnonRateThrottle',
+        'interview.api.throttling.UserRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '20/hour',
@@ -157,6 +183,15 @@ REST_FRAMEWORK = {
         'job_application': '10/day',
     },
     'EXCEPTION_HANDLER': 'ims.exceptions.custom_exception_handler',
+    'DEFAULT_RENDERER_CLASSES': [
+        'ims.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'ims.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 } 
 
 SIMPLE_JWT = {
@@ -169,6 +204,7 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": False,
     "BLACKLIST_AFTER_ROTATION": False,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_OBTAIN_SERIALIZER": "account.api.serializers.RoleTokenObtainPairSerializer",
 }
 
 CORS_ALLOWED_ORIGINS = [
@@ -176,6 +212,50 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:9000",
 ]
 
+# Cache
+# Redis when CACHE_URL is set (e.g. redis://localhost:6379/1), otherwise a
+# per-process in-memory cache for development and tests.
+CACHE_URL = config('CACHE_URL', default='')
+
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# How long a cached job listing response is kept (in seconds)
+JOB_LIST_CACHE_TIMEOUT = config('JOB_LIST_CACHE_TIMEOUT', default=60 * 5, cast=int)
+
+# Redis holding the request logs of the API throttles, shared by every
+# worker. Defaults to the cache's Redis; without one, throttling falls back
+# to the (per-process) cache.
+THROTTLE_REDIS_URL = config('THROTTLE_REDIS_URL', default=CACHE_URL if CACHE_URL.startswith('redis') else '')
+
+# How long a user's role and active flag are cached for authentication
+# (saving the user drops the entry), and how long the full user is cached
+# for the requests that need it
+USER_STATE_CACHE_TIMEOUT = config('USER_STATE_CACHE_TIMEOUT', default=60 * 5, cast=int)
+USER_CACHE_TIMEOUT = config('USER_CACHE_TIMEOUT', default=60, cast=int)
+
+# Responses smaller than this (in bytes) are sent uncompressed
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+
+# Streamed exports hold a transaction (and so a snapshot, which holds back
+# vacuum) open while they stream: the database ends it after
+# EXPORT_IDLE_TIMEOUT seconds without a fetch (a stalled client), and
+# exports are cut off after EXPORT_MAX_SECONDS. Keep the latter below the
+# replicas' max_standby_streaming_delay so they aren't cancelled there.
+EXPORT_IDLE_TIMEOUT = config('EXPORT_IDLE_TIMEOUT', default=60, cast=int)
+EXPORT_MAX_SECONDS = config('EXPORT_MAX_SECONDS', default=60 * 15, cast=int)
+
 # Celery Configuration Options
 CELERY_TIMEZONE = "UTC"
 CELERY_TASK_TRACK_STARTED = True
@@ -195,16 +275,30 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@ims.com')
 
+# Where compiled email templates are cached (None means a temp directory)
+JINJA_BYTECODE_CACHE_DIR = config('JINJA_BYTECODE_CACHE_DIR', default=None)
+
 # Company Information
 COMPANY_NAME = config('COMPANY_NAME', default='Interview Management System')
 
 # Celery Beat settings
 CELERY_BEAT_SCHEDULE = {
-    'daily-interview-reminders': {
+    'hourly-interview-reminders': {
         'task': 'interview.tasks.send_interview_reminders',
-        'schedule': 60 * 60 * 24,  # Run once every day (in seconds)
+        'schedule': 60 * 60,  # Run once every hour (in seconds)
+        'options': {
+            'expires': 60 * 30,  # Expires after 30 minutes
+        },
+    },
+    'daily-status-history-partitions': {
+        'task': 'interview.tasks.ensure_status_history_partitions',
+        'schedule': 24 * 60 * 60,  # Run once a day (in seconds)
+    },
+    'hiring-rollups': {
+        'task': 'interview.tasks.refresh_hiring_rollups',
+        'schedule': 10 * 60,  # Run every 10 minutes (in seconds)
         'options': {
-            'expires': 60 * 60 * 2,  # Expires after 2 hours
+            'expires': 10 * 60,  # Skip runs the worker didn't get to before the next one
         },
     },
 }
\ No newline at end of file
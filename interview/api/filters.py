@@ -0,0 +1,41 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+from rest_framework.filters import SearchFilter
+
+# Characters that may appear in a search term; everything else (including
+# tsquery operators such as & | ! : and parentheses) separates terms
+TERM_PATTERN = re.compile(r'\w+')
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    ?search= backed by a stored tsvector column and its GIN index, instead
+    of an ILIKE '%term%' scan over every search field.
+
+    Every term must match, and the last one matches as a prefix so that
+    partially typed words find results (type-ahead). Results are ordered
+    by ts_rank, best first, unless the request asks for an ordering.
+
+    The view names the column in `search_vector_field` (default
+    'search_vector'); `search_fields` is not used.
+    """
+    search_vector_field = 'search_vector'
+    search_config = 'english'
+
+    def get_search_query(self, request):
+        terms = TERM_PATTERN.findall(' '.join(self.get_search_terms(request)))
+        if not terms:
+            return None
+        terms[-1] += ':*'
+        return SearchQuery(' & '.join(terms), config=self.search_config, search_type='raw')
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_search_query(request)
+        if query is None:
+            return queryset
+        field = getattr(view, 'search_vector_field', self.search_vector_field)
+        return queryset.filter(**{field: query}).annotate(
+            search_rank=SearchRank(F(field), query),
+        ).order_by('-search_rank', 'pk')
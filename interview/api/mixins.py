@@ -0,0 +1,367 @@
+import hashlib
+import time
+from contextlib import closing
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections, transaction
+from django.db.models import Count, Max, Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+from ims.renderers import CSVRenderer, NDJSONRenderer
+from ims.routers import primary_reads
+from interview.api.values import ValuesRowBuilder
+from interview.cache import job_list_cache_key, record_job_list_lookup
+
+
+class CachedJobListMixin:
+    """
+    Serve list() responses from the cache, keyed by the view and the
+    request's query parameters. Entries are invalidated by bumping the job
+    list version whenever a Job or JobApplication changes (see
+    interview.signals), and expire after JOB_LIST_CACHE_TIMEOUT anyway.
+
+    On views with ConditionalGetMixin (listed after this mixin), the
+    aggregate behind the ETag and Last-Modified is cached next to the page
+    under the same version, so a cache hit, 304 or not, runs no query.
+
+    Only use on views whose list output does not depend on the user.
+    """
+    cache_timeout = settings.JOB_LIST_CACHE_TIMEOUT
+
+    def get_validator_values(self):
+        key = job_list_cache_key(f'{self.__class__.__name__}:validators', self.request.query_params)
+        values = cache.get(key)
+        if values is None:
+            with primary_reads():
+                values = super().get_validator_values()
+            cache.set(key, values, self.cache_timeout)
+        return values
+
+    async def aget_validator_values(self):
+        key = await sync_to_async(job_list_cache_key)(f'{self.__class__.__name__}:validators', self.request.query_params)
+        values = await cache.aget(key)
+        if values is None:
+            with primary_reads():
+                values = await super().aget_validator_values()
+            await cache.aset(key, values, self.cache_timeout)
+        return values
+
+    def list(self, request, *args, **kwargs):
+        key = job_list_cache_key(self.__class__.__name__, request.query_params)
+        data = cache.get(key)
+        if data is not None:
+            record_job_list_lookup(hit=True)
+            return Response(data)
+
+        record_job_list_lookup(hit=False)
+        # A lagging replica would cache old listings under the new version
+        with primary_reads():
+            response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, self.cache_timeout)
+        return response
+
+    async def alist(self, request, *args, **kwargs):
+        key = await sync_to_async(job_list_cache_key)(self.__class__.__name__, request.query_params)
+        data = await cache.aget(key)
+        await sync_to_async(record_job_list_lookup)(hit=data is not None)
+        if data is not None:
+            return Response(data)
+
+        with primary_reads():
+            response = await super().alist(request, *args, **kwargs)
+        await cache.aset(key, response.data, self.cache_timeout)
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Answer GET with a weak ETag and a Last-Modified header computed by one
+    aggregate query over the rows the view would return: their count and
+    the latest of conditional_fields (the rows' own updated_at, and the
+    updated_at of related rows the output shows). A request whose
+    If-None-Match or If-Modified-Since still matches gets a 304 before the
+    rows are loaded or serialized.
+
+    conditional_fields must only follow foreign keys and one-to-one
+    relations, so that the joins don't repeat rows and change the count.
+    On views with ExpandableQuerysetMixin, the rows of the *_details blocks
+    a request expands count too: their updated_at, and the
+    conditional_fields their serializer declares (relative to the block).
+    """
+    conditional_fields = ['updated_at']
+
+    def get_conditional_fields(self):
+        fields = list(self.conditional_fields)
+        if isinstance(self, ExpandableQuerysetMixin):
+            for lookup, serializer in self.get_expanded_relations():
+                related_fields = getattr(serializer, 'conditional_fields', None)
+                if related_fields is None:
+                    related_fields = ['updated_at'] if hasattr(serializer.Meta.model, 'updated_at') else []
+                fields.extend(f'{lookup}__{field}' for field in related_fields)
+        return list(dict.fromkeys(fields))
+
+    def get_conditional_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_validator_aggregates(self):
+        maxes = {f'_last_modified_{i}': Max(field) for i, field in enumerate(self.get_conditional_fields())}
+        return {'_rows': Count('pk'), **maxes}
+
+    def get_validator_values(self):
+        queryset = self.get_conditional_queryset().order_by()
+        return queryset.aggregate(**self.get_validator_aggregates())
+
+    async def aget_validator_values(self):
+        queryset = (await sync_to_async(self.get_conditional_queryset)()).order_by()
+        return await queryset.aaggregate(**self.get_validator_aggregates())
+
+    def get_validators(self):
+        """
+        Return (etag, last_modified timestamp), or (None, None) when there
+        are no rows, so that a missing object is never answered with a 304.
+        """
+        return self.make_validators(self.get_validator_values())
+
+    async def aget_validators(self):
+        return self.make_validators(await self.aget_validator_values())
+
+    def make_validators(self, result):
+        rows = result['_rows']
+        if not rows:
+            return None, None
+
+        timestamps = [value for name, value in result.items() if name != '_rows' and value is not None]
+        last_modified = max(timestamps) if timestamps else None
+        # The same rows look different to another user, query or media type
+        key = '|'.join(str(part) for part in (
+            self.__class__.__name__, self.request.user.pk, self.request.get_full_path(),
+            self.request.accepted_media_type, rows, last_modified and last_modified.isoformat(),
+        ))
+        etag = 'W/"%s"' % hashlib.md5(key.encode('utf-8')).hexdigest()
+        return etag, last_modified and int(last_modified.timestamp())
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        response = self.get_not_modified_response(request, etag, last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return self.set_validators(response, etag, last_modified)
+
+    @staticmethod
+    def get_not_modified_response(request, etag, last_modified):
+        if etag is None:
+            return None
+        return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    @staticmethod
+    def set_validators(response, etag, last_modified):
+        if etag is not None and response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class AsyncConditionalGetMixin(ConditionalGetMixin):
+    """
+    ConditionalGetMixin for async views: the aggregate runs through the
+    async queryset API.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        etag, last_modified = await self.aget_validators()
+        response = self.get_not_modified_response(request, etag, last_modified)
+        if response is None:
+            # The view's own (async) get(), past the synchronous one
+            response = await super(ConditionalGetMixin, self).get(request, *args, **kwargs)
+        return self.set_validators(response, etag, last_modified)
+
+
+class AsyncListMixin:
+    """
+    list() for async views (adrf): the rows, or the page of rows, are
+    loaded with the async queryset API and then serialized in the event
+    loop. Everything the serializer reads must therefore be loaded by the
+    queryset (see ExpandableQuerysetMixin); a lazy relation lookup raises
+    SynchronousOnlyOperation instead of running a query.
+
+    Pagination classes must provide apaginate_queryset().
+    """
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+        rows = [obj async for obj in queryset]
+        return Response(self.get_serializer(rows, many=True).data)
+
+
+class ExpandableQuerysetMixin:
+    """
+    Load the related objects of exactly the *_details blocks the request
+    expands (see ExpandableFieldsMixin): select_related along the expanded
+    foreign keys, and a prefetch wherever the nested serializer asks for
+    its own queryset through get_prefetch_queryset() (and below it).
+
+    Views that override get_queryset() must build on super().get_queryset().
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select_related, prefetch_related = [], []
+        self._collect_expansions(self.get_serializer(), '', False, select_related, prefetch_related)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+    def get_expanded_relations(self, serializer=None, path=''):
+        """
+        Return (lookup, serializer) for every *_details block the request
+        expands, e.g. ('application__job', <JobSerializer>).
+        """
+        if serializer is None:
+            serializer = self.get_serializer()
+        relations = []
+        for name, field in serializer.fields.items():
+            # Many-relations would repeat rows (see ConditionalGetMixin)
+            if not name.endswith('_details') or not isinstance(field, BaseSerializer) or isinstance(field, ListSerializer):
+                continue
+            lookup = path + field.source
+            relations.append((lookup, field))
+            relations.extend(self.get_expanded_relations(field, f'{lookup}__'))
+        return relations
+
+    def _collect_expansions(self, serializer, path, prefetched, select_related, prefetch_related):
+        # The serializer has already dropped the blocks that are not expanded
+        for name, field in serializer.fields.items():
+            if not name.endswith('_details') or not isinstance(field, BaseSerializer):
+                continue
+            lookup = path + field.source
+            get_prefetch_queryset = getattr(field, 'get_prefetch_queryset', None)
+            if get_prefetch_queryset is not None:
+                prefetch_related.append(Prefetch(lookup, queryset=get_prefetch_queryset()))
+            elif prefetched:
+                prefetch_related.append(lookup)
+            else:
+                select_related.append(lookup)
+            self._collect_expansions(
+                field, f'{lookup}__', prefetched or get_prefetch_queryset is not None,
+                select_related, prefetch_related,
+            )
+
+
+class ValuesListMixin:
+    """
+    Serve GET lists from .values() rows through a ValuesRowBuilder, which
+    renders the same output as the serializer without instantiating a model
+    and running every field's get_attribute() per row.
+
+    Falls back to the serializer when it has a field the builder can't
+    read, or when values_fast_path is switched off.
+    """
+    values_fast_path = True
+
+    def list(self, request, *args, **kwargs):
+        builder = ValuesRowBuilder.for_serializer(self.get_serializer()) if self.values_fast_path else None
+        if builder is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # The pagination reads its cursor position from the ordering columns
+        ordering_keys = [field.lstrip('-') for field in getattr(self, 'ordering_fields', None) or []]
+        ordering = getattr(self, 'ordering', None)
+        if isinstance(ordering, str):
+            ordering_keys.append(ordering.lstrip('-'))
+        rows = builder.values(queryset, *ordering_keys, 'id')
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response([builder.build(row) for row in page])
+        return Response([builder.build(row) for row in rows])
+
+
+async def iterate_in_thread(iterator):
+    """
+    Iterate a sync iterator from async code one item at a time, in the
+    thread of the request's sync code (where its database connection
+    lives). StreamingHttpResponse would otherwise read a sync iterator into
+    a list before sending anything.
+    """
+    next_item = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (item := await next_item(iterator, None)) is not None:
+            yield item
+    finally:
+        await sync_to_async(iterator.close, thread_sensitive=True)()
+
+
+class StreamingExportMixin:
+    """
+    Serve GET as a streamed export of every row of the filtered queryset,
+    as CSV or NDJSON (?format=csv|ndjson, or the Accept header; CSV by
+    default), with the columns of export_columns (name: values() lookup).
+
+    Rows are read through a server-side cursor (.iterator()) in batches of
+    export_chunk_size and encoded batch by batch, so memory use doesn't
+    grow with the number of rows, under WSGI and ASGI alike. The cursor is
+    held open by a transaction for as long as the response streams, which
+    also gives the export a single snapshot; EXPORT_IDLE_TIMEOUT and
+    EXPORT_MAX_SECONDS bound how long that can be. The database is resolved
+    before streaming starts (the replica routing of the request ends with
+    the view), so exports read from a replica like the list views do.
+    """
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+    pagination_class = None
+    export_columns = {}
+    export_filename = 'export'
+    export_chunk_size = 2000
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).order_by('pk')
+        queryset = queryset.using(queryset.db).values_list(*self.export_columns.values())
+        renderer = request.accepted_renderer
+        content = self.stream_export(queryset, renderer)
+        if isinstance(request._request, ASGIRequest):
+            content = iterate_in_thread(content)
+        response = StreamingHttpResponse(content, content_type=f'{renderer.media_type}; charset={renderer.charset}')
+        response['Content-Disposition'] = f'attachment; filename="{self.export_filename}.{renderer.format}"'
+        return response
+
+    def stream_export(self, queryset, renderer):
+        columns = list(self.export_columns)
+        deadline = time.monotonic() + settings.EXPORT_MAX_SECONDS
+        # The cursor is closed before the transaction ends, also when the
+        # client goes away mid-stream
+        with transaction.atomic(using=queryset.db), closing(queryset.iterator(self.export_chunk_size)) as rows:
+            with connections[queryset.db].cursor() as cursor:
+                cursor.execute(
+                    "SELECT set_config('idle_in_transaction_session_timeout', %s, true)",
+                    [str(settings.EXPORT_IDLE_TIMEOUT * 1000)],
+                )
+            header = renderer.render_header(columns)
+            if header:
+                yield header
+            while batch := list(islice(rows, self.export_chunk_size)):
+                if time.monotonic() > deadline:
+                    # Abort the response rather than end it, so the client
+                    # can't mistake the export for a complete one
+                    raise TimeoutError(f"Export exceeded EXPORT_MAX_SECONDS ({settings.EXPORT_MAX_SECONDS}s).")
+                yield renderer.render_rows(columns, batch)
@@ -0,0 +1,123 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination that seeks on (ordering field, id) instead of
+    (ordering field, offset), so every page is an index range scan no
+    matter how deep the client has paged.
+
+    The ordering field comes from the view's `ordering` attribute, or from
+    ?ordering= when the view has an OrderingFilter (only its first field is
+    used as the key). Ordering fields must be non-nullable.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = '-created_at'
+    tiebreaker = 'id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for async views, loading the page with the
+        async queryset API.
+        """
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([obj async for obj in queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Return the queryset of the requested page, plus one row to tell
+        whether there is a next one, or None if pagination is disabled.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        if getattr(view, 'ordering', None):
+            self.ordering = view.ordering
+        key = self.get_ordering(request, queryset, view)[0]
+        self.key_field = key.lstrip('-')
+        descending = key.startswith('-')
+        self.ordering = (key, ('-' if descending else '') + self.tiebreaker)
+
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if self.cursor is not None and self.cursor.position is not None:
+            value, pk = self.decode_position(queryset, self.cursor.position)
+            lookup = 'lt' if reverse != descending else 'gt'
+            # The redundant inclusive bound on the key alone is what lets
+            # Postgres start the index scan at the cursor instead of
+            # filtering its way there from the first row.
+            queryset = queryset.filter(
+                Q(**{f'{self.key_field}__{lookup}e': value}),
+                Q(**{f'{self.key_field}__{lookup}': value})
+                | Q(**{self.key_field: value, f'{self.tiebreaker}__{lookup}': pk}),
+            )
+
+        self.reverse = reverse
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None and self.cursor.position is not None
+
+        return self.page
+
+    def decode_position(self, queryset, position):
+        try:
+            value, pk = json.loads(position)
+            field = queryset.model._meta.get_field(self.key_field)
+            return field.to_python(value), int(pk)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering) if self.page else None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering) if self.page else None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        if isinstance(instance, dict):
+            value, pk = instance[self.key_field], instance[self.tiebreaker]
+        else:
+            value, pk = getattr(instance, self.key_field), getattr(instance, self.tiebreaker)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        return json.dumps([value, pk])
@@ -1,20 +1,102 @@
 from rest_framework import serializers
 from account.models import User
 from account.api.serializers import UserSerializer
-from interview.models import Job, ApplicationRound, JobApplication, Feedback, InterviewRound
-
-
-class JobSerializer(serializers.ModelSerializer):
+from interview.managers import application_count
+from interview.models import Job, ApplicationRound, JobApplication, Feedback, InterviewRound, ApplicationStatusHistory
+
+
+def requested_expansions(request):
+    """
+    Parse ?expand=application,application.job into the set of expanded
+    paths. A dotted path implies its parents, so this example gives
+    {'application', 'application.job'}.
+    """
+    expansions = set()
+    for path in request.query_params.get('expand', '').split(','):
+        parts = [part.strip() for part in path.split('.') if part.strip()]
+        for depth in range(1, len(parts) + 1):
+            expansions.add('.'.join(parts[:depth]))
+    return expansions
+
+
+class ExpandableFieldsMixin:
+    """
+    Let clients shape read responses with query parameters:
+
+    - ?expand=application,application.job includes the named *_details
+      blocks (the name is the block without its _details suffix; dotted
+      names reach into an expanded block). Every *_details block is left
+      out unless it is expanded.
+    - ?fields=id,status returns only the listed top-level fields.
+
+    Views pair this with ExpandableQuerysetMixin, which loads exactly the
+    expanded relations. Serializers used without a request (e.g. in a
+    task) keep all their fields.
+    """
+
+    @property
+    def expansion_prefix(self):
+        # The dotted path of this serializer below the top-level one
+        parts = []
+        node = self
+        while node.parent is not None:
+            if node.field_name.endswith('_details'):
+                parts.append(node.field_name[:-len('_details')])
+            node = node.parent
+        return ''.join(f'{part}.' for part in reversed(parts))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None:
+            return fields
+
+        prefix = self.expansion_prefix
+        expansions = requested_expansions(request)
+        for name in [name for name in fields if name.endswith('_details')]:
+            if prefix + name[:-len('_details')] not in expansions:
+                del fields[name]
+
+        # Sparse fieldsets only apply to reads, so writes still validate every field
+        requested = request.query_params.get('fields')
+        if requested and not prefix and request.method in ('GET', 'HEAD'):
+            wanted = {name.strip() for name in requested.split(',')}
+            for name in [name for name in fields if name not in wanted]:
+                del fields[name]
+        return fields
+
+
+class JobSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     application_count = serializers.SerializerMethodField()
 
+    # What a conditional GET of an expanded job checks (see
+    # ConditionalGetMixin): the application count is read from the
+    # statistics row
+    conditional_fields = ['updated_at', 'statistics__updated_at']
+
     class Meta:
         model = Job
         fields = ['id', 'title', 'description', 'department', 'position', 'is_open', 'application_count']
+
+    @staticmethod
+    def get_prefetch_queryset():
+        # Nested jobs are prefetched with their application count annotated
+        return Job.objects.with_application_count()
+
+    @staticmethod
+    def get_values_expressions(prefix):
+        # How ValuesRowBuilder reads application_count from .values() rows
+        return {'application_count': application_count(prefix)}
     
     def get_application_count(self, obj):
-        return obj.applications.count()
+        # List views annotate the count (see JobQuerySet.with_application_count),
+        # only fall back to a COUNT query for single, unannotated instances.
+        count = getattr(obj, 'application_count', None)
+        if count is None:
+            count = obj.applications.count()
+        return count
 
-class JobApplicationSerializer(serializers.ModelSerializer):
+class JobApplicationSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
 
     job_details = JobSerializer(source='job', read_only=True)
     candidate_details = UserSerializer(source='candidate', read_only=True)
@@ -22,18 +104,16 @@ class JobApplicationSerializer(serializers.ModelSerializer):
     class Meta:
         model = JobApplication
         fields = ['id', 'job', 'job_details','candidate', 'candidate_details','applied_on', 'status', 'is_selected']
-
-    def validate(self, data):
-        if JobApplication.objects.filter(job=data['job'], candidate=data['candidate']).exists():
-            raise serializers.ValidationError("Candidate has already applied to this job.")
-        return data
+        # Duplicates are rejected by the unique_job_application constraint
+        # when the row is inserted (see JobApplicationListView.perform_create)
+        validators = []
     
-class InterviewRoundSerializer(serializers.ModelSerializer):
+class InterviewRoundSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = InterviewRound
         fields = ['id', 'round_type']
 
-class ApplicationRoundSerializer(serializers.ModelSerializer):
+class ApplicationRoundSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     application_details = JobApplicationSerializer(source='application', read_only=True)
     interviewer_details = UserSerializer(source='interviewer', read_only=True)
     round_details = InterviewRoundSerializer(source='round', read_only=True)
@@ -48,7 +128,7 @@ class ApplicationRoundSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Cannot schedule interviews in the past.")
         return value
     
-class FeedbackSerializer(serializers.ModelSerializer):
+class FeedbackSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     application_round_details = ApplicationRoundSerializer(source='application_round', read_only=True)
     class Meta:
         model = Feedback
@@ -62,13 +142,8 @@ class FeedbackSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         feedback = super().create(validated_data)
 
-        app = feedback.application_round.application
-        total_rounds = app.rounds.count()
-        completed_feedbacks = Feedback.objects.filter(application_round__application=app).count()
-
-        if total_rounds == completed_feedbacks:
-            app.status = 'closed'
-            app.save()
+        # feedback_count was incremented by the post_save signal
+        JobApplication.objects.close_if_all_feedback_given(feedback.application_round.application_id)
 
         return feedback
 
@@ -81,3 +156,46 @@ class JobApplicationStatusUpdateSerializer(serializers.ModelSerializer):
         instance.status = validated_data.get('status', instance.status)
         instance.save()
         return instance
+
+
+class SelectCandidatesSerializer(serializers.Serializer):
+    application_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=100
+    )
+
+
+class ApplicationStatusHistorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ApplicationStatusHistory
+        fields = ['id', 'application', 'old_status', 'new_status', 'is_selected', 'changed_by', 'changed_at']
+
+
+class ApplicationStatusChangeSerializer(serializers.Serializer):
+    id = serializers.IntegerField(min_value=1)
+    status = serializers.ChoiceField(choices=JobApplication.STATUS_CHOICES)
+
+
+class ApplicationStatusChangesSerializer(serializers.Serializer):
+    changes = ApplicationStatusChangeSerializer(many=True, allow_empty=False, max_length=1000)
+
+    def validate_changes(self, changes):
+        ids = [change['id'] for change in changes]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError("Each application can only be changed once.")
+        return changes
+
+
+class DailyStatisticsQuerySerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    group_by = serializers.ChoiceField(choices=['day', 'department', 'job'], default='day')
+    department = serializers.CharField(required=False)
+    job_id = serializers.IntegerField(required=False, min_value=1)
+
+    def validate(self, data):
+        if data['start'] > data['end']:
+            raise serializers.ValidationError("start can't be after end.")
+        if (data['end'] - data['start']).days >= 366:
+            raise serializers.ValidationError("The range can be at most 366 days.")
+        return data
+
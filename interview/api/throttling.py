@@ -1,8 +1,99 @@
-from rest_framework.throttling import UserRateThrottle
+import uuid
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from rest_framework import throttling
+
+# One call per check: drop the requests that left the window, then either
+# log this request or return how long until the oldest one leaves it.
+# The time is Redis' own, so every worker shares one clock.
+SLIDING_WINDOW_SCRIPT = """
+redis.replicate_commands()
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+if redis.call('ZCARD', KEYS[1]) < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    redis.call('EXPIRE', KEYS[1], math.ceil(window))
+    return {1, '0'}
+end
+
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+if oldest[2] == nil then
+    return {0, tostring(window)}
+end
+return {0, tostring(tonumber(oldest[2]) + window - now)}
+"""
+
+
+@lru_cache(maxsize=None)
+def get_sliding_window_script():
+    """
+    Return the registered throttle script (sent with EVALSHA, loaded on
+    first use), or None when THROTTLE_REDIS_URL is not set.
+    """
+    if not settings.THROTTLE_REDIS_URL:
+        return None
+    return redis.Redis.from_url(settings.THROTTLE_REDIS_URL).register_script(SLIDING_WINDOW_SCRIPT)
+
+
+class SlidingWindowThrottleMixin:
+    """
+    Keep each client's request log in a Redis sorted set shared by every
+    worker, and check and update it atomically with SLIDING_WINDOW_SCRIPT
+    instead of reading, trimming and writing back a list in the cache.
+
+    Without THROTTLE_REDIS_URL, or when Redis can't be reached, falls back
+    to REST framework's cache-based throttling.
+
+    Throttles that refuse a request add themselves to
+    request.exceeded_throttles, so the exception handler can tell which
+    limit was hit.
+    """
+
+    def allow_request(self, request, view):
+        allowed = self._allow_request(request, view)
+        if not allowed:
+            request.exceeded_throttles = [*getattr(request, 'exceeded_throttles', []), self]
+        return allowed
+
+    def _allow_request(self, request, view):
+        script = get_sliding_window_script()
+        if script is None or self.rate is None:
+            return super().allow_request(request, view)
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        try:
+            allowed, wait = script(keys=[self.key], args=[self.num_requests, self.duration, uuid.uuid4().hex])
+        except redis.RedisError:
+            return super().allow_request(request, view)
+        self.redis_wait = float(wait)
+        return bool(allowed)
+
+    def wait(self):
+        if hasattr(self, 'redis_wait'):
+            return self.redis_wait
+        return super().wait()
+
+
+class AnonRateThrottle(SlidingWindowThrottleMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(SlidingWindowThrottleMixin, throttling.UserRateThrottle):
+    pass
+
 
 class FeedbackRateThrottle(UserRateThrottle):
     """
-    Throttle for feedback submission - limits how many feedback submissions 
+    Throttle for feedback submission - limits how many feedback submissions
     an interviewer can make in a day.
     """
     scope = 'interview_feedback'
@@ -10,7 +101,7 @@ class FeedbackRateThrottle(UserRateThrottle):
 
 class JobApplicationRateThrottle(UserRateThrottle):
     """
-    Throttle for job applications - limits how many job applications 
+    Throttle for job applications - limits how many job applications
     a candidate can submit in a day.
     """
-    scope = 'job_application' 
\ No newline at end of file
+    scope = 'job_application'
@@ -1,25 +1,37 @@
 from django.urls import path
 from interview.api.views import (JobListCreateView,JobDetailView,JobApplicationsListView,OpenJobsListView,JobApplicationListView,
-                                 JobApplicationDetailView,SelectCandidateView,MyApplicationsListView,InterviewRoundListView,
-                                 ApplicationRoundListView,FeedbackCreateView,FeedbackListView,ApplicationStatisticsView)
+                                 JobApplicationDetailView,SelectCandidateView,SelectCandidatesView,ApplicationStatusHistoryView,
+                                 ApplicationStatusUpdateView,MyApplicationsListView,InterviewRoundListView,
+                                 ApplicationRoundListView,FeedbackCreateView,FeedbackListView,ApplicationStatisticsView,
+                                 JobApplicationExportView,FeedbackExportView,
+                                 UpcomingInterviewsView,JobListCacheStatsView,MyInterviewsView,DailyApplicationStatisticsView)
 
 urlpatterns = [
     path('job/',JobListCreateView.as_view(),name='job-list-create'),
     path('job/<int:pk>/',JobDetailView.as_view(),name='job-detail'),
     path('job/<int:pk>/applications/',JobApplicationsListView.as_view(),name='job-applications'),
     path('job/open/',OpenJobsListView.as_view(),name='open-jobs'),
+    path('job/cache/stats/',JobListCacheStatsView.as_view(),name='job-list-cache-stats'),
 
-    path('applications/',JobApplicationsListView.as_view(),name='applications-list'),
+    path('applications/',JobApplicationListView.as_view(),name='applications-list'),
+    path('applications/export/',JobApplicationExportView.as_view(),name='applications-export'),
     path('applications/<int:pk>',JobApplicationDetailView.as_view(),name='application-detail'),
     path('applications/<int:pk>/select/',SelectCandidateView.as_view(),name='select-candidate'),
+    path('applications/select/',SelectCandidatesView.as_view(),name='select-candidates'),
+    path('applications/<int:pk>/history/',ApplicationStatusHistoryView.as_view(),name='application-history'),
+    path('applications/status/',ApplicationStatusUpdateView.as_view(),name='application-status-update'),
     path('my-applications/',MyApplicationsListView.as_view(),name='my-applications'),
     path('applications/statistics/',ApplicationStatisticsView.as_view(),name='application-statistics'),
+    path('applications/statistics/daily/',DailyApplicationStatisticsView.as_view(),name='application-daily-statistics'),
 
     path('interview-rounds/',InterviewRoundListView.as_view(),name='rounds-list'),
 
     path('applications/<int:pk>/round/',ApplicationRoundListView.as_view(),name='application-round-detail'),
     path('application-round/<int:pk>/feedback/',FeedbackCreateView.as_view(),name='create-feedback'),
     path('feedback/',FeedbackListView.as_view(),name='feedback-list'),
+    path('feedback/export/',FeedbackExportView.as_view(),name='feedback-export'),
+    path('interviews/mine/',MyInterviewsView.as_view(),name='my-interviews'),
+    path('interviews/upcoming/',UpcomingInterviewsView.as_view(),name='upcoming-interviews'),
     
 
 ]
\ No newline at end of file
@@ -0,0 +1,125 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.relations import PrimaryKeyRelatedField, RelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer, SerializerMethodField
+
+
+class UnsupportedField(Exception):
+    pass
+
+
+class ValuesRowBuilder:
+    """
+    Build a serializer's read output from .values() rows instead of model
+    instances.
+
+    The serializer's readable fields (after ?fields=/?expand= filtering)
+    are turned once into a list of (output name, values() key, mapper),
+    where the mapper is the field's own to_representation, so the output is
+    the same as the serializer's. Nested serializers become nested
+    builders reading through the relation (application__job__title), and a
+    SerializerMethodField is read from an expression the serializer
+    provides through get_values_expressions(prefix).
+
+    for_serializer() returns None when a field can't be read this way
+    (a property, a many=True relation, ...); callers then fall back to the
+    serializer.
+    """
+
+    def __init__(self, serializer, model, prefix=''):
+        # (output name, values() key, mapper, nested builder), in field order
+        self.entries = []
+        self.expressions = {}
+        # The relation itself, to render a missing related object as None
+        self.presence_key = prefix[:-2] if prefix else None
+
+        method_expressions = {}
+        get_values_expressions = getattr(serializer, 'get_values_expressions', None)
+        if get_values_expressions is not None:
+            method_expressions = get_values_expressions(prefix)
+
+        for field in serializer._readable_fields:
+            name = field.field_name
+            if isinstance(field, ListSerializer):
+                raise UnsupportedField(name)
+            if isinstance(field, BaseSerializer):
+                related_model = self.resolve(model, field.source_attrs).related_model
+                builder = ValuesRowBuilder(field, related_model, f'{prefix}{field.source}__')
+                self.entries.append((name, None, None, builder))
+            elif isinstance(field, SerializerMethodField):
+                if name not in method_expressions:
+                    raise UnsupportedField(name)
+                key = '_values_' + f'{prefix}{name}'.replace('__', '_')
+                self.expressions[key] = method_expressions[name]
+                self.entries.append((name, key, None, None))
+            elif isinstance(field, RelatedField):
+                # Only primary keys can be rendered from the foreign key column
+                if not isinstance(field, PrimaryKeyRelatedField):
+                    raise UnsupportedField(name)
+                self.resolve(model, field.source_attrs)
+                mapper = field.pk_field.to_representation if field.pk_field is not None else None
+                self.entries.append((name, prefix + '__'.join(field.source_attrs), mapper, None))
+            else:
+                self.resolve(model, field.source_attrs)
+                self.entries.append((name, prefix + '__'.join(field.source_attrs), field.to_representation, None))
+
+    @staticmethod
+    def resolve(model, attrs):
+        # Only concrete model fields (and relations to them) can be selected
+        if not attrs:
+            raise UnsupportedField('*')
+        field = None
+        for attr in attrs:
+            if model is None:
+                raise UnsupportedField(attr)
+            try:
+                field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                raise UnsupportedField(attr)
+            if field.many_to_many or field.one_to_many:
+                raise UnsupportedField(attr)
+            model = field.related_model
+        return field
+
+    @classmethod
+    def for_serializer(cls, serializer):
+        try:
+            return cls(serializer, serializer.Meta.model)
+        except UnsupportedField:
+            return None
+
+    @property
+    def keys(self):
+        keys = [self.presence_key] if self.presence_key is not None else []
+        for _, key, _, builder in self.entries:
+            if builder is not None:
+                keys.extend(builder.keys)
+            elif key not in self.expressions:
+                keys.append(key)
+        return keys
+
+    @property
+    def all_expressions(self):
+        expressions = dict(self.expressions)
+        for _, _, _, builder in self.entries:
+            if builder is not None:
+                expressions.update(builder.all_expressions)
+        return expressions
+
+    def values(self, queryset, *extra_keys):
+        """
+        Turn the queryset into the .values() rows this builder reads.
+        """
+        keys = list(dict.fromkeys([*self.keys, *extra_keys]))
+        return queryset.prefetch_related(None).values(*keys, **self.all_expressions)
+
+    def build(self, row):
+        if self.presence_key is not None and row[self.presence_key] is None:
+            return None
+        data = {}
+        for name, key, mapper, builder in self.entries:
+            if builder is not None:
+                data[name] = builder.build(row)
+            else:
+                value = row[key]
+                data[name] = value if value is None or mapper is None else mapper(value)
+        return data
@@ -1,27 +1,58 @@
 from rest_framework import status,generics,filters
+from adrf.generics import ListAPIView as AsyncListAPIView
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import api_view
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import Sum
+from psycopg2.errorcodes import CHECK_VIOLATION, NO_DATA_FOUND
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
+from django.shortcuts import get_object_or_404
 
 from account.api.serializers import UserSerializer
 from account.models import User
 
-from interview.models import Job,JobApplication,InterviewRound,ApplicationRound,Feedback
-from interview.api.serializers import JobSerializer,JobApplicationSerializer,InterviewRoundSerializer,ApplicationRoundSerializer,FeedbackSerializer,JobApplicationStatusUpdateSerializer
+from interview.models import Job,JobApplication,InterviewRound,ApplicationRound,Feedback,ApplicationStatusHistory,DailyHiringRollup
+from interview.api.serializers import JobSerializer,JobApplicationSerializer,InterviewRoundSerializer,ApplicationRoundSerializer,FeedbackSerializer,JobApplicationStatusUpdateSerializer,SelectCandidatesSerializer,ApplicationStatusHistorySerializer,ApplicationStatusChangesSerializer,DailyStatisticsQuerySerializer
 from interview.api.permissions import IsAdmin, IsInterviewer, IsCandidate, IsAdminOrInterviewer, AdminFullInterviewerReadOnly
-from interview.api.throttling import FeedbackRateThrottle, JobApplicationRateThrottle
-from interview.db_procedures import select_candidate, update_application_status, get_application_statistics
+from interview.api.throttling import FeedbackRateThrottle, JobApplicationRateThrottle, UserRateThrottle
+from interview.api.filters import FullTextSearchFilter
+from interview.api.pagination import KeysetPagination
+from interview.api.mixins import (AsyncConditionalGetMixin, AsyncListMixin, CachedJobListMixin, ConditionalGetMixin,
+                                  ExpandableQuerysetMixin, StreamingExportMixin, ValuesListMixin)
+from interview.cache import get_job_list_cache_stats
+from interview.db_procedures import (select_candidate, select_candidates, status_changed_by, update_application_statuses,
+                                     get_application_statistics)
 
 
-class JobListCreateView(generics.ListCreateAPIView):
-    queryset = Job.objects.all()
+def save_application(serializer):
+    """
+    Save a JobApplicationSerializer, turning a violation of the
+    unique_job_application constraint into a validation error. The
+    savepoint keeps an outer transaction usable after the failed write.
+    """
+    try:
+        with transaction.atomic():
+            return serializer.save()
+    except IntegrityError as error:
+        diag = getattr(error.__cause__, 'diag', None)
+        if diag is None or diag.constraint_name != 'unique_job_application':
+            raise
+        raise ValidationError({'non_field_errors': ["Candidate has already applied to this job."]})
+
+
+class JobListCreateView(CachedJobListMixin, ConditionalGetMixin, generics.ListCreateAPIView):
+    queryset = Job.objects.with_application_count()
+    # Application counts are read from the job's statistics row
+    conditional_fields = ['updated_at', 'statistics__updated_at']
     serializer_class = JobSerializer
     permission_classes = [IsAuthenticated, AdminFullInterviewerReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['department', 'position', 'is_open'] #/jobs/?department=Python
-    search_fields = ['title', 'description', 'department'] #/jobs/?search=developer 
+    # Title, department and description, see Job.search_vector
+    search_vector_field = 'search_vector' #/jobs/?search=developer 
     ordering_fields = ['created_at']
     
     def get_permissions(self):
@@ -30,8 +61,9 @@ class JobListCreateView(generics.ListCreateAPIView):
         return super().get_permissions()
 
 
-class JobDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Job.objects.all()
+class JobDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Job.objects.with_application_count()
+    conditional_fields = ['updated_at', 'statistics__updated_at']
     serializer_class = JobSerializer
     permission_classes = [IsAuthenticated, AdminFullInterviewerReadOnly]
     
@@ -40,20 +72,32 @@ class JobDetailView(generics.RetrieveUpdateDestroyAPIView):
             self.permission_classes = [IsAuthenticated, IsAdmin]  # Only admin can update/delete
         return super().get_permissions()
 
-class JobApplicationsListView(generics.ListAPIView):
+class JobApplicationsListView(ExpandableQuerysetMixin, generics.ListAPIView):
+    queryset = JobApplication.objects.all()
     serializer_class = JobApplicationSerializer
     permission_classes = [IsAuthenticated, IsAdminOrInterviewer]
+    pagination_class = KeysetPagination
+    ordering = '-applied_on'
     
     def get_queryset(self):
         job_id = self.kwargs.get('pk')
-        return JobApplication.objects.filter(job_id=job_id) #to get all job applications for a specific job
+        return super().get_queryset().filter(job_id=job_id) #to get all job applications for a specific job
     
-class OpenJobsListView(generics.ListAPIView):
-    queryset = Job.objects.filter(is_open = True)
+class OpenJobsListView(CachedJobListMixin, AsyncListMixin, AsyncListAPIView):
+    queryset = Job.objects.with_application_count().filter(is_open = True)
     serializer_class = JobSerializer
     permission_classes = [IsAuthenticated]  # All authenticated users can see open jobs
 
-class JobApplicationListView(generics.ListCreateAPIView):
+class JobListCacheStatsView(APIView):
+    """
+    Hit/miss counters of the job listing cache, for monitoring.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_job_list_cache_stats())
+
+class JobApplicationListView(ValuesListMixin, ExpandableQuerysetMixin, generics.ListCreateAPIView):
     queryset = JobApplication.objects.all()
     serializer_class = JobApplicationSerializer
     permission_classes = [IsAuthenticated]
@@ -61,6 +105,8 @@ class JobApplicationListView(generics.ListCreateAPIView):
     filter_backends = [DjangoFilterBackend,filters.OrderingFilter]
     filterset_fields = ['status', 'is_selected', 'job']
     ordering_fields = ['applied_on', 'status']
+    ordering = '-applied_on'
+    pagination_class = KeysetPagination
     
     def get_permissions(self):
         if self.request.method == 'POST':
@@ -74,20 +120,45 @@ class JobApplicationListView(generics.ListCreateAPIView):
             # Apply job application throttle only for POST requests (new applications)
             return [JobApplicationRateThrottle()]
         return [UserRateThrottle()]
+
+    def perform_create(self, serializer):
+        # A duplicate application is rejected by the unique_job_application
+        # constraint, so submitting costs a single INSERT and two concurrent
+        # requests cannot both succeed
+        save_application(serializer)
         
     def get_queryset(self):
-        user = self.request.user
-        if user.role == 'interviewer':
-            # Interviewers can only see applications where they are assigned
-            interviewer_rounds = ApplicationRound.objects.filter(interviewer=user).values_list('application_id', flat=True)
-            return JobApplication.objects.filter(id__in=interviewer_rounds)
-        elif user.role == 'candidate':
-            # Candidates can only see their own applications
-            return JobApplication.objects.filter(candidate=user)
-        return super().get_queryset()  # Admin can see all
-
-class JobApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
+        # Admin sees all, interviewers the applications they have a round
+        # in, candidates their own applications
+        return super().get_queryset().visible_to(self.request.user)
+
+
+class JobApplicationExportView(StreamingExportMixin, JobApplicationListView):
+    """
+    Export every application the user may see (the same scoping and
+    filters as the list), as CSV or NDJSON.
+    """
+    http_method_names = ['get', 'head', 'options']
+    filter_backends = [DjangoFilterBackend]
+    export_filename = 'applications'
+    export_columns = {
+        'id': 'id',
+        'job': 'job_id',
+        'job_title': 'job__title',
+        'department': 'job__department',
+        'candidate': 'candidate_id',
+        'candidate_email': 'candidate__email',
+        'status': 'status',
+        'is_selected': 'is_selected',
+        'rounds_count': 'rounds_count',
+        'feedback_count': 'feedback_count',
+        'applied_on': 'applied_on',
+        'updated_at': 'updated_at',
+    }
+
+class JobApplicationDetailView(ConditionalGetMixin, ExpandableQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = JobApplication.objects.all()
+    conditional_fields = ['updated_at', 'job__updated_at', 'job__statistics__updated_at']
     permission_classes = [IsAuthenticated, AdminFullInterviewerReadOnly]
     
     def get_serializer_class(self):
@@ -95,6 +166,12 @@ class JobApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
             return JobApplicationStatusUpdateSerializer
         return JobApplicationSerializer
 
+    def perform_update(self, serializer):
+        # Moving an application onto a (job, candidate) pair that already
+        # has one is rejected by the same constraint as a duplicate POST
+        with status_changed_by(self.request.user.email):
+            save_application(serializer)
+
 class SelectCandidateView(generics.UpdateAPIView):
     queryset = JobApplication.objects.all()
     serializer_class = JobApplicationStatusUpdateSerializer
@@ -116,9 +193,83 @@ class SelectCandidateView(generics.UpdateAPIView):
         # Return the updated instance
         serializer = self.get_serializer(instance)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class SelectCandidatesView(generics.GenericAPIView):
+    """
+    Select several candidates, for different jobs, at once: every
+    selection is made, or (if an application doesn't exist or two are for
+    the same job) none is.
+    """
+    queryset = JobApplication.objects.all()
+    serializer_class = SelectCandidatesSerializer
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['application_ids']
+        # The savepoint keeps an outer transaction usable after a refusal
+        try:
+            with transaction.atomic():
+                selected = select_candidates(application_ids=ids, selected_by=request.user.email)
+        except DatabaseError as error:
+            # Raised by the function for ids it can't select
+            cause = error.__cause__
+            if getattr(cause, 'pgcode', None) not in (NO_DATA_FOUND, CHECK_VIOLATION):
+                raise
+            raise ValidationError({'application_ids': [cause.diag.message_primary]})
+
+        applications = {application.pk: application for application in self.get_queryset().filter(pk__in=ids)}
+        return Response([
+            {**JobApplicationSerializer(applications[row['application_id']], context=self.get_serializer_context()).data,
+             'closed_applications': row['closed_applications']}
+            for row in selected
+        ], status=status.HTTP_200_OK)
+    
+
+class ApplicationStatusUpdateView(generics.GenericAPIView):
+    """
+    Change the status of many applications at once, e.g. moving a batch of
+    candidates to the next stage. Responds with the outcome for each
+    application: 'updated', 'unchanged' (it already had that status) or
+    'not_found'.
+    """
+    queryset = JobApplication.objects.all()
+    serializer_class = ApplicationStatusChangesSerializer
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def patch(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = update_application_statuses(
+            changes=[(change['id'], change['status']) for change in serializer.validated_data['changes']],
+            updated_by=request.user.email,
+        )
+        return Response([
+            {'id': row['application_id'], 'old_status': row['old_status'], 'status': row['new_status'], 'outcome': row['outcome']}
+            for row in results
+        ], status=status.HTTP_200_OK)
+
+
+class ApplicationStatusHistoryView(generics.ListAPIView):
+    """
+    Status changes and selection of one application, newest first.
+    """
+    serializer_class = ApplicationStatusHistorySerializer
+    permission_classes = [IsAuthenticated, IsAdminOrInterviewer]
+    pagination_class = KeysetPagination
+    ordering = '-changed_at'
+
+    def get_queryset(self):
+        # Only the history of applications the user can see
+        application = get_object_or_404(JobApplication.objects.visible_to(self.request.user), pk=self.kwargs['pk'])
+        return ApplicationStatusHistory.objects.filter(application_id=application.pk)
     
 
-class MyApplicationsListView(generics.ListAPIView):
+class MyApplicationsListView(AsyncConditionalGetMixin, ExpandableQuerysetMixin, AsyncListMixin, AsyncListAPIView):
+    queryset = JobApplication.objects.all()
+    conditional_fields = ['updated_at', 'job__updated_at', 'job__statistics__updated_at']
     serializer_class = JobApplicationSerializer
     permission_classes = [IsAuthenticated, IsCandidate]
     
@@ -126,44 +277,38 @@ class MyApplicationsListView(generics.ListAPIView):
         user = self.request.user
         if user.role != 'candidate':
             return JobApplication.objects.none()
-        return JobApplication.objects.filter(candidate=user)
+        return super().get_queryset().filter(candidate=user)
 
 class InterviewRoundListView(generics.ListCreateAPIView):
     queryset = InterviewRound.objects.all()
     serializer_class = InterviewRoundSerializer
     permission_classes = [IsAuthenticated, AdminFullInterviewerReadOnly]
 
-class ApplicationRoundListView(generics.ListCreateAPIView):
+class ApplicationRoundListView(ExpandableQuerysetMixin, generics.ListCreateAPIView):
     queryset = ApplicationRound.objects.all()
     serializer_class = ApplicationRoundSerializer
     permission_classes = [IsAuthenticated, AdminFullInterviewerReadOnly]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['interviewer']
     ordering_fields = ['scheduled_time']
+    ordering = 'scheduled_time'
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         application_id = self.kwargs.get('pk')
-        user = self.request.user
-        queryset = ApplicationRound.objects.filter(application_id=application_id)
+        queryset = super().get_queryset().filter(application_id=application_id)
         
         # If interviewer, only show rounds they're assigned to
-        if user.role == 'interviewer':
-            queryset = queryset.filter(interviewer=user)
-            
-        return queryset
+        return queryset.visible_to(self.request.user)
 
-class ApplicationRoundDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ApplicationRoundDetailView(ExpandableQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = ApplicationRound.objects.all()
     serializer_class = ApplicationRoundSerializer
     permission_classes = [IsAuthenticated, AdminFullInterviewerReadOnly]
     
     def get_queryset(self):
-        user = self.request.user
-        
         # If interviewer, only allow access to their own interview rounds
-        if user.role == 'interviewer':
-            return ApplicationRound.objects.filter(interviewer=user)
-        return ApplicationRound.objects.all()  # Admin can access all
+        return super().get_queryset().visible_to(self.request.user)
 
 class FeedbackCreateView(generics.CreateAPIView):
     serializer_class = FeedbackSerializer
@@ -186,22 +331,25 @@ class FeedbackCreateView(generics.CreateAPIView):
         from interview.tasks import send_feedback_notification
         send_feedback_notification.delay(feedback.id)
 
-class FeedbackListView(generics.ListAPIView):
+class FeedbackListView(ValuesListMixin, ExpandableQuerysetMixin, generics.ListAPIView):
     """
     Retrieve all feedback for:
     - a specific application round (/?application_round=<id>)
     - a specific job application (/?application=<id>)
     - a specific candidate (/?candidate=<id>)
     """
+    queryset = Feedback.objects.all()
     serializer_class = FeedbackSerializer
     permission_classes = [IsAuthenticated, AdminFullInterviewerReadOnly]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['application_round', 'application_round__application']
     ordering_fields = ['created_at']
+    ordering = '-created_at'
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         user = self.request.user
-        queryset = Feedback.objects.all()
+        queryset = super().get_queryset()
         
         # Get query parameters
         application_round_id = self.request.query_params.get('application_round')
@@ -218,18 +366,31 @@ class FeedbackListView(generics.ListAPIView):
         if candidate_id:
             queryset = queryset.filter(application_round__application__candidate_id=candidate_id)
         
-        # Role-based access control
-        if user.role == 'admin':
-            # Admin can see all feedback
-            return queryset
-        elif user.role == 'interviewer':
-            # Interviewers can only see feedback for rounds they conducted
-            return queryset.filter(application_round__interviewer=user)
-        elif user.role == 'candidate':
-            # Candidates can only see feedback for their own applications
-            return queryset.filter(application_round__application__candidate=user)
-        
-        return Feedback.objects.none()  # Default to empty queryset
+        # Role-based access control: admin sees all feedback, interviewers
+        # feedback for rounds they conducted, candidates feedback for their
+        # own applications
+        return queryset.visible_to(user)
+
+
+class FeedbackExportView(StreamingExportMixin, FeedbackListView):
+    """
+    Export all the feedback the user may see (the same scoping and filters
+    as FeedbackListView), as CSV or NDJSON.
+    """
+    filter_backends = [DjangoFilterBackend]
+    export_filename = 'feedback'
+    export_columns = {
+        'id': 'id',
+        'application_round': 'application_round_id',
+        'application': 'application_round__application_id',
+        'job': 'application_round__application__job_id',
+        'candidate': 'application_round__application__candidate_id',
+        'interviewer': 'application_round__interviewer_id',
+        'rating': 'rating',
+        'comments': 'comments',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
 
 # class CandidateFeedbackListView(generics.ListAPIView):
 #     serializer_class = FeedbackSerializer
@@ -247,7 +408,9 @@ class FeedbackListView(generics.ListAPIView):
         
 #         return feedbacks
 
-class MyInterviewsView(generics.ListAPIView):
+class MyInterviewsView(AsyncConditionalGetMixin, ExpandableQuerysetMixin, AsyncListMixin, AsyncListAPIView):
+    queryset = ApplicationRound.objects.all()
+    conditional_fields = ['updated_at', 'application__updated_at', 'application__job__updated_at']
     serializer_class = ApplicationRoundSerializer
     permission_classes = [IsAuthenticated, IsInterviewer]
 
@@ -257,35 +420,40 @@ class MyInterviewsView(generics.ListAPIView):
         if user.role != 'interviewer':
             return ApplicationRound.objects.none()
         
-        return ApplicationRound.objects.filter(interviewer=user)
+        return super().get_queryset().filter(interviewer=user)
 
-class UpcomingInterviewsView(generics.ListAPIView):
+class UpcomingInterviewsView(ExpandableQuerysetMixin, AsyncListMixin, AsyncListAPIView):
+    queryset = ApplicationRound.objects.all()
     serializer_class = ApplicationRoundSerializer
     permission_classes = [IsAuthenticated, IsAdminOrInterviewer]
+    pagination_class = KeysetPagination
+    ordering = 'scheduled_time'
     
     def get_queryset(self):
         from django.utils import timezone
         user = self.request.user
         
-        if user.role == 'interviewer':
-            # Interviewers can only see their own upcoming interviews
-            return ApplicationRound.objects.filter(
-                interviewer=user,
-                scheduled_time__gt=timezone.now()
-            ).order_by('scheduled_time')
-        else:
-            # Admins can see all upcoming interviews
-            return ApplicationRound.objects.filter(
-                scheduled_time__gt=timezone.now()
-            ).order_by('scheduled_time')
+        # Interviewers can only see their own upcoming interviews, admins all
+        return super().get_queryset().visible_to(user).filter(
+            scheduled_time__gt=timezone.now()
+        ).order_by('scheduled_time')
 
-class ApplicationStatisticsView(generics.RetrieveAPIView):
+class ApplicationStatisticsView(ConditionalGetMixin, generics.RetrieveAPIView):
     """
     Get application statistics for all jobs or a specific job.
     
     Use ?job_id=<id> to get statistics for a specific job.
     """
     permission_classes = [IsAuthenticated, IsAdmin]  # Only admins can view statistics
+    # The statistics rows are updated by triggers on every change they count
+    conditional_fields = ['updated_at', 'statistics__updated_at']
+    
+    def get_conditional_queryset(self):
+        job_id = self.request.query_params.get('job_id')
+        if job_id:
+            # Let retrieve() answer ids that aren't numbers as it always has
+            return Job.objects.filter(pk=job_id) if job_id.isdigit() else Job.objects.none()
+        return Job.objects.all()
     
     def retrieve(self, request, *args, **kwargs):
         job_id = request.query_params.get('job_id')
@@ -300,4 +468,45 @@ class ApplicationStatisticsView(generics.RetrieveAPIView):
         return Response(statistics)
 
 
+class DailyApplicationStatisticsView(generics.GenericAPIView):
+    """
+    Hiring activity from ?start= to ?end= (inclusive days, UTC), summed per
+    day, department or job (?group_by=), optionally for one ?department=
+    or ?job_id=.
+
+    Reads only the daily rollups, so it costs the same whatever the size of
+    the application tables, and lags behind them by up to the rollup
+    refresh interval (see CELERY_BEAT_SCHEDULE).
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]  # Only admins can view statistics
+    serializer_class = DailyStatisticsQuerySerializer
+    group_fields = {'day': 'day', 'department': 'department', 'job': 'job_id'}
+    counts = ['applications', 'moved_to_inprogress', 'closed', 'selected', 'feedback_count']
+
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        rollups = DailyHiringRollup.objects.filter(day__range=(params['start'], params['end']))
+        if 'department' in params:
+            rollups = rollups.filter(department=params['department'])
+        if 'job_id' in params:
+            rollups = rollups.filter(job_id=params['job_id'])
+
+        key = self.group_fields[params['group_by']]
+        # Annotations can't reuse the field names
+        rows = rollups.values(key).annotate(
+            **{f'{name}_total': Sum(name) for name in self.counts}, rating_total=Sum('rating_sum'),
+        ).order_by(key)
+        return Response([
+            {
+                key: row[key],
+                **{name: row[f'{name}_total'] for name in self.counts},
+                'average_rating': round(row['rating_total'] / row['feedback_count_total'], 1) if row['feedback_count_total'] else 0.0,
+            }
+            for row in rows
+        ])
+
+
 
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class InterviewConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'interview'
+
+    def ready(self):
+        # Register signal handlers
+        import interview.signals  # noqa: F401
@@ -0,0 +1,78 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+JOB_LIST_VERSION_KEY = 'job-list:version'
+JOB_LIST_HITS_KEY = 'job-list:hits'
+JOB_LIST_MISSES_KEY = 'job-list:misses'
+
+
+def get_job_list_version():
+    """
+    Return the current version of the cached job listings.
+
+    A missing version (first use, or evicted) starts from the current time
+    rather than from 1, so it can never collide with an older version whose
+    entries are still in the cache.
+    """
+    version = cache.get(JOB_LIST_VERSION_KEY)
+    if version is None:
+        cache.add(JOB_LIST_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(JOB_LIST_VERSION_KEY)
+    return version
+
+
+def _bump_job_list_version():
+    try:
+        cache.incr(JOB_LIST_VERSION_KEY)
+    except ValueError:
+        cache.add(JOB_LIST_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate_job_lists():
+    """
+    Invalidate every cached job listing by moving to a new version.
+
+    The version is bumped immediately and again once the surrounding
+    transaction commits, so a listing cached by a concurrent request in
+    between (which still sees the old rows) is not served afterwards.
+    """
+    _bump_job_list_version()
+    transaction.on_commit(_bump_job_list_version)
+
+
+def job_list_cache_key(view_name, query_params):
+    """
+    Build the cache key for one job listing: the view, the current version
+    and every filter, search and ordering parameter of the request.
+    """
+    params = sorted((key, tuple(sorted(query_params.getlist(key)))) for key in query_params)
+    digest = hashlib.md5(repr(params).encode('utf-8')).hexdigest()
+    return f'job-list:{view_name}:{get_job_list_version()}:{digest}'
+
+
+def record_job_list_lookup(hit):
+    key = JOB_LIST_HITS_KEY if hit else JOB_LIST_MISSES_KEY
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_job_list_cache_stats():
+    """
+    Return hit/miss counters for the job listing cache.
+    """
+    counters = cache.get_many([JOB_LIST_HITS_KEY, JOB_LIST_MISSES_KEY])
+    hits = counters.get(JOB_LIST_HITS_KEY, 0)
+    misses = counters.get(JOB_LIST_MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / lookups, 4) if lookups else None,
+        'version': get_job_list_version(),
+    }
@@ -1,4 +1,12 @@
-from django.db import connection
+import re
+from contextlib import contextmanager
+
+# Stored procedures run on the primary: calls through `connection` (the
+# 'default' database) bypass the replica router. The read-only
+# get_application_statistics() is the exception and follows it.
+from django.db import connection, connections, router, transaction
+
+from interview.models import JobStatistics
 
 
 def select_candidate(application_id, selected_by):
@@ -8,7 +16,7 @@ def select_candidate(application_id, selected_by):
     This procedure:
     1. Marks the application as selected
     2. Sets the application status to 'closed'
-    3. Closes all other applications for the same job
+    3. Closes all other open applications for the same job
     
     Args:
         application_id: The ID of the JobApplication to select
@@ -25,6 +33,32 @@ def select_candidate(application_id, selected_by):
     return True
 
 
+def select_candidates(application_ids, selected_by):
+    """
+    Call the PostgreSQL function that selects several candidates, for
+    different jobs, in one statement (and one transaction).
+
+    Each application is selected as by select_candidate(). Fails without
+    selecting anyone if an application doesn't exist (SQLSTATE P0002) or
+    two of them are for the same job (SQLSTATE 23514).
+
+    Args:
+        application_ids: The IDs of the JobApplications to select
+        selected_by: Username or identifier of the person making the selection
+
+    Returns:
+        A list of dictionaries, one per selected application, with the
+        application_id, job_id and the number of closed_applications
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT * FROM select_candidates(%s::BIGINT[], %s)",
+            [list(application_ids), selected_by]
+        )
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
 def update_application_status(application_id, new_status, updated_by):
     """
     Call the PostgreSQL stored procedure to update a job application's status.
@@ -32,7 +66,7 @@ def update_application_status(application_id, new_status, updated_by):
     This procedure:
     1. Gets the current status
     2. Updates to the new status if different
-    3. Records the change
+    3. Records the change in the status history
     
     Args:
         application_id: The ID of the JobApplication to update
@@ -50,9 +84,54 @@ def update_application_status(application_id, new_status, updated_by):
     return True
 
 
+def update_application_statuses(changes, updated_by):
+    """
+    Call the PostgreSQL function that changes the status of several job
+    applications in one statement (and one transaction).
+
+    Args:
+        changes: (application ID, new status) pairs
+        updated_by: Username or identifier of the person making the change
+
+    Returns:
+        A list of dictionaries, one per application in the order given,
+        with the application_id, old_status, new_status and the outcome:
+        'updated', 'unchanged' or 'not_found'
+    """
+    application_ids = [application_id for application_id, _ in changes]
+    statuses = [new_status for _, new_status in changes]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT * FROM update_application_statuses(%s::BIGINT[], %s::VARCHAR[], %s)",
+            [application_ids, statuses, updated_by]
+        )
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+@contextmanager
+def status_changed_by(changed_by):
+    """
+    Attribute the status changes made inside the block (e.g. by saving a
+    JobApplication through the ORM) to `changed_by` in the status history,
+    which the jobapplication_status_history trigger writes. The block runs
+    in a transaction; changes made outside one are recorded with an empty
+    changed_by.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('ims.status_changed_by', %s, true)", [changed_by])
+        yield
+        # Don't attribute later changes of an enclosing transaction
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('ims.status_changed_by', '', true)")
+
+
 def get_application_statistics(job_id=None):
     """
     Call the PostgreSQL function to get statistics about job applications.
+    The function only reads, so it runs on the database the router picks
+    for reads (a replica during a safe-method request).
     
     Args:
         job_id: Optional job ID to filter by a specific job
@@ -60,7 +139,7 @@ def get_application_statistics(job_id=None):
     Returns:
         A list of dictionaries containing statistics for each job
     """
-    with connection.cursor() as cursor:
+    with connections[router.db_for_read(JobStatistics)].cursor() as cursor:
         if job_id:
             cursor.execute("SELECT * FROM get_application_statistics(%s)", [job_id])
         else:
@@ -71,4 +150,88 @@ def get_application_statistics(job_id=None):
         for row in cursor.fetchall():
             results.append(dict(zip(columns, row)))
             
-    return results 
\ No newline at end of file
+    return results 
+
+def rebuild_job_statistics():
+    """
+    Call the PostgreSQL stored procedure that recomputes the per-job
+    statistics table from the application and feedback tables.
+    
+    The table is normally kept current by triggers; this is only needed
+    to repair it (e.g. after bulk loads with triggers disabled).
+        
+    Returns:
+        True if successful
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("CALL rebuild_job_statistics()")
+    return True
+
+
+def refresh_hiring_rollups(full=False):
+    """
+    Call the PostgreSQL function that brings the daily hiring rollups up to
+    date, recomputing the days with changes since the last refresh.
+
+    Args:
+        full: Rebuild the rollups of every day instead (e.g. after
+              applications or feedback were deleted). The status counts
+              of months whose history was detached are kept as they are.
+
+    Returns:
+        The number of days refreshed
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT refresh_hiring_rollups(%s)", [full])
+        return cursor.fetchone()[0]
+
+
+def create_status_history_partitions(months_ahead=2):
+    """
+    Create the monthly partitions of the application status history, from
+    the current month to `months_ahead` months from now, where missing.
+
+    Returns:
+        The names of the partitions for those months
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT create_application_status_history_partition((CURRENT_DATE + make_interval(months => n))::DATE) "
+            "FROM generate_series(0, %s) AS n",
+            [months_ahead]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def detach_status_history_partitions(before):
+    """
+    Detach the monthly partitions of the application status history for
+    months before `before` (a date). They are left as standalone tables,
+    to archive or drop; their rows no longer appear in the history.
+
+    Each partition is detached in its own short statement, which briefly
+    locks the history table.
+
+    Returns:
+        The names of the detached partitions
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'interview_applicationstatushistory'::regclass
+            ORDER BY c.relname
+            """
+        )
+        # Partitions are named interview_applicationstatushistory_pYYYYMM
+        names = [
+            name for (name,) in cursor.fetchall()
+            if re.fullmatch(r'.*_p\d{6}', name) and name[-6:] < before.strftime('%Y%m')
+        ]
+        for name in names:
+            cursor.execute(
+                f"ALTER TABLE interview_applicationstatushistory DETACH PARTITION {connection.ops.quote_name(name)}"
+            )
+    return names
+
@@ -1,15 +1,30 @@
 # Import necessary libraries
 import os  # For file path operations
 import datetime  # For getting the current year
-from jinja2 import Environment, FileSystemLoader, select_autoescape  # Jinja2 for templates
-from django.core.mail import send_mail  # Django's email function
+import smtplib  # For the SMTP error types we retry on
+import time  # For waiting between retries
+from functools import lru_cache  # To build the Jinja2 environment only once
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape  # Jinja2 for templates
+from django.core.mail import EmailMultiAlternatives, get_connection  # Django's email classes
 from django.conf import settings  # To access Django settings
 
+# A plain text version for email clients that don't support HTML
+PLAIN_TEXT_MESSAGE = (
+    "This email contains formatted content about interview feedback. "
+    "Please use an email client that supports HTML to view it properly."
+)
+
 # Step 1: Create a function to set up the Jinja2 environment
+@lru_cache(maxsize=None)
 def get_jinja_environment():
     """
     This function sets up Jinja2 to find our templates.
     It's like telling Jinja2 where to look for template files.
+    
+    The environment is built once per process and reused, so each template
+    is parsed and compiled once and then kept in memory. Compiled bytecode
+    is also written to disk (JINJA_BYTECODE_CACHE_DIR, or a temp directory),
+    so new worker processes can skip compiling as well.
     """
     # Find the full path to the templates directory
     # __file__ is the current file (email_utils.py)
@@ -22,12 +37,30 @@ def get_jinja_environment():
         # FileSystemLoader tells Jinja2 to load templates from the file system
         loader=FileSystemLoader(templates_dir),
         # autoescape helps secure the templates against XSS attacks
-        autoescape=select_autoescape(['html', 'xml'])
+        autoescape=select_autoescape(['html', 'xml']),
+        # Store compiled templates on disk, shared by all worker processes
+        bytecode_cache=FileSystemBytecodeCache(settings.JINJA_BYTECODE_CACHE_DIR),
+        # Only check template files for changes while developing
+        auto_reload=settings.DEBUG,
     )
     
     # Return the configured environment
     return env
 
+def precompile_email_templates():
+    """
+    Load and compile every template in templates/emails, so the first
+    email a worker sends doesn't pay for it. Called at worker startup.
+    
+    Returns:
+        The number of templates compiled
+    """
+    env = get_jinja_environment()
+    names = env.list_templates(filter_func=lambda name: name.startswith('emails/'))
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
 # Step 2: Create a function to render the email using our template
 def render_feedback_email(template_data, is_candidate=True):
     """
@@ -61,34 +94,117 @@ def render_feedback_email(template_data, is_candidate=True):
     # Fill in the template with our data and return the result
     return template.render(**template_data)
 
-# Step 3: Create a function to send the email
-def send_feedback_notification_email(recipient_email, subject, html_content):
+def render_interview_reminder_email(template_data):
     """
-    This function sends the actual email using Django's email system.
+    This function fills the plain text interview reminder template.
+    
+    Args:
+        template_data: A dictionary with the interviewer's name and the list
+            of their upcoming interviews
+    
+    Returns:
+        The reminder email body as a string
+    """
+    template = get_jinja_environment().get_template('emails/interview_reminder.txt')
+    return template.render(company_name=settings.COMPANY_NAME, **template_data)
+
+# Step 3: Create a function to build an email without sending it
+def build_feedback_notification_email(recipient_email, subject, html_content):
+    """
+    This function builds the email message, ready to be sent later
+    together with other messages (see send_email_messages).
     
     Args:
         recipient_email: The email address to send to
         subject: The email subject line
         html_content: The HTML content of the email (from our template)
+    
+    Returns:
+        An EmailMultiAlternatives message
     """
-    # Use Django's send_mail function to send the email
-    send_mail(
+    message = EmailMultiAlternatives(
         # The subject line of the email
         subject=subject,
-        
-        # A plain text version for email clients that don't support HTML
-        message="This email contains formatted content about interview feedback. "
-               "Please use an email client that supports HTML to view it properly.",
-        
+        # The plain text version of the email
+        body=PLAIN_TEXT_MESSAGE,
         # Who the email appears to be from
         from_email=settings.DEFAULT_FROM_EMAIL,
-        
         # Who to send the email to (as a list)
-        recipient_list=[recipient_email],
-        
-        # The HTML version of the email (with all our styling)
-        html_message=html_content,
-        
-        # Set to False so we can see any errors
-        fail_silently=False,
-    ) 
\ No newline at end of file
+        to=[recipient_email],
+    )
+    # The HTML version of the email (with all our styling)
+    message.attach_alternative(html_content, "text/html")
+    return message
+
+# Step 4: Create a function to send one email
+def send_feedback_notification_email(recipient_email, subject, html_content):
+    """
+    This function sends a single email using Django's email system.
+    To send several emails, build them and use send_email_messages instead.
+    
+    Args:
+        recipient_email: The email address to send to
+        subject: The email subject line
+        html_content: The HTML content of the email (from our template)
+    """
+    send_email_messages([build_feedback_notification_email(recipient_email, subject, html_content)])
+
+def is_transient_smtp_error(error):
+    """
+    Decide whether an SMTP error is worth retrying.
+    
+    4xx replies, dropped connections and network errors are temporary;
+    5xx replies (bad recipient, authentication failure, ...) are not.
+    """
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    # Connection refused, timeouts and other socket errors
+    return isinstance(error, OSError)
+
+# Step 5: Create a function to send many emails over one connection
+def send_email_messages(messages, max_retries=3, retry_backoff=1):
+    """
+    This function sends all messages over a single SMTP connection,
+    instead of opening a new connection (and TLS handshake) per email.
+    
+    If a transient error happens, the connection is reopened after an
+    exponential backoff (retry_backoff, 2 * retry_backoff, ...) and only
+    the messages that were not sent yet are sent again. Permanent errors,
+    or transient ones that outlast max_retries, are raised.
+    
+    Args:
+        messages: A list of EmailMessage objects
+        max_retries: How many times to retry after a transient error
+        retry_backoff: Seconds to wait before the first retry
+    
+    Returns:
+        The number of messages sent
+    """
+    remaining = list(messages)
+    attempt = 0
+
+    while remaining:
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+            while remaining:
+                # send_messages reuses the connection we just opened
+                connection.send_messages(remaining[:1])
+                remaining.pop(0)
+        except Exception as error:
+            if not is_transient_smtp_error(error) or attempt >= max_retries:
+                raise
+            time.sleep(retry_backoff * 2 ** attempt)
+            attempt += 1
+        finally:
+            try:
+                connection.close()
+            except Exception:
+                # The connection is already broken, there is nothing left to clean up
+                pass
+
+    return len(messages)
\ No newline at end of file
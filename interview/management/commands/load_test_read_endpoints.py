@@ -0,0 +1,107 @@
+import http.client
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from account.api.serializers import RoleTokenObtainPairSerializer
+from account.models import User
+
+
+# URL name, and the role to request it as
+ENDPOINTS = [
+    ('open-jobs', 'candidate'),
+    ('my-applications', 'candidate'),
+    ('my-interviews', 'interviewer'),
+    ('upcoming-interviews', 'interviewer'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the hot read endpoints (open jobs, my applications, my interviews, "
+        "upcoming interviews) of a running server with concurrent keep-alive clients, "
+        "and report throughput and latency per endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=32, help="Number of concurrent clients.")
+        parser.add_argument('--duration', type=float, default=10, help="Seconds to run for.")
+        parser.add_argument('--candidate', required=True, help="Email of the candidate to request as.")
+        parser.add_argument('--interviewer', required=True, help="Email of the interviewer to request as.")
+        parser.add_argument(
+            '--endpoints', default=','.join(name for name, _ in ENDPOINTS),
+            help="Comma-separated URL names of the endpoints to request (default: all).",
+        )
+
+    def handle(self, *args, **options):
+        # Tokens are minted here, so the server must share this SECRET_KEY
+        headers = {}
+        for role in ('candidate', 'interviewer'):
+            user = User.objects.filter(email=options[role], role=role).first()
+            if user is None:
+                raise CommandError(f"No {role} with email {options[role]}.")
+            token = RoleTokenObtainPairSerializer.get_token(user).access_token
+            headers[role] = {'Authorization': f'Bearer {token}', 'Accept-Encoding': 'identity'}
+
+        roles = dict(ENDPOINTS)
+        names = [name for name in options['endpoints'].split(',') if name]
+        unknown = [name for name in names if name not in roles]
+        if unknown or not names:
+            raise CommandError(f"Unknown endpoints: {', '.join(unknown) or '(none given)'}.")
+        endpoints = [(name, roles[name]) for name in names]
+        base = urlsplit(options['base_url'])
+        deadline = time.monotonic() + options['duration']
+        latencies = {name: [] for name, _ in endpoints}
+        errors = {name: 0 for name, _ in endpoints}
+        lock = threading.Lock()
+
+        def client(offset):
+            connection = http.client.HTTPConnection(base.hostname, base.port or 80, timeout=60)
+            i = offset
+            while time.monotonic() < deadline:
+                name, role = endpoints[i % len(endpoints)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    connection.request('GET', base.path.rstrip('/') + reverse(name), headers=headers[role])
+                    response = connection.getresponse()
+                    response.read()
+                    ok = response.status == 200
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    ok = False
+                elapsed = time.perf_counter() - start
+                with lock:
+                    if ok:
+                        latencies[name].append(elapsed)
+                    else:
+                        errors[name] += 1
+            connection.close()
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            list(executor.map(client, range(options['concurrency'])))
+        elapsed = time.monotonic() - started
+
+        total = 0
+        for name, _ in endpoints:
+            samples = sorted(latencies[name])
+            total += len(samples)
+            if not samples:
+                self.stdout.write(f"{name:22} no successful requests, {errors[name]} error(s)")
+                continue
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            self.stdout.write(
+                f"{name:22} {len(samples) / elapsed:8.1f} req/s  "
+                f"p50 {statistics.median(samples) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms  "
+                f"{errors[name]} error(s)"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} requests in {elapsed:.1f}s with {options['concurrency']} clients: {total / elapsed:.1f} req/s"
+        ))
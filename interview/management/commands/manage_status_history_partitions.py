@@ -0,0 +1,39 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from interview.db_procedures import create_status_history_partitions, detach_status_history_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the upcoming monthly partitions of the application status history, "
+        "and optionally detach the partitions of old months."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead', type=int, default=2,
+            help="Create partitions up to this many months after the current one (default 2).",
+        )
+        parser.add_argument(
+            '--keep-months', type=int,
+            help="Detach the partitions of months more than this many months before the current one.",
+        )
+
+    def handle(self, *args, **options):
+        if options['months_ahead'] < 0 or (options['keep_months'] or 0) < 0:
+            raise CommandError("--months-ahead and --keep-months can't be negative.")
+
+        created = create_status_history_partitions(options['months_ahead'])
+        self.stdout.write(f"Partitions through {created[-1]} exist.")
+
+        if options['keep_months'] is not None:
+            # Partitions hold UTC months
+            today = timezone.now().date()
+            months = today.year * 12 + today.month - 1 - options['keep_months']
+            detached = detach_status_history_partitions(date(months // 12, months % 12 + 1, 1))
+            for name in detached:
+                self.stdout.write(f"Detached {name}.")
+            self.stdout.write(self.style.SUCCESS(f"{len(detached)} partition(s) detached."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from interview.db_procedures import rebuild_job_statistics
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-job application statistics table from scratch."
+
+    def handle(self, *args, **options):
+        rebuild_job_statistics()
+        self.stdout.write(self.style.SUCCESS("Job statistics rebuilt."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from interview.models import JobApplication
+
+
+class Command(BaseCommand):
+    help = "Repair the rounds_count and feedback_count counters on job applications."
+
+    def handle(self, *args, **options):
+        repaired = JobApplication.objects.reconcile_counters()
+        self.stdout.write(self.style.SUCCESS(f"Repaired counters on {repaired} application(s)."))
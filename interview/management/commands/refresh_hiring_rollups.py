@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from interview.db_procedures import refresh_hiring_rollups
+
+
+class Command(BaseCommand):
+    help = "Bring the daily hiring rollups up to date, or rebuild them with --full."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help="Rebuild every day's rollups instead of the days changed since the last refresh.",
+        )
+
+    def handle(self, *args, **options):
+        days = refresh_hiring_rollups(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f"Hiring rollups refreshed for {days} day(s)."))
@@ -0,0 +1,174 @@
+from django.db import connection, models, transaction
+from django.db.models import Exists, F, OuterRef, Q, Value
+from django.db.models.functions import Coalesce
+
+
+class RoleVisibilityMixin:
+    """
+    Scope a queryset to the rows a user may see, by role: admins see
+    everything, interviewers and candidates see what interviewer_filter()
+    and candidate_filter() allow, anyone else sees nothing.
+
+    Relations reached through a foreign key are filtered directly (a join
+    on a primary key). Relations in the other direction, such as an
+    application's rounds, are tested with a correlated EXISTS instead of an
+    IN over every matching id.
+    """
+
+    def interviewer_filter(self, user):
+        raise NotImplementedError
+
+    def candidate_filter(self, user):
+        raise NotImplementedError
+
+    def visible_to(self, user):
+        if user.role == 'admin':
+            return self
+        if user.role == 'interviewer':
+            return self.filter(self.interviewer_filter(user))
+        if user.role == 'candidate':
+            return self.filter(self.candidate_filter(user))
+        return self.none()
+
+
+def application_count(prefix=''):
+    """
+    Expression for the number of applications of the job at `prefix`
+    (e.g. 'job__' from an application), read from the trigger-maintained
+    JobStatistics row (a primary key join) rather than by aggregating the
+    applications.
+    """
+    return Coalesce(F(f'{prefix}statistics__total_applications'), Value(0))
+
+
+class JobQuerySet(models.QuerySet):
+
+    def with_application_count(self):
+        """
+        Annotate every job with its number of applications so that
+        JobSerializer can read it without a COUNT query per row. The search
+        vector, which only the database reads, is not fetched.
+        """
+        return self.annotate(application_count=application_count()).defer('search_vector')
+
+
+class JobApplicationQuerySet(RoleVisibilityMixin, models.QuerySet):
+
+    def interviewer_filter(self, user):
+        # Applications with at least one round assigned to the interviewer
+        from interview.models import ApplicationRound
+
+        return Exists(ApplicationRound.objects.filter(interviewer=user, application=OuterRef('pk')))
+
+    def candidate_filter(self, user):
+        return Q(candidate=user)
+
+    def close_if_all_feedback_given(self, application_id):
+        """
+        Close the application once every one of its rounds has feedback.
+
+        A single conditional UPDATE on the rounds_count and feedback_count
+        counters. Returns True if the application was closed.
+        """
+        from django.utils import timezone
+
+        return bool(
+            self.filter(pk=application_id, feedback_count__gte=F('rounds_count'))
+            .exclude(status='closed')
+            .update(status='closed', updated_at=timezone.now())
+        )
+
+    def reconcile_counters(self):
+        """
+        Recompute rounds_count and feedback_count from the round and
+        feedback tables for the applications in this queryset whose
+        counters have drifted (e.g. after bulk_create or raw SQL, which
+        skip the signals).
+
+        Both counts are aggregated once per table and joined back to find
+        the drifted applications, so the cost is linear in the table sizes
+        rather than one pair of subqueries per application. Those are then
+        locked in id order and recounted by a later statement, whose
+        snapshot includes every increment that committed before the lock
+        was granted; increments still to come wait for the lock and apply
+        on top of the recount. (Writing the counts of the first statement
+        could overwrite a concurrent increment with a stale count.)
+
+        Returns the number of applications repaired.
+        """
+        applications, params = self.values('pk').query.sql_with_params()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT ja.id
+                FROM
+                    interview_jobapplication ja
+                    LEFT JOIN (
+                        SELECT application_id, COUNT(*) AS rounds_count
+                        FROM interview_applicationround
+                        GROUP BY application_id
+                    ) r ON r.application_id = ja.id
+                    LEFT JOIN (
+                        SELECT ar.application_id, COUNT(*) AS feedback_count
+                        FROM
+                            interview_feedback fb
+                            JOIN interview_applicationround ar ON ar.id = fb.application_round_id
+                        GROUP BY ar.application_id
+                    ) f ON f.application_id = ja.id
+                WHERE
+                    ja.id IN ({applications})
+                    AND (ja.rounds_count, ja.feedback_count)
+                        IS DISTINCT FROM (COALESCE(r.rounds_count, 0), COALESCE(f.feedback_count, 0))
+                ORDER BY ja.id
+                FOR NO KEY UPDATE OF ja
+            """, params)
+            drifted = [row[0] for row in cursor.fetchall()]
+            if not drifted:
+                return 0
+
+            cursor.execute("""
+                UPDATE interview_jobapplication ja
+                SET
+                    rounds_count = c.rounds_count,
+                    feedback_count = c.feedback_count
+                FROM (
+                    SELECT
+                        a.id,
+                        (
+                            SELECT COUNT(*)
+                            FROM interview_applicationround ar
+                            WHERE ar.application_id = a.id
+                        ) AS rounds_count,
+                        (
+                            SELECT COUNT(*)
+                            FROM
+                                interview_feedback fb
+                                JOIN interview_applicationround ar ON ar.id = fb.application_round_id
+                            WHERE ar.application_id = a.id
+                        ) AS feedback_count
+                    FROM unnest(%s::BIGINT[]) AS a(id)
+                ) c
+                WHERE
+                    c.id = ja.id
+                    AND (ja.rounds_count, ja.feedback_count) IS DISTINCT FROM (c.rounds_count, c.feedback_count)
+            """, [drifted])
+            return cursor.rowcount
+
+
+class ApplicationRoundQuerySet(RoleVisibilityMixin, models.QuerySet):
+
+    def interviewer_filter(self, user):
+        return Q(interviewer=user)
+
+    def candidate_filter(self, user):
+        return Q(application__candidate=user)
+
+
+class FeedbackQuerySet(RoleVisibilityMixin, models.QuerySet):
+
+    def interviewer_filter(self, user):
+        # Feedback for rounds the interviewer conducted
+        return Q(interviewer=user)
+
+    def candidate_filter(self, user):
+        return Q(application_round__application__candidate=user)
+
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-17 11:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', 'stored_procedures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobStatistics',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to='interview.job')),
+                ('total_applications', models.IntegerField(default=0)),
+                ('new_applications', models.IntegerField(default=0)),
+                ('in_progress_applications', models.IntegerField(default=0)),
+                ('closed_applications', models.IntegerField(default=0)),
+                ('selected_applications', models.IntegerField(default=0)),
+                ('feedback_count', models.IntegerField(default=0)),
+                ('rating_sum', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
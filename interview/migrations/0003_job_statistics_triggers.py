@@ -0,0 +1,292 @@
+from django.db import migrations
+
+# SQL for keeping interview_jobstatistics current
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0002_jobstatistics'),
+    ]
+
+    # Applies a delta to one job's statistics row. Inserts create the row if
+    # it is missing; deletes only ever update, so a job being deleted (whose
+    # statistics row may already be gone) is never resurrected.
+    apply_job_statistics_function = """
+    CREATE OR REPLACE FUNCTION apply_job_statistics(
+        p_job_id BIGINT,
+        d_total INTEGER,
+        d_new INTEGER,
+        d_in_progress INTEGER,
+        d_closed INTEGER,
+        d_selected INTEGER,
+        d_feedback INTEGER,
+        d_rating BIGINT,
+        p_upsert BOOLEAN
+    )
+    RETURNS VOID
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        IF p_job_id IS NULL THEN
+            RETURN;
+        END IF;
+
+        IF p_upsert THEN
+            INSERT INTO interview_jobstatistics AS s (
+                job_id, total_applications, new_applications, in_progress_applications,
+                closed_applications, selected_applications, feedback_count, rating_sum,
+                created_at, updated_at
+            ) VALUES (
+                p_job_id, d_total, d_new, d_in_progress,
+                d_closed, d_selected, d_feedback, d_rating,
+                NOW(), NOW()
+            )
+            ON CONFLICT (job_id) DO UPDATE SET
+                total_applications = s.total_applications + EXCLUDED.total_applications,
+                new_applications = s.new_applications + EXCLUDED.new_applications,
+                in_progress_applications = s.in_progress_applications + EXCLUDED.in_progress_applications,
+                closed_applications = s.closed_applications + EXCLUDED.closed_applications,
+                selected_applications = s.selected_applications + EXCLUDED.selected_applications,
+                feedback_count = s.feedback_count + EXCLUDED.feedback_count,
+                rating_sum = s.rating_sum + EXCLUDED.rating_sum,
+                updated_at = NOW();
+        ELSE
+            UPDATE interview_jobstatistics
+            SET
+                total_applications = total_applications + d_total,
+                new_applications = new_applications + d_new,
+                in_progress_applications = in_progress_applications + d_in_progress,
+                closed_applications = closed_applications + d_closed,
+                selected_applications = selected_applications + d_selected,
+                feedback_count = feedback_count + d_feedback,
+                rating_sum = rating_sum + d_rating,
+                updated_at = NOW()
+            WHERE
+                job_id = p_job_id;
+        END IF;
+    END;
+    $$;
+    """
+
+    # Trigger function for interview_jobapplication: an update is applied
+    # as removing the old row and adding the new one.
+    application_statistics_trigger = """
+    CREATE OR REPLACE FUNCTION jobapplication_statistics_trigger()
+    RETURNS TRIGGER
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM apply_job_statistics(
+                OLD.job_id,
+                -1,
+                -(OLD.status = 'new')::INTEGER,
+                -(OLD.status = 'inprogress')::INTEGER,
+                -(OLD.status = 'closed')::INTEGER,
+                -(OLD.is_selected)::INTEGER,
+                0,
+                0,
+                FALSE
+            );
+        END IF;
+
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM apply_job_statistics(
+                NEW.job_id,
+                1,
+                (NEW.status = 'new')::INTEGER,
+                (NEW.status = 'inprogress')::INTEGER,
+                (NEW.status = 'closed')::INTEGER,
+                (NEW.is_selected)::INTEGER,
+                0,
+                0,
+                TRUE
+            );
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$;
+
+    CREATE TRIGGER jobapplication_statistics_insert_delete
+    AFTER INSERT OR DELETE ON interview_jobapplication
+    FOR EACH ROW EXECUTE FUNCTION jobapplication_statistics_trigger();
+
+    CREATE TRIGGER jobapplication_statistics_update
+    AFTER UPDATE OF job_id, status, is_selected ON interview_jobapplication
+    FOR EACH ROW
+    WHEN (
+        OLD.job_id IS DISTINCT FROM NEW.job_id
+        OR OLD.status IS DISTINCT FROM NEW.status
+        OR OLD.is_selected IS DISTINCT FROM NEW.is_selected
+    )
+    EXECUTE FUNCTION jobapplication_statistics_trigger();
+    """
+
+    # Trigger function for interview_feedback, which reaches its job
+    # through the application round.
+    feedback_statistics_trigger = """
+    CREATE OR REPLACE FUNCTION feedback_statistics_trigger()
+    RETURNS TRIGGER
+    LANGUAGE plpgsql
+    AS $$
+    DECLARE
+        v_job_id BIGINT;
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            SELECT ja.job_id INTO v_job_id
+            FROM
+                interview_applicationround ar
+                JOIN interview_jobapplication ja ON ja.id = ar.application_id
+            WHERE
+                ar.id = OLD.application_round_id;
+
+            PERFORM apply_job_statistics(v_job_id, 0, 0, 0, 0, 0, -1, -OLD.rating, FALSE);
+        END IF;
+
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            SELECT ja.job_id INTO v_job_id
+            FROM
+                interview_applicationround ar
+                JOIN interview_jobapplication ja ON ja.id = ar.application_id
+            WHERE
+                ar.id = NEW.application_round_id;
+
+            PERFORM apply_job_statistics(v_job_id, 0, 0, 0, 0, 0, 1, NEW.rating, TRUE);
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$;
+
+    CREATE TRIGGER feedback_statistics_insert_delete
+    AFTER INSERT OR DELETE ON interview_feedback
+    FOR EACH ROW EXECUTE FUNCTION feedback_statistics_trigger();
+
+    CREATE TRIGGER feedback_statistics_update
+    AFTER UPDATE OF application_round_id, rating ON interview_feedback
+    FOR EACH ROW
+    WHEN (
+        OLD.application_round_id IS DISTINCT FROM NEW.application_round_id
+        OR OLD.rating IS DISTINCT FROM NEW.rating
+    )
+    EXECUTE FUNCTION feedback_statistics_trigger();
+    """
+
+    # Recomputes every statistics row from the source tables. Applications
+    # and feedback are aggregated separately so neither count is multiplied
+    # by the other. The table lock makes concurrent trigger updates wait
+    # for the rebuild instead of being lost.
+    rebuild_job_statistics_procedure = """
+    CREATE OR REPLACE PROCEDURE rebuild_job_statistics()
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        LOCK TABLE interview_jobstatistics IN SHARE ROW EXCLUSIVE MODE;
+
+        DELETE FROM interview_jobstatistics;
+
+        INSERT INTO interview_jobstatistics (
+            job_id, total_applications, new_applications, in_progress_applications,
+            closed_applications, selected_applications, feedback_count, rating_sum,
+            created_at, updated_at
+        )
+        SELECT
+            j.id,
+            COALESCE(a.total_applications, 0),
+            COALESCE(a.new_applications, 0),
+            COALESCE(a.in_progress_applications, 0),
+            COALESCE(a.closed_applications, 0),
+            COALESCE(a.selected_applications, 0),
+            COALESCE(f.feedback_count, 0),
+            COALESCE(f.rating_sum, 0),
+            NOW(),
+            NOW()
+        FROM
+            interview_job j
+            LEFT JOIN (
+                SELECT
+                    ja.job_id,
+                    COUNT(*) AS total_applications,
+                    COUNT(*) FILTER (WHERE ja.status = 'new') AS new_applications,
+                    COUNT(*) FILTER (WHERE ja.status = 'inprogress') AS in_progress_applications,
+                    COUNT(*) FILTER (WHERE ja.status = 'closed') AS closed_applications,
+                    COUNT(*) FILTER (WHERE ja.is_selected) AS selected_applications
+                FROM interview_jobapplication ja
+                GROUP BY ja.job_id
+            ) a ON a.job_id = j.id
+            LEFT JOIN (
+                SELECT
+                    ja.job_id,
+                    COUNT(*) AS feedback_count,
+                    SUM(fb.rating) AS rating_sum
+                FROM
+                    interview_feedback fb
+                    JOIN interview_applicationround ar ON ar.id = fb.application_round_id
+                    JOIN interview_jobapplication ja ON ja.id = ar.application_id
+                GROUP BY ja.job_id
+            ) f ON f.job_id = j.id;
+    END;
+    $$;
+
+    CALL rebuild_job_statistics();
+    """
+
+    # get_application_statistics now reads the maintained table: one
+    # primary key lookup per job instead of aggregating the whole join.
+    application_statistics_function = """
+    CREATE OR REPLACE FUNCTION get_application_statistics(
+        job_id INTEGER DEFAULT NULL
+    )
+    RETURNS TABLE (
+        job_title VARCHAR(100),
+        total_applications BIGINT,
+        new_applications BIGINT,
+        in_progress_applications BIGINT,
+        closed_applications BIGINT,
+        selected_applications BIGINT,
+        average_rating NUMERIC(3,1)
+    )
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        RETURN QUERY
+        SELECT
+            j.title,
+            COALESCE(s.total_applications, 0)::BIGINT,
+            COALESCE(s.new_applications, 0)::BIGINT,
+            COALESCE(s.in_progress_applications, 0)::BIGINT,
+            COALESCE(s.closed_applications, 0)::BIGINT,
+            COALESCE(s.selected_applications, 0)::BIGINT,
+            COALESCE(ROUND(s.rating_sum::NUMERIC / NULLIF(s.feedback_count, 0), 1), 0.0)::NUMERIC(3,1)
+        FROM
+            interview_job j
+            LEFT JOIN interview_jobstatistics s ON s.job_id = j.id
+        WHERE
+            (get_application_statistics.job_id IS NULL OR j.id = get_application_statistics.job_id)
+        ORDER BY
+            j.title;
+    END;
+    $$;
+    """
+
+    operations = [
+        migrations.RunSQL(apply_job_statistics_function, "DROP FUNCTION apply_job_statistics;"),
+        migrations.RunSQL(
+            application_statistics_trigger,
+            """
+            DROP TRIGGER jobapplication_statistics_insert_delete ON interview_jobapplication;
+            DROP TRIGGER jobapplication_statistics_update ON interview_jobapplication;
+            DROP FUNCTION jobapplication_statistics_trigger;
+            """,
+        ),
+        migrations.RunSQL(
+            feedback_statistics_trigger,
+            """
+            DROP TRIGGER feedback_statistics_insert_delete ON interview_feedback;
+            DROP TRIGGER feedback_statistics_update ON interview_feedback;
+            DROP FUNCTION feedback_statistics_trigger;
+            """,
+        ),
+        migrations.RunSQL(rebuild_job_statistics_procedure, "DROP PROCEDURE rebuild_job_statistics;"),
+        migrations.RunSQL(application_statistics_function),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-17 11:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0003_job_statistics_triggers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterviewReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('scheduled_time', models.DateTimeField()),
+                ('application_round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='interview.applicationround')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='interviewreminder',
+            constraint=models.UniqueConstraint(fields=('application_round', 'scheduled_time'), name='unique_interview_reminder'),
+        ),
+    ]
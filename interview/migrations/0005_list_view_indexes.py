@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-17 11:41
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Build the indexes without locking the tables against writes
+    atomic = False
+
+    dependencies = [
+        ('interview', '0004_interviewreminder'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='applicationround',
+            index=models.Index(fields=['interviewer', 'scheduled_time'], name='round_interviewer_time_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='applicationround',
+            index=models.Index(fields=['scheduled_time', 'id'], name='round_scheduled_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='feedback',
+            index=models.Index(fields=['application_round', 'created_at'], name='feedback_round_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='feedback',
+            index=models.Index(fields=['created_at', 'id'], name='feedback_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='jobapplication',
+            index=models.Index(fields=['job', 'status'], name='application_job_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='jobapplication',
+            index=models.Index(fields=['candidate', 'applied_on'], name='application_cand_applied_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='jobapplication',
+            index=models.Index(fields=['applied_on', 'id'], name='application_applied_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='jobapplication',
+            index=models.Index(fields=['status', 'id'], name='application_status_idx'),
+        ),
+    ]
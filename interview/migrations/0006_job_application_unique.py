@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-17 11:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0005_list_view_indexes'),
+    ]
+
+    # Concurrent submissions could both pass the old exists() check, so
+    # merge any duplicate (job, candidate) applications into the oldest one
+    # before adding the constraint: its rounds (and so their feedback and
+    # reminders) move over, and the duplicates are deleted
+    duplicate_applications = """
+        SELECT id, keep_id
+        FROM (
+            SELECT id, first_value(id) OVER (PARTITION BY job_id, candidate_id ORDER BY applied_on, id) AS keep_id
+            FROM interview_jobapplication
+        ) ranked
+        WHERE id <> keep_id
+    """
+
+    merge_duplicate_applications = [
+        f"""
+        UPDATE interview_applicationround ar
+        SET application_id = d.keep_id
+        FROM ({duplicate_applications}) d
+        WHERE ar.application_id = d.id
+        """,
+        f"""
+        DELETE FROM interview_jobapplication ja
+        USING ({duplicate_applications}) d
+        WHERE ja.id = d.id
+        """,
+    ]
+
+    operations = [
+        migrations.RunSQL(merge_duplicate_applications, reverse_sql=migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='jobapplication',
+            constraint=models.UniqueConstraint(fields=('job', 'candidate'), name='unique_job_application'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-17 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0006_job_application_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobapplication',
+            name='feedback_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='jobapplication',
+            name='rounds_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        # Backfill the counters for existing applications
+        migrations.RunSQL(
+            """
+            UPDATE interview_jobapplication ja
+            SET
+                rounds_count = (
+                    SELECT COUNT(*) FROM interview_applicationround ar
+                    WHERE ar.application_id = ja.id
+                ),
+                feedback_count = (
+                    SELECT COUNT(*)
+                    FROM
+                        interview_feedback fb
+                        JOIN interview_applicationround ar ON ar.id = fb.application_round_id
+                    WHERE ar.application_id = ja.id
+                );
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-17 11:49
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Build the index without locking the table against writes
+    atomic = False
+
+    dependencies = [
+        ('interview', '0007_application_counters'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='applicationround',
+            index=models.Index(fields=['interviewer', 'application'], name='round_interviewer_app_idx'),
+        ),
+    ]
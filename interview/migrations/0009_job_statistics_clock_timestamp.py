@@ -0,0 +1,76 @@
+from importlib import import_module
+
+from django.db import migrations
+
+previous = import_module('interview.migrations.0003_job_statistics_triggers').Migration
+
+
+# Stamp statistics rows with the time of the change instead of the start
+# of the transaction, so Max(updated_at) moves on every change (it backs
+# the ETag and Last-Modified of the job and statistics endpoints)
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0008_round_interviewer_application_index'),
+    ]
+
+    apply_job_statistics_function = """
+    CREATE OR REPLACE FUNCTION apply_job_statistics(
+        p_job_id BIGINT,
+        d_total INTEGER,
+        d_new INTEGER,
+        d_in_progress INTEGER,
+        d_closed INTEGER,
+        d_selected INTEGER,
+        d_feedback INTEGER,
+        d_rating BIGINT,
+        p_upsert BOOLEAN
+    )
+    RETURNS VOID
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        IF p_job_id IS NULL THEN
+            RETURN;
+        END IF;
+
+        IF p_upsert THEN
+            INSERT INTO interview_jobstatistics AS s (
+                job_id, total_applications, new_applications, in_progress_applications,
+                closed_applications, selected_applications, feedback_count, rating_sum,
+                created_at, updated_at
+            ) VALUES (
+                p_job_id, d_total, d_new, d_in_progress,
+                d_closed, d_selected, d_feedback, d_rating,
+                clock_timestamp(), clock_timestamp()
+            )
+            ON CONFLICT (job_id) DO UPDATE SET
+                total_applications = s.total_applications + EXCLUDED.total_applications,
+                new_applications = s.new_applications + EXCLUDED.new_applications,
+                in_progress_applications = s.in_progress_applications + EXCLUDED.in_progress_applications,
+                closed_applications = s.closed_applications + EXCLUDED.closed_applications,
+                selected_applications = s.selected_applications + EXCLUDED.selected_applications,
+                feedback_count = s.feedback_count + EXCLUDED.feedback_count,
+                rating_sum = s.rating_sum + EXCLUDED.rating_sum,
+                updated_at = clock_timestamp();
+        ELSE
+            UPDATE interview_jobstatistics
+            SET
+                total_applications = total_applications + d_total,
+                new_applications = new_applications + d_new,
+                in_progress_applications = in_progress_applications + d_in_progress,
+                closed_applications = closed_applications + d_closed,
+                selected_applications = selected_applications + d_selected,
+                feedback_count = feedback_count + d_feedback,
+                rating_sum = rating_sum + d_rating,
+                updated_at = clock_timestamp()
+            WHERE
+                job_id = p_job_id;
+        END IF;
+    END;
+    $$;
+    """
+
+    operations = [
+        migrations.RunSQL(apply_job_statistics_function, previous.apply_job_statistics_function),
+    ]
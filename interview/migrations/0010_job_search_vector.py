@@ -0,0 +1,49 @@
+from django.contrib.postgres.search import SearchVectorField
+from django.db import migrations
+
+
+# Keep Job.search_vector current in the database, so rows written by bulk
+# updates, the admin or raw SQL are searchable as well. Titles weigh most,
+# then departments, then descriptions.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0009_job_statistics_clock_timestamp'),
+    ]
+
+    search_vector_trigger = """
+    CREATE OR REPLACE FUNCTION job_search_vector_update()
+    RETURNS TRIGGER
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.department, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END;
+    $$;
+
+    CREATE TRIGGER job_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, department, description ON interview_job
+    FOR EACH ROW EXECUTE FUNCTION job_search_vector_update();
+    """
+
+    drop_search_vector_trigger = """
+    DROP TRIGGER IF EXISTS job_search_vector_trigger ON interview_job;
+    DROP FUNCTION IF EXISTS job_search_vector_update();
+    """
+
+    # Touching the title fires the trigger for the existing rows
+    backfill_search_vector = "UPDATE interview_job SET title = title;"
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='search_vector',
+            field=SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(search_vector_trigger, drop_search_vector_trigger),
+        migrations.RunSQL(backfill_search_vector, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,20 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # Build the index without locking the table against writes
+    atomic = False
+
+    dependencies = [
+        ('interview', '0010_job_search_vector'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='job',
+            index=GinIndex(fields=['search_vector'], name='job_search_vector_idx'),
+        ),
+    ]
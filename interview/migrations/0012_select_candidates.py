@@ -0,0 +1,122 @@
+from importlib import import_module
+
+from django.db import migrations
+
+previous = import_module('interview.migrations.stored_procedures').Migration
+
+
+# select_candidate declared a job_id variable, so "WHERE job_id = job_id"
+# compared the variable with itself and closed (and locked) every open
+# application of every job. Selection is now one job-scoped UPDATE, done by
+# select_candidates() for any number of applications at once.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0011_job_search_vector_index'),
+    ]
+
+    # Selects each application and closes the other open applications of
+    # its job, returning one row per selected application with how many
+    # others were closed. Selections for the same job are serialized on the
+    # job row; rows are locked in job id order, so concurrent batches can't
+    # deadlock. FOR NO KEY UPDATE leaves new applications to the job
+    # (which only take a key share lock) unblocked.
+    select_candidates_function = """
+    CREATE OR REPLACE FUNCTION select_candidates(
+        p_application_ids BIGINT[],
+        p_selected_by VARCHAR(150)
+    )
+    RETURNS TABLE (
+        application_id BIGINT,
+        job_id BIGINT,
+        closed_applications INTEGER
+    )
+    LANGUAGE plpgsql
+    AS $$
+    DECLARE
+        v_missing BIGINT;
+        v_job_id BIGINT;
+    BEGIN
+        SELECT requested.id
+        INTO v_missing
+        FROM unnest(p_application_ids) AS requested(id)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM interview_jobapplication ja WHERE ja.id = requested.id
+        )
+        LIMIT 1;
+        IF FOUND THEN
+            RAISE EXCEPTION 'Job application % does not exist', v_missing
+                USING ERRCODE = 'no_data_found';
+        END IF;
+
+        SELECT ja.job_id
+        INTO v_job_id
+        FROM interview_jobapplication ja
+        WHERE ja.id = ANY(p_application_ids)
+        GROUP BY ja.job_id
+        HAVING COUNT(*) > 1
+        LIMIT 1;
+        IF FOUND THEN
+            RAISE EXCEPTION 'Only one application can be selected for job %', v_job_id
+                USING ERRCODE = 'check_violation';
+        END IF;
+
+        PERFORM 1
+        FROM interview_job j
+        WHERE j.id IN (
+            SELECT ja.job_id FROM interview_jobapplication ja WHERE ja.id = ANY(p_application_ids)
+        )
+        ORDER BY j.id
+        FOR NO KEY UPDATE;
+
+        RETURN QUERY
+        WITH selected AS (
+            SELECT ja.id, ja.job_id
+            FROM interview_jobapplication ja
+            WHERE ja.id = ANY(p_application_ids)
+        ),
+        updated AS (
+            UPDATE interview_jobapplication ja
+            SET
+                is_selected = ja.is_selected OR ja.id = selected.id,
+                status = 'closed',
+                updated_at = NOW()
+            FROM selected
+            WHERE
+                ja.job_id = selected.job_id
+                AND (ja.id = selected.id OR ja.status != 'closed')
+            RETURNING selected.id AS selected_id, selected.job_id AS selected_job_id, ja.id AS updated_id
+        )
+        SELECT
+            updated.selected_id,
+            updated.selected_job_id,
+            (COUNT(*) FILTER (WHERE updated.updated_id != updated.selected_id))::INTEGER
+        FROM updated
+        GROUP BY updated.selected_id, updated.selected_job_id
+        ORDER BY updated.selected_id;
+    END;
+    $$;
+    """
+
+    # Parameter names can't change with CREATE OR REPLACE, so they are
+    # qualified with the procedure's name
+    select_candidate_procedure = """
+    CREATE OR REPLACE PROCEDURE select_candidate(
+        application_id INTEGER,
+        selected_by VARCHAR(150)
+    )
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        PERFORM 1 FROM select_candidates(
+            ARRAY[select_candidate.application_id]::BIGINT[],
+            select_candidate.selected_by
+        );
+    END;
+    $$;
+    """
+
+    operations = [
+        migrations.RunSQL(select_candidates_function, "DROP FUNCTION IF EXISTS select_candidates(BIGINT[], VARCHAR);"),
+        migrations.RunSQL(select_candidate_procedure, previous.select_candidate_procedure),
+    ]
@@ -0,0 +1,265 @@
+from importlib import import_module
+
+from django.db import migrations, models
+
+procedures = import_module('interview.migrations.stored_procedures').Migration
+selection = import_module('interview.migrations.0012_select_candidates').Migration
+
+
+# Status history for applications, partitioned by month so that inserts
+# and recent reads only touch a small, hot partition, and old months can
+# be detached (see manage_status_history_partitions).
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0012_select_candidates'),
+    ]
+
+    # Rows outside every monthly partition land in the default one, so a
+    # missing partition never fails a status change. The primary key has
+    # to include the partition key.
+    create_history_table = """
+    CREATE TABLE interview_applicationstatushistory (
+        id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+        application_id BIGINT NOT NULL,
+        old_status VARCHAR(20),
+        new_status VARCHAR(20) NOT NULL,
+        is_selected BOOLEAN NOT NULL DEFAULT FALSE,
+        changed_by VARCHAR(150) NOT NULL DEFAULT '',
+        changed_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+        PRIMARY KEY (id, changed_at)
+    ) PARTITION BY RANGE (changed_at);
+
+    CREATE INDEX application_status_history_idx
+    ON interview_applicationstatushistory (application_id, changed_at, id);
+
+    CREATE TABLE interview_applicationstatushistory_default
+    PARTITION OF interview_applicationstatushistory DEFAULT;
+    """
+
+    drop_history_table = "DROP TABLE IF EXISTS interview_applicationstatushistory;"
+
+    # Creates the partition for the month of p_month (UTC), named
+    # interview_applicationstatushistory_pYYYYMM, unless it exists. Rows of
+    # that month already in the default partition are moved into it first.
+    create_partition_function = """
+    CREATE OR REPLACE FUNCTION create_application_status_history_partition(p_month DATE)
+    RETURNS TEXT
+    LANGUAGE plpgsql
+    AS $$
+    DECLARE
+        v_from TIMESTAMPTZ := date_trunc('month', p_month)::TIMESTAMP AT TIME ZONE 'UTC';
+        v_to TIMESTAMPTZ := (date_trunc('month', p_month) + INTERVAL '1 month')::TIMESTAMP AT TIME ZONE 'UTC';
+        v_name TEXT := 'interview_applicationstatushistory_p' || to_char(p_month, 'YYYYMM');
+    BEGIN
+        IF to_regclass(v_name) IS NOT NULL THEN
+            RETURN v_name;
+        END IF;
+
+        EXECUTE format(
+            'CREATE TABLE %I (LIKE interview_applicationstatushistory INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+            v_name
+        );
+        EXECUTE format(
+            'WITH moved AS (
+                DELETE FROM interview_applicationstatushistory_default
+                WHERE changed_at >= $1 AND changed_at < $2
+                RETURNING *
+            )
+            INSERT INTO %I SELECT * FROM moved',
+            v_name
+        ) USING v_from, v_to;
+        EXECUTE format(
+            'ALTER TABLE interview_applicationstatushistory ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_from, v_to
+        );
+        RETURN v_name;
+    END;
+    $$;
+    """
+
+    drop_partition_function = "DROP FUNCTION IF EXISTS create_application_status_history_partition(DATE);"
+
+    create_partitions = """
+    SELECT create_application_status_history_partition((CURRENT_DATE + make_interval(months => n))::DATE)
+    FROM generate_series(0, 2) AS n;
+    """
+
+    # As before, plus a history row for the change
+    track_application_status_procedure = """
+    CREATE OR REPLACE PROCEDURE track_application_status(
+        application_id INTEGER,
+        new_status VARCHAR(20),
+        updated_by VARCHAR(150)
+    )
+    LANGUAGE plpgsql
+    AS $$
+    DECLARE
+        old_status VARCHAR(20);
+        candidate_name VARCHAR(255);
+        job_title VARCHAR(100);
+    BEGIN
+        -- Get the current status and other info
+        SELECT 
+            ja.status,
+            CONCAT(u.first_name, ' ', u.last_name),
+            j.title
+        INTO 
+            old_status,
+            candidate_name,
+            job_title
+        FROM 
+            interview_jobapplication ja
+            JOIN account_user u ON ja.candidate_id = u.id
+            JOIN interview_job j ON ja.job_id = j.id
+        WHERE 
+            ja.id = application_id;
+            
+        -- Only update if status is different
+        IF old_status != new_status THEN
+            -- Update the application status
+            UPDATE interview_jobapplication
+            SET 
+                status = new_status,
+                updated_at = NOW()
+            WHERE 
+                id = application_id;
+
+            INSERT INTO interview_applicationstatushistory (
+                application_id,
+                old_status,
+                new_status,
+                changed_by
+            ) VALUES (
+                application_id,
+                old_status,
+                new_status,
+                updated_by
+            );
+            
+            RAISE NOTICE 'Status for % application to % changed from % to %', 
+                candidate_name, job_title, old_status, new_status;
+        ELSE
+            RAISE NOTICE 'Status already set to % for % application to %', 
+                new_status, candidate_name, job_title;
+        END IF;
+    END;
+    $$;
+    """
+
+    # As in 0012, plus a history row for every application selected or
+    # closed. The rows to change are locked before their old status is read.
+    select_candidates_function = """
+    CREATE OR REPLACE FUNCTION select_candidates(
+        p_application_ids BIGINT[],
+        p_selected_by VARCHAR(150)
+    )
+    RETURNS TABLE (
+        application_id BIGINT,
+        job_id BIGINT,
+        closed_applications INTEGER
+    )
+    LANGUAGE plpgsql
+    AS $$
+    DECLARE
+        v_missing BIGINT;
+        v_job_id BIGINT;
+    BEGIN
+        SELECT requested.id
+        INTO v_missing
+        FROM unnest(p_application_ids) AS requested(id)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM interview_jobapplication ja WHERE ja.id = requested.id
+        )
+        LIMIT 1;
+        IF FOUND THEN
+            RAISE EXCEPTION 'Job application % does not exist', v_missing
+                USING ERRCODE = 'no_data_found';
+        END IF;
+
+        SELECT ja.job_id
+        INTO v_job_id
+        FROM interview_jobapplication ja
+        WHERE ja.id = ANY(p_application_ids)
+        GROUP BY ja.job_id
+        HAVING COUNT(*) > 1
+        LIMIT 1;
+        IF FOUND THEN
+            RAISE EXCEPTION 'Only one application can be selected for job %', v_job_id
+                USING ERRCODE = 'check_violation';
+        END IF;
+
+        PERFORM 1
+        FROM interview_job j
+        WHERE j.id IN (
+            SELECT ja.job_id FROM interview_jobapplication ja WHERE ja.id = ANY(p_application_ids)
+        )
+        ORDER BY j.id
+        FOR NO KEY UPDATE;
+
+        RETURN QUERY
+        WITH selected AS (
+            SELECT ja.id, ja.job_id
+            FROM interview_jobapplication ja
+            WHERE ja.id = ANY(p_application_ids)
+        ),
+        targets AS (
+            SELECT ja.id, ja.status AS old_status, selected.id AS selected_id, selected.job_id AS selected_job_id
+            FROM interview_jobapplication ja JOIN selected ON ja.job_id = selected.job_id
+            WHERE ja.id = selected.id OR ja.status != 'closed'
+            FOR UPDATE OF ja
+        ),
+        updated AS (
+            UPDATE interview_jobapplication ja
+            SET
+                is_selected = ja.is_selected OR ja.id = targets.selected_id,
+                status = 'closed',
+                updated_at = NOW()
+            FROM targets
+            WHERE ja.id = targets.id
+            RETURNING targets.*
+        ),
+        history AS (
+            INSERT INTO interview_applicationstatushistory (
+                application_id,
+                old_status,
+                new_status,
+                is_selected,
+                changed_by
+            )
+            SELECT updated.id, updated.old_status, 'closed', updated.id = updated.selected_id, p_selected_by
+            FROM updated
+        )
+        SELECT
+            updated.selected_id,
+            updated.selected_job_id,
+            (COUNT(*) FILTER (WHERE updated.id != updated.selected_id))::INTEGER
+        FROM updated
+        GROUP BY updated.selected_id, updated.selected_job_id
+        ORDER BY updated.selected_id;
+    END;
+    $$;
+    """
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_status', models.CharField(max_length=20, null=True)),
+                ('new_status', models.CharField(max_length=20)),
+                ('is_selected', models.BooleanField(default=False)),
+                ('changed_by', models.CharField(max_length=150)),
+                ('changed_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'interview_applicationstatushistory',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(create_history_table, drop_history_table),
+        migrations.RunSQL(create_partition_function, drop_partition_function),
+        migrations.RunSQL(create_partitions, migrations.RunSQL.noop),
+        migrations.RunSQL(track_application_status_procedure, procedures.track_application_status_procedure),
+        migrations.RunSQL(select_candidates_function, selection.select_candidates_function),
+    ]
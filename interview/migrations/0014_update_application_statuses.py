@@ -0,0 +1,232 @@
+from importlib import import_module
+
+from django.db import migrations
+
+previous = import_module('interview.migrations.0013_application_status_history').Migration
+
+
+# Status changes for any number of applications in one statement, instead
+# of a procedure call (and a three-way join feeding a NOTICE) per row.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0013_application_status_history'),
+    ]
+
+    # Sets each application's status and returns, in request order, one row
+    # per application: its old status and whether it was 'updated',
+    # 'unchanged' or 'not_found'. Changes are recorded in the status history. Rows are locked in id order
+    # (see 0017 for the job locks that keep concurrent calls from deadlocking).
+    update_application_statuses_function = """
+    CREATE OR REPLACE FUNCTION update_application_statuses(
+        p_application_ids BIGINT[],
+        p_statuses VARCHAR[],
+        p_updated_by VARCHAR(150)
+    )
+    RETURNS TABLE (
+        application_id BIGINT,
+        old_status VARCHAR(20),
+        new_status VARCHAR(20),
+        outcome TEXT
+    )
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        RETURN QUERY
+        WITH requested AS (
+            -- The last status given for an application wins
+            SELECT DISTINCT ON (r.id) r.id, r.status, r.position
+            FROM unnest(p_application_ids, p_statuses) WITH ORDINALITY AS r(id, status, position)
+            ORDER BY r.id, r.position DESC
+        ),
+        locked AS (
+            SELECT ja.id, ja.status AS old_status, requested.status AS new_status
+            FROM interview_jobapplication ja JOIN requested ON ja.id = requested.id
+            ORDER BY ja.id
+            FOR UPDATE OF ja
+        ),
+        updated AS (
+            UPDATE interview_jobapplication ja
+            SET
+                status = locked.new_status,
+                updated_at = NOW()
+            FROM locked
+            WHERE ja.id = locked.id AND locked.old_status IS DISTINCT FROM locked.new_status
+            RETURNING ja.id, locked.old_status, locked.new_status
+        ),
+        history AS (
+            INSERT INTO interview_applicationstatushistory (
+                application_id,
+                old_status,
+                new_status,
+                changed_by
+            )
+            SELECT updated.id, updated.old_status, updated.new_status, p_updated_by
+            FROM updated
+        )
+        SELECT
+            requested.id,
+            locked.old_status::VARCHAR(20),
+            requested.status::VARCHAR(20),
+            CASE
+                WHEN updated.id IS NOT NULL THEN 'updated'
+                WHEN locked.id IS NOT NULL THEN 'unchanged'
+                ELSE 'not_found'
+            END
+        FROM
+            requested
+            LEFT JOIN locked ON locked.id = requested.id
+            LEFT JOIN updated ON updated.id = requested.id
+        ORDER BY requested.position;
+    END;
+    $$;
+    """
+
+    # The single-application version, without the join: lock the row, and
+    # change it and record the change if the status differs. Parameter
+    # names can't change with CREATE OR REPLACE, so they are qualified with
+    # the procedure's name.
+    track_application_status_procedure = """
+    CREATE OR REPLACE PROCEDURE track_application_status(
+        application_id INTEGER,
+        new_status VARCHAR(20),
+        updated_by VARCHAR(150)
+    )
+    LANGUAGE plpgsql
+    AS $$
+    DECLARE
+        v_old_status VARCHAR(20);
+    BEGIN
+        SELECT ja.status
+        INTO v_old_status
+        FROM interview_jobapplication ja
+        WHERE ja.id = track_application_status.application_id
+        FOR UPDATE;
+
+        IF NOT FOUND OR v_old_status = track_application_status.new_status THEN
+            RETURN;
+        END IF;
+
+        UPDATE interview_jobapplication ja
+        SET
+            status = track_application_status.new_status,
+            updated_at = NOW()
+        WHERE ja.id = track_application_status.application_id;
+
+        INSERT INTO interview_applicationstatushistory (
+            application_id,
+            old_status,
+            new_status,
+            changed_by
+        ) VALUES (
+            track_application_status.application_id,
+            v_old_status,
+            track_application_status.new_status,
+            track_application_status.updated_by
+        );
+    END;
+    $$;
+    """
+
+    # As in 0013, with the applications locked in id order
+    select_candidates_function = """
+    CREATE OR REPLACE FUNCTION select_candidates(
+        p_application_ids BIGINT[],
+        p_selected_by VARCHAR(150)
+    )
+    RETURNS TABLE (
+        application_id BIGINT,
+        job_id BIGINT,
+        closed_applications INTEGER
+    )
+    LANGUAGE plpgsql
+    AS $$
+    DECLARE
+        v_missing BIGINT;
+        v_job_id BIGINT;
+    BEGIN
+        SELECT requested.id
+        INTO v_missing
+        FROM unnest(p_application_ids) AS requested(id)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM interview_jobapplication ja WHERE ja.id = requested.id
+        )
+        LIMIT 1;
+        IF FOUND THEN
+            RAISE EXCEPTION 'Job application % does not exist', v_missing
+                USING ERRCODE = 'no_data_found';
+        END IF;
+
+        SELECT ja.job_id
+        INTO v_job_id
+        FROM interview_jobapplication ja
+        WHERE ja.id = ANY(p_application_ids)
+        GROUP BY ja.job_id
+        HAVING COUNT(*) > 1
+        LIMIT 1;
+        IF FOUND THEN
+            RAISE EXCEPTION 'Only one application can be selected for job %', v_job_id
+                USING ERRCODE = 'check_violation';
+        END IF;
+
+        PERFORM 1
+        FROM interview_job j
+        WHERE j.id IN (
+            SELECT ja.job_id FROM interview_jobapplication ja WHERE ja.id = ANY(p_application_ids)
+        )
+        ORDER BY j.id
+        FOR NO KEY UPDATE;
+
+        RETURN QUERY
+        WITH selected AS (
+            SELECT ja.id, ja.job_id
+            FROM interview_jobapplication ja
+            WHERE ja.id = ANY(p_application_ids)
+        ),
+        targets AS (
+            SELECT ja.id, ja.status AS old_status, selected.id AS selected_id, selected.job_id AS selected_job_id
+            FROM interview_jobapplication ja JOIN selected ON ja.job_id = selected.job_id
+            WHERE ja.id = selected.id OR ja.status != 'closed'
+            ORDER BY ja.id
+            FOR UPDATE OF ja
+        ),
+        updated AS (
+            UPDATE interview_jobapplication ja
+            SET
+                is_selected = ja.is_selected OR ja.id = targets.selected_id,
+                status = 'closed',
+                updated_at = NOW()
+            FROM targets
+            WHERE ja.id = targets.id
+            RETURNING targets.*
+        ),
+        history AS (
+            INSERT INTO interview_applicationstatushistory (
+                application_id,
+                old_status,
+                new_status,
+                is_selected,
+                changed_by
+            )
+            SELECT updated.id, updated.old_status, 'closed', updated.id = updated.selected_id, p_selected_by
+            FROM updated
+        )
+        SELECT
+            updated.selected_id,
+            updated.selected_job_id,
+            (COUNT(*) FILTER (WHERE updated.id != updated.selected_id))::INTEGER
+        FROM updated
+        GROUP BY updated.selected_id, updated.selected_job_id
+        ORDER BY updated.selected_id;
+    END;
+    $$;
+    """
+
+    operations = [
+        migrations.RunSQL(
+            update_application_statuses_function,
+            "DROP FUNCTION IF EXISTS update_application_statuses(BIGINT[], VARCHAR[], VARCHAR);",
+        ),
+        migrations.RunSQL(track_application_status_procedure, previous.track_application_status_procedure),
+        migrations.RunSQL(select_candidates_function, previous.select_candidates_function),
+    ]
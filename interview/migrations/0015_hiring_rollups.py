@@ -0,0 +1,201 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Daily hiring rollups, refreshed incrementally (see
+# interview.tasks.refresh_hiring_rollups)
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0014_update_application_statuses'),
+    ]
+
+    # For finding the days with new status changes. Partitioned tables
+    # can't be indexed concurrently; the history table is only written by
+    # the status procedures, which wait while it is built.
+    history_changed_at_index = """
+    CREATE INDEX IF NOT EXISTS application_status_history_changed_idx
+    ON interview_applicationstatushistory (changed_at);
+    """
+
+    # Recomputes the rollups of every day with changes since the watermark
+    # (less five minutes, for transactions that committed late), and moves
+    # the watermark on. Applications are counted on the day they were made
+    # (applied_on), status changes on the day they happened (changed_at),
+    # feedback on the day it was given, and re-read when edited
+    # (updated_at); each group of columns is only recomputed for the days
+    # its source table changed on.
+    # Deleted rows don't move the watermark: their days are corrected by
+    # the next change on them, or by a full refresh. Returns the number of
+    # days refreshed.
+    refresh_hiring_rollups_function = """
+    CREATE OR REPLACE FUNCTION refresh_hiring_rollups(p_full BOOLEAN DEFAULT FALSE)
+    RETURNS INTEGER
+    LANGUAGE plpgsql
+    AS $$
+    DECLARE
+        v_until TIMESTAMPTZ := clock_timestamp();
+        v_since TIMESTAMPTZ;
+        v_application_days DATE[];
+        v_status_days DATE[];
+        v_feedback_days DATE[];
+    BEGIN
+        -- The watermark row also keeps refreshes from running concurrently
+        INSERT INTO interview_rollupwatermark (name, refreshed_until)
+        VALUES ('hiring', '-infinity')
+        ON CONFLICT (name) DO NOTHING;
+
+        SELECT w.refreshed_until - INTERVAL '5 minutes'
+        INTO v_since
+        FROM interview_rollupwatermark w
+        WHERE w.name = 'hiring'
+        FOR UPDATE;
+
+        IF p_full THEN
+            v_since := '-infinity';
+            DELETE FROM interview_dailyhiringrollup;
+        END IF;
+
+        -- Status changes also move an application's updated_at, but only
+        -- new applications change the count of the day they were made on
+        SELECT COALESCE(array_agg(DISTINCT (ja.applied_on AT TIME ZONE 'UTC')::DATE), '{}')
+        INTO v_application_days
+        FROM interview_jobapplication ja
+        WHERE ja.applied_on > v_since;
+
+        SELECT COALESCE(array_agg(DISTINCT (h.changed_at AT TIME ZONE 'UTC')::DATE), '{}')
+        INTO v_status_days
+        FROM interview_applicationstatushistory h
+        WHERE h.changed_at > v_since;
+
+        SELECT COALESCE(array_agg(DISTINCT (f.created_at AT TIME ZONE 'UTC')::DATE), '{}')
+        INTO v_feedback_days
+        FROM interview_feedback f
+        WHERE f.updated_at > v_since;
+
+        -- Applications made on each day
+        UPDATE interview_dailyhiringrollup r
+        SET applications = 0
+        WHERE r.day = ANY(v_application_days);
+
+        INSERT INTO interview_dailyhiringrollup AS r (
+            day, job_id, department, applications, moved_to_inprogress, closed, selected, feedback_count, rating_sum
+        )
+        SELECT d.day, ja.job_id, j.department, COUNT(*), 0, 0, 0, 0, 0
+        FROM
+            unnest(v_application_days) AS d(day)
+            JOIN interview_jobapplication ja
+                ON ja.applied_on >= d.day::TIMESTAMP AT TIME ZONE 'UTC'
+                AND ja.applied_on < (d.day + 1)::TIMESTAMP AT TIME ZONE 'UTC'
+            JOIN interview_job j ON j.id = ja.job_id
+        GROUP BY d.day, ja.job_id, j.department
+        ON CONFLICT (job_id, day) DO UPDATE
+        SET applications = EXCLUDED.applications, department = EXCLUDED.department;
+
+        -- Status changes made on each day
+        UPDATE interview_dailyhiringrollup r
+        SET moved_to_inprogress = 0, closed = 0, selected = 0
+        WHERE r.day = ANY(v_status_days);
+
+        INSERT INTO interview_dailyhiringrollup AS r (
+            day, job_id, department, applications, moved_to_inprogress, closed, selected, feedback_count, rating_sum
+        )
+        SELECT
+            d.day,
+            ja.job_id,
+            j.department,
+            0,
+            COUNT(*) FILTER (WHERE h.new_status = 'inprogress'),
+            COUNT(*) FILTER (WHERE h.new_status = 'closed'),
+            COUNT(*) FILTER (WHERE h.is_selected),
+            0,
+            0
+        FROM
+            unnest(v_status_days) AS d(day)
+            JOIN interview_applicationstatushistory h
+                ON h.changed_at >= d.day::TIMESTAMP AT TIME ZONE 'UTC'
+                AND h.changed_at < (d.day + 1)::TIMESTAMP AT TIME ZONE 'UTC'
+            JOIN interview_jobapplication ja ON ja.id = h.application_id
+            JOIN interview_job j ON j.id = ja.job_id
+        GROUP BY d.day, ja.job_id, j.department
+        ON CONFLICT (job_id, day) DO UPDATE
+        SET
+            moved_to_inprogress = EXCLUDED.moved_to_inprogress,
+            closed = EXCLUDED.closed,
+            selected = EXCLUDED.selected,
+            department = EXCLUDED.department;
+
+        -- Feedback given on each day
+        UPDATE interview_dailyhiringrollup r
+        SET feedback_count = 0, rating_sum = 0
+        WHERE r.day = ANY(v_feedback_days);
+
+        INSERT INTO interview_dailyhiringrollup AS r (
+            day, job_id, department, applications, moved_to_inprogress, closed, selected, feedback_count, rating_sum
+        )
+        SELECT d.day, ja.job_id, j.department, 0, 0, 0, 0, COUNT(*), SUM(f.rating)
+        FROM
+            unnest(v_feedback_days) AS d(day)
+            JOIN interview_feedback f
+                ON f.created_at >= d.day::TIMESTAMP AT TIME ZONE 'UTC'
+                AND f.created_at < (d.day + 1)::TIMESTAMP AT TIME ZONE 'UTC'
+            JOIN interview_applicationround ar ON ar.id = f.application_round_id
+            JOIN interview_jobapplication ja ON ja.id = ar.application_id
+            JOIN interview_job j ON j.id = ja.job_id
+        GROUP BY d.day, ja.job_id, j.department
+        ON CONFLICT (job_id, day) DO UPDATE
+        SET feedback_count = EXCLUDED.feedback_count, rating_sum = EXCLUDED.rating_sum, department = EXCLUDED.department;
+
+        UPDATE interview_rollupwatermark w
+        SET refreshed_until = v_until
+        WHERE w.name = 'hiring';
+
+        RETURN (
+            SELECT COUNT(DISTINCT day)
+            FROM unnest(v_application_days || v_status_days || v_feedback_days) AS day
+        );
+    END;
+    $$;
+    """
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyHiringRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('department', models.CharField(max_length=50)),
+                ('applications', models.IntegerField(default=0)),
+                ('moved_to_inprogress', models.IntegerField(default=0)),
+                ('closed', models.IntegerField(default=0)),
+                ('selected', models.IntegerField(default=0)),
+                ('feedback_count', models.IntegerField(default=0)),
+                ('rating_sum', models.BigIntegerField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='interview.job')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['day'], name='rollup_day_idx'),
+                    models.Index(fields=['department', 'day'], name='rollup_department_day_idx'),
+                ],
+                'constraints': [
+                    models.UniqueConstraint(fields=('job', 'day'), name='unique_daily_hiring_rollup'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('refreshed_until', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunSQL(
+            history_changed_at_index,
+            "DROP INDEX IF EXISTS application_status_history_changed_idx;",
+        ),
+        migrations.RunSQL(
+            refresh_hiring_rollups_function,
+            "DROP FUNCTION IF EXISTS refresh_hiring_rollups(BOOLEAN);",
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Build the index without locking the table against writes
+    atomic = False
+
+    dependencies = [
+        ('interview', '0015_hiring_rollups'),
+    ]
+
+    # refresh_hiring_rollups() finds the feedback changed since its watermark
+    operations = [
+        AddIndexConcurrently(
+            model_name='feedback',
+            index=models.Index(fields=['updated_at'], name='feedback_updated_idx'),
+        ),
+    ]
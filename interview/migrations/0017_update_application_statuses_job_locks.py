@@ -0,0 +1,95 @@
+from importlib import import_module
+
+from django.db import migrations
+
+previous = import_module('interview.migrations.0014_update_application_statuses').Migration
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0016_feedback_updated_index'),
+    ]
+
+    # As in 0014, after locking the applications' jobs in id order (as
+    # select_candidates() does). Locking the applications in id order isn't
+    # enough on its own: the jobapplication_statistics_update trigger locks
+    # each application's job statistics row as the application is updated,
+    # so two calls whose applications interleave across two jobs could take
+    # those rows in opposite orders and deadlock.
+    update_application_statuses_function = """
+    CREATE OR REPLACE FUNCTION update_application_statuses(
+        p_application_ids BIGINT[],
+        p_statuses VARCHAR[],
+        p_updated_by VARCHAR(150)
+    )
+    RETURNS TABLE (
+        application_id BIGINT,
+        old_status VARCHAR(20),
+        new_status VARCHAR(20),
+        outcome TEXT
+    )
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        PERFORM 1
+        FROM interview_job j
+        WHERE j.id IN (
+            SELECT ja.job_id FROM interview_jobapplication ja WHERE ja.id = ANY(p_application_ids)
+        )
+        ORDER BY j.id
+        FOR NO KEY UPDATE;
+
+        RETURN QUERY
+        WITH requested AS (
+            -- The last status given for an application wins
+            SELECT DISTINCT ON (r.id) r.id, r.status, r.position
+            FROM unnest(p_application_ids, p_statuses) WITH ORDINALITY AS r(id, status, position)
+            ORDER BY r.id, r.position DESC
+        ),
+        locked AS (
+            SELECT ja.id, ja.status AS old_status, requested.status AS new_status
+            FROM interview_jobapplication ja JOIN requested ON ja.id = requested.id
+            ORDER BY ja.id
+            FOR UPDATE OF ja
+        ),
+        updated AS (
+            UPDATE interview_jobapplication ja
+            SET
+                status = locked.new_status,
+                updated_at = NOW()
+            FROM locked
+            WHERE ja.id = locked.id AND locked.old_status IS DISTINCT FROM locked.new_status
+            RETURNING ja.id, locked.old_status, locked.new_status
+        ),
+        history AS (
+            INSERT INTO interview_applicationstatushistory (
+                application_id,
+                old_status,
+                new_status,
+                changed_by
+            )
+            SELECT updated.id, updated.old_status, updated.new_status, p_updated_by
+            FROM updated
+        )
+        SELECT
+            requested.id,
+            locked.old_status::VARCHAR(20),
+            requested.status::VARCHAR(20),
+            CASE
+                WHEN updated.id IS NOT NULL THEN 'updated'
+                WHEN locked.id IS NOT NULL THEN 'unchanged'
+                ELSE 'not_found'
+            END
+        FROM
+            requested
+            LEFT JOIN locked ON locked.id = requested.id
+            LEFT JOIN updated ON updated.id = requested.id
+        ORDER BY requested.position;
+    END;
+    $$;
+    """
+
+    operations = [
+        migrations.RunSQL(update_application_statuses_function, previous.update_application_statuses_function),
+    ]
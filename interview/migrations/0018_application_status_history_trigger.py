@@ -0,0 +1,258 @@
+from importlib import import_module
+
+from django.db import migrations
+
+selection = import_module('interview.migrations.0014_update_application_statuses').Migration
+bulk = import_module('interview.migrations.0017_update_application_statuses_job_locks').Migration
+
+
+# Record every status change in the history with a trigger, instead of in
+# the functions that change statuses: changes made through the ORM (the
+# automatic close after the last feedback, edits of an application) were
+# missing from it, and so from the hiring rollups built on it.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0017_update_application_statuses_job_locks'),
+    ]
+
+    # One history row per change of status, and per selection. The change
+    # is attributed to the transaction-local ims.status_changed_by setting
+    # (see interview.db_procedures.status_changed_by()), and to no one
+    # when it isn't set.
+    history_trigger = """
+    CREATE OR REPLACE FUNCTION record_application_status_change()
+    RETURNS TRIGGER
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        INSERT INTO interview_applicationstatushistory (
+            application_id,
+            old_status,
+            new_status,
+            is_selected,
+            changed_by
+        ) VALUES (
+            NEW.id,
+            OLD.status,
+            NEW.status,
+            NEW.is_selected AND NOT OLD.is_selected,
+            COALESCE(current_setting('ims.status_changed_by', true), '')
+        );
+        RETURN NULL;
+    END;
+    $$;
+
+    CREATE TRIGGER jobapplication_status_history
+    AFTER UPDATE OF status, is_selected ON interview_jobapplication
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status OR (NEW.is_selected AND NOT OLD.is_selected))
+    EXECUTE FUNCTION record_application_status_change();
+    """
+
+    drop_history_trigger = """
+    DROP TRIGGER IF EXISTS jobapplication_status_history ON interview_jobapplication;
+    DROP FUNCTION IF EXISTS record_application_status_change();
+    """
+
+    # The functions that change statuses no longer write the history
+    # themselves; they set ims.status_changed_by for their own statements
+    # and restore it afterwards.
+    update_application_statuses_function = """
+    CREATE OR REPLACE FUNCTION update_application_statuses(
+        p_application_ids BIGINT[],
+        p_statuses VARCHAR[],
+        p_updated_by VARCHAR(150)
+    )
+    RETURNS TABLE (
+        application_id BIGINT,
+        old_status VARCHAR(20),
+        new_status VARCHAR(20),
+        outcome TEXT
+    )
+    LANGUAGE plpgsql
+    AS $$
+    DECLARE
+        v_changed_by TEXT := current_setting('ims.status_changed_by', true);
+    BEGIN
+        PERFORM set_config('ims.status_changed_by', p_updated_by, true);
+
+        PERFORM 1
+        FROM interview_job j
+        WHERE j.id IN (
+            SELECT ja.job_id FROM interview_jobapplication ja WHERE ja.id = ANY(p_application_ids)
+        )
+        ORDER BY j.id
+        FOR NO KEY UPDATE;
+
+        RETURN QUERY
+        WITH requested AS (
+            -- The last status given for an application wins
+            SELECT DISTINCT ON (r.id) r.id, r.status, r.position
+            FROM unnest(p_application_ids, p_statuses) WITH ORDINALITY AS r(id, status, position)
+            ORDER BY r.id, r.position DESC
+        ),
+        locked AS (
+            SELECT ja.id, ja.status AS old_status, requested.status AS new_status
+            FROM interview_jobapplication ja JOIN requested ON ja.id = requested.id
+            ORDER BY ja.id
+            FOR UPDATE OF ja
+        ),
+        updated AS (
+            UPDATE interview_jobapplication ja
+            SET
+                status = locked.new_status,
+                updated_at = NOW()
+            FROM locked
+            WHERE ja.id = locked.id AND locked.old_status IS DISTINCT FROM locked.new_status
+            RETURNING ja.id, locked.old_status, locked.new_status
+        )
+        SELECT
+            requested.id,
+            locked.old_status::VARCHAR(20),
+            requested.status::VARCHAR(20),
+            CASE
+                WHEN updated.id IS NOT NULL THEN 'updated'
+                WHEN locked.id IS NOT NULL THEN 'unchanged'
+                ELSE 'not_found'
+            END
+        FROM
+            requested
+            LEFT JOIN locked ON locked.id = requested.id
+            LEFT JOIN updated ON updated.id = requested.id
+        ORDER BY requested.position;
+
+        PERFORM set_config('ims.status_changed_by', COALESCE(v_changed_by, ''), true);
+    END;
+    $$;
+    """
+
+    track_application_status_procedure = """
+    CREATE OR REPLACE PROCEDURE track_application_status(
+        application_id INTEGER,
+        new_status VARCHAR(20),
+        updated_by VARCHAR(150)
+    )
+    LANGUAGE plpgsql
+    AS $$
+    DECLARE
+        v_old_status VARCHAR(20);
+        v_changed_by TEXT;
+    BEGIN
+        SELECT ja.status
+        INTO v_old_status
+        FROM interview_jobapplication ja
+        WHERE ja.id = track_application_status.application_id
+        FOR UPDATE;
+
+        IF NOT FOUND OR v_old_status = track_application_status.new_status THEN
+            RETURN;
+        END IF;
+
+        v_changed_by := current_setting('ims.status_changed_by', true);
+        PERFORM set_config('ims.status_changed_by', track_application_status.updated_by, true);
+
+        UPDATE interview_jobapplication ja
+        SET
+            status = track_application_status.new_status,
+            updated_at = NOW()
+        WHERE ja.id = track_application_status.application_id;
+
+        PERFORM set_config('ims.status_changed_by', COALESCE(v_changed_by, ''), true);
+    END;
+    $$;
+    """
+
+    select_candidates_function = """
+    CREATE OR REPLACE FUNCTION select_candidates(
+        p_application_ids BIGINT[],
+        p_selected_by VARCHAR(150)
+    )
+    RETURNS TABLE (
+        application_id BIGINT,
+        job_id BIGINT,
+        closed_applications INTEGER
+    )
+    LANGUAGE plpgsql
+    AS $$
+    DECLARE
+        v_missing BIGINT;
+        v_job_id BIGINT;
+        v_changed_by TEXT := current_setting('ims.status_changed_by', true);
+    BEGIN
+        SELECT requested.id
+        INTO v_missing
+        FROM unnest(p_application_ids) AS requested(id)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM interview_jobapplication ja WHERE ja.id = requested.id
+        )
+        LIMIT 1;
+        IF FOUND THEN
+            RAISE EXCEPTION 'Job application % does not exist', v_missing
+                USING ERRCODE = 'no_data_found';
+        END IF;
+
+        SELECT ja.job_id
+        INTO v_job_id
+        FROM interview_jobapplication ja
+        WHERE ja.id = ANY(p_application_ids)
+        GROUP BY ja.job_id
+        HAVING COUNT(*) > 1
+        LIMIT 1;
+        IF FOUND THEN
+            RAISE EXCEPTION 'Only one application can be selected for job %', v_job_id
+                USING ERRCODE = 'check_violation';
+        END IF;
+
+        PERFORM 1
+        FROM interview_job j
+        WHERE j.id IN (
+            SELECT ja.job_id FROM interview_jobapplication ja WHERE ja.id = ANY(p_application_ids)
+        )
+        ORDER BY j.id
+        FOR NO KEY UPDATE;
+
+        PERFORM set_config('ims.status_changed_by', p_selected_by, true);
+
+        RETURN QUERY
+        WITH selected AS (
+            SELECT ja.id, ja.job_id
+            FROM interview_jobapplication ja
+            WHERE ja.id = ANY(p_application_ids)
+        ),
+        targets AS (
+            SELECT ja.id, selected.id AS selected_id, selected.job_id AS selected_job_id
+            FROM interview_jobapplication ja JOIN selected ON ja.job_id = selected.job_id
+            WHERE ja.id = selected.id OR ja.status != 'closed'
+            ORDER BY ja.id
+            FOR UPDATE OF ja
+        ),
+        updated AS (
+            UPDATE interview_jobapplication ja
+            SET
+                is_selected = ja.is_selected OR ja.id = targets.selected_id,
+                status = 'closed',
+                updated_at = NOW()
+            FROM targets
+            WHERE ja.id = targets.id
+            RETURNING targets.*
+        )
+        SELECT
+            updated.selected_id,
+            updated.selected_job_id,
+            (COUNT(*) FILTER (WHERE updated.id != updated.selected_id))::INTEGER
+        FROM updated
+        GROUP BY updated.selected_id, updated.selected_job_id
+        ORDER BY updated.selected_id;
+
+        PERFORM set_config('ims.status_changed_by', COALESCE(v_changed_by, ''), true);
+    END;
+    $$;
+    """
+
+    operations = [
+        migrations.RunSQL(history_trigger, drop_history_trigger),
+        migrations.RunSQL(update_application_statuses_function, bulk.update_application_statuses_function),
+        migrations.RunSQL(track_application_status_procedure, selection.track_application_status_procedure),
+        migrations.RunSQL(select_candidates_function, selection.select_candidates_function),
+    ]
@@ -0,0 +1,176 @@
+from importlib import import_module
+
+from django.db import migrations
+
+previous = import_module('interview.migrations.0015_hiring_rollups').Migration
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0018_application_status_history_trigger'),
+    ]
+
+    # As in 0015, except that a full refresh no longer empties the table:
+    # it recomputes the application and feedback counts of every day, but
+    # the status counts only of the days still covered by an attached
+    # history partition (see manage_status_history_partitions), and then
+    # drops the rows left with nothing in them.
+    refresh_hiring_rollups_function = """
+    CREATE OR REPLACE FUNCTION refresh_hiring_rollups(p_full BOOLEAN DEFAULT FALSE)
+    RETURNS INTEGER
+    LANGUAGE plpgsql
+    AS $$
+    DECLARE
+        v_until TIMESTAMPTZ := clock_timestamp();
+        v_since TIMESTAMPTZ;
+        v_history_from TIMESTAMPTZ := '-infinity';
+        v_application_days DATE[];
+        v_status_days DATE[];
+        v_feedback_days DATE[];
+    BEGIN
+        -- The watermark row also keeps refreshes from running concurrently
+        INSERT INTO interview_rollupwatermark (name, refreshed_until)
+        VALUES ('hiring', '-infinity')
+        ON CONFLICT (name) DO NOTHING;
+
+        SELECT w.refreshed_until - INTERVAL '5 minutes'
+        INTO v_since
+        FROM interview_rollupwatermark w
+        WHERE w.name = 'hiring'
+        FOR UPDATE;
+
+        IF p_full THEN
+            v_since := '-infinity';
+
+            -- The status changes of months whose history partition was
+            -- detached are gone: keep the status counts of the days before
+            -- the oldest attached month (all of them, with none attached)
+            SELECT COALESCE(
+                MIN(to_date(substring(c.relname FROM '_p([0-9]{6})$'), 'YYYYMM')::TIMESTAMP AT TIME ZONE 'UTC'),
+                'infinity'
+            )
+            INTO v_history_from
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE
+                i.inhparent = 'interview_applicationstatushistory'::REGCLASS
+                AND c.relname ~ '_p[0-9]{6}$';
+
+            UPDATE interview_dailyhiringrollup r
+            SET applications = 0, feedback_count = 0, rating_sum = 0;
+
+            UPDATE interview_dailyhiringrollup r
+            SET moved_to_inprogress = 0, closed = 0, selected = 0
+            WHERE r.day >= (v_history_from AT TIME ZONE 'UTC')::DATE;
+        END IF;
+
+        -- Status changes also move an application's updated_at, but only
+        -- new applications change the count of the day they were made on
+        SELECT COALESCE(array_agg(DISTINCT (ja.applied_on AT TIME ZONE 'UTC')::DATE), '{}')
+        INTO v_application_days
+        FROM interview_jobapplication ja
+        WHERE ja.applied_on > v_since;
+
+        SELECT COALESCE(array_agg(DISTINCT (h.changed_at AT TIME ZONE 'UTC')::DATE), '{}')
+        INTO v_status_days
+        FROM interview_applicationstatushistory h
+        WHERE h.changed_at > v_since AND h.changed_at >= v_history_from;
+
+        SELECT COALESCE(array_agg(DISTINCT (f.created_at AT TIME ZONE 'UTC')::DATE), '{}')
+        INTO v_feedback_days
+        FROM interview_feedback f
+        WHERE f.updated_at > v_since;
+
+        -- Applications made on each day
+        UPDATE interview_dailyhiringrollup r
+        SET applications = 0
+        WHERE r.day = ANY(v_application_days);
+
+        INSERT INTO interview_dailyhiringrollup AS r (
+            day, job_id, department, applications, moved_to_inprogress, closed, selected, feedback_count, rating_sum
+        )
+        SELECT d.day, ja.job_id, j.department, COUNT(*), 0, 0, 0, 0, 0
+        FROM
+            unnest(v_application_days) AS d(day)
+            JOIN interview_jobapplication ja
+                ON ja.applied_on >= d.day::TIMESTAMP AT TIME ZONE 'UTC'
+                AND ja.applied_on < (d.day + 1)::TIMESTAMP AT TIME ZONE 'UTC'
+            JOIN interview_job j ON j.id = ja.job_id
+        GROUP BY d.day, ja.job_id, j.department
+        ON CONFLICT (job_id, day) DO UPDATE
+        SET applications = EXCLUDED.applications, department = EXCLUDED.department;
+
+        -- Status changes made on each day
+        UPDATE interview_dailyhiringrollup r
+        SET moved_to_inprogress = 0, closed = 0, selected = 0
+        WHERE r.day = ANY(v_status_days);
+
+        INSERT INTO interview_dailyhiringrollup AS r (
+            day, job_id, department, applications, moved_to_inprogress, closed, selected, feedback_count, rating_sum
+        )
+        SELECT
+            d.day,
+            ja.job_id,
+            j.department,
+            0,
+            COUNT(*) FILTER (WHERE h.new_status = 'inprogress'),
+            COUNT(*) FILTER (WHERE h.new_status = 'closed'),
+            COUNT(*) FILTER (WHERE h.is_selected),
+            0,
+            0
+        FROM
+            unnest(v_status_days) AS d(day)
+            JOIN interview_applicationstatushistory h
+                ON h.changed_at >= d.day::TIMESTAMP AT TIME ZONE 'UTC'
+                AND h.changed_at < (d.day + 1)::TIMESTAMP AT TIME ZONE 'UTC'
+            JOIN interview_jobapplication ja ON ja.id = h.application_id
+            JOIN interview_job j ON j.id = ja.job_id
+        GROUP BY d.day, ja.job_id, j.department
+        ON CONFLICT (job_id, day) DO UPDATE
+        SET
+            moved_to_inprogress = EXCLUDED.moved_to_inprogress,
+            closed = EXCLUDED.closed,
+            selected = EXCLUDED.selected,
+            department = EXCLUDED.department;
+
+        -- Feedback given on each day
+        UPDATE interview_dailyhiringrollup r
+        SET feedback_count = 0, rating_sum = 0
+        WHERE r.day = ANY(v_feedback_days);
+
+        INSERT INTO interview_dailyhiringrollup AS r (
+            day, job_id, department, applications, moved_to_inprogress, closed, selected, feedback_count, rating_sum
+        )
+        SELECT d.day, ja.job_id, j.department, 0, 0, 0, 0, COUNT(*), SUM(f.rating)
+        FROM
+            unnest(v_feedback_days) AS d(day)
+            JOIN interview_feedback f
+                ON f.created_at >= d.day::TIMESTAMP AT TIME ZONE 'UTC'
+                AND f.created_at < (d.day + 1)::TIMESTAMP AT TIME ZONE 'UTC'
+            JOIN interview_applicationround ar ON ar.id = f.application_round_id
+            JOIN interview_jobapplication ja ON ja.id = ar.application_id
+            JOIN interview_job j ON j.id = ja.job_id
+        GROUP BY d.day, ja.job_id, j.department
+        ON CONFLICT (job_id, day) DO UPDATE
+        SET feedback_count = EXCLUDED.feedback_count, rating_sum = EXCLUDED.rating_sum, department = EXCLUDED.department;
+
+        IF p_full THEN
+            DELETE FROM interview_dailyhiringrollup r
+            WHERE (r.applications, r.moved_to_inprogress, r.closed, r.selected, r.feedback_count) = (0, 0, 0, 0, 0);
+        END IF;
+
+        UPDATE interview_rollupwatermark w
+        SET refreshed_until = v_until
+        WHERE w.name = 'hiring';
+
+        RETURN (
+            SELECT COUNT(DISTINCT day)
+            FROM unnest(v_application_days || v_status_days || v_feedback_days) AS day
+        );
+    END;
+    $$;
+    """
+
+    operations = [
+        migrations.RunSQL(refresh_hiring_rollups_function, previous.refresh_hiring_rollups_function),
+    ]
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Copy each round's interviewer onto its feedback in the database, so
+# feedback written by bulk_create or raw SQL is scoped as well, and
+# reassigning a round moves its feedback along.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('interview', '0019_hiring_rollups_keep_detached_history'),
+    ]
+
+    feedback_interviewer_triggers = """
+    CREATE OR REPLACE FUNCTION feedback_interviewer_update()
+    RETURNS TRIGGER
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        SELECT interviewer_id INTO NEW.interviewer_id
+        FROM interview_applicationround
+        WHERE id = NEW.application_round_id;
+        RETURN NEW;
+    END;
+    $$;
+
+    CREATE TRIGGER feedback_interviewer_trigger
+    BEFORE INSERT OR UPDATE OF application_round_id ON interview_feedback
+    FOR EACH ROW EXECUTE FUNCTION feedback_interviewer_update();
+
+    CREATE OR REPLACE FUNCTION round_interviewer_update()
+    RETURNS TRIGGER
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        UPDATE interview_feedback
+        SET interviewer_id = NEW.interviewer_id
+        WHERE application_round_id = NEW.id;
+        RETURN NULL;
+    END;
+    $$;
+
+    CREATE TRIGGER round_interviewer_trigger
+    AFTER UPDATE OF interviewer_id ON interview_applicationround
+    FOR EACH ROW
+    WHEN (OLD.interviewer_id IS DISTINCT FROM NEW.interviewer_id)
+    EXECUTE FUNCTION round_interviewer_update();
+    """
+
+    drop_feedback_interviewer_triggers = """
+    DROP TRIGGER IF EXISTS round_interviewer_trigger ON interview_applicationround;
+    DROP FUNCTION IF EXISTS round_interviewer_update();
+    DROP TRIGGER IF EXISTS feedback_interviewer_trigger ON interview_feedback;
+    DROP FUNCTION IF EXISTS feedback_interviewer_update();
+    """
+
+    backfill_feedback_interviewer = """
+    UPDATE interview_feedback fb
+    SET interviewer_id = ar.interviewer_id
+    FROM interview_applicationround ar
+    WHERE ar.id = fb.application_round_id;
+    """
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='interviewer',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunSQL(feedback_interviewer_triggers, drop_feedback_interviewer_triggers),
+        migrations.RunSQL(backfill_feedback_interviewer, migrations.RunSQL.noop),
+    ]
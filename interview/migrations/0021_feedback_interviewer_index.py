@@ -0,0 +1,20 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Build the index without locking the table against writes
+    atomic = False
+
+    dependencies = [
+        ('interview', '0020_feedback_interviewer'),
+    ]
+
+    # An interviewer's feedback list, newest first (FeedbackListView)
+    operations = [
+        AddIndexConcurrently(
+            model_name='feedback',
+            index=models.Index(fields=['interviewer', 'created_at', 'id'], name='feedback_interviewer_idx'),
+        ),
+    ]
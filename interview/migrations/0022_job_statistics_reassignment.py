@@ -0,0 +1,133 @@
+from importlib import import_module
+
+from django.db import migrations
+
+previous = import_module('interview.migrations.0003_job_statistics_triggers').Migration
+
+
+# Move the feedback totals along when an application moves to another job,
+# or a round to another application of another job. The application
+# counts already moved with job_id; the feedback stayed on the old job
+# until rebuild_job_statistics() ran.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0021_feedback_interviewer_index'),
+    ]
+
+    # An update is applied as removing the old row and adding the new one;
+    # a job change also moves the feedback of the application's rounds.
+    application_statistics_function = """
+    CREATE OR REPLACE FUNCTION jobapplication_statistics_trigger()
+    RETURNS TRIGGER
+    LANGUAGE plpgsql
+    AS $$
+    DECLARE
+        v_feedback INTEGER;
+        v_rating BIGINT;
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM apply_job_statistics(
+                OLD.job_id,
+                -1,
+                -(OLD.status = 'new')::INTEGER,
+                -(OLD.status = 'inprogress')::INTEGER,
+                -(OLD.status = 'closed')::INTEGER,
+                -(OLD.is_selected)::INTEGER,
+                0,
+                0,
+                FALSE
+            );
+        END IF;
+
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM apply_job_statistics(
+                NEW.job_id,
+                1,
+                (NEW.status = 'new')::INTEGER,
+                (NEW.status = 'inprogress')::INTEGER,
+                (NEW.status = 'closed')::INTEGER,
+                (NEW.is_selected)::INTEGER,
+                0,
+                0,
+                TRUE
+            );
+        END IF;
+
+        IF TG_OP = 'UPDATE' AND OLD.job_id IS DISTINCT FROM NEW.job_id THEN
+            SELECT COUNT(*), COALESCE(SUM(fb.rating), 0) INTO v_feedback, v_rating
+            FROM
+                interview_feedback fb
+                JOIN interview_applicationround ar ON ar.id = fb.application_round_id
+            WHERE
+                ar.application_id = NEW.id;
+
+            IF v_feedback > 0 THEN
+                PERFORM apply_job_statistics(OLD.job_id, 0, 0, 0, 0, 0, -v_feedback, -v_rating, FALSE);
+                PERFORM apply_job_statistics(NEW.job_id, 0, 0, 0, 0, 0, v_feedback, v_rating, TRUE);
+            END IF;
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$;
+    """
+
+    # Trigger function for interview_applicationround: moving a round to an
+    # application of another job moves its feedback to that job.
+    round_statistics_trigger = """
+    CREATE OR REPLACE FUNCTION applicationround_statistics_trigger()
+    RETURNS TRIGGER
+    LANGUAGE plpgsql
+    AS $$
+    DECLARE
+        v_old_job_id BIGINT;
+        v_new_job_id BIGINT;
+        v_feedback INTEGER;
+        v_rating BIGINT;
+    BEGIN
+        SELECT job_id INTO v_old_job_id FROM interview_jobapplication WHERE id = OLD.application_id;
+        SELECT job_id INTO v_new_job_id FROM interview_jobapplication WHERE id = NEW.application_id;
+        IF v_old_job_id IS NOT DISTINCT FROM v_new_job_id THEN
+            RETURN NULL;
+        END IF;
+
+        SELECT COUNT(*), COALESCE(SUM(rating), 0) INTO v_feedback, v_rating
+        FROM interview_feedback
+        WHERE application_round_id = NEW.id;
+
+        IF v_feedback > 0 THEN
+            PERFORM apply_job_statistics(v_old_job_id, 0, 0, 0, 0, 0, -v_feedback, -v_rating, FALSE);
+            PERFORM apply_job_statistics(v_new_job_id, 0, 0, 0, 0, 0, v_feedback, v_rating, TRUE);
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$;
+
+    CREATE TRIGGER applicationround_statistics_update
+    AFTER UPDATE OF application_id ON interview_applicationround
+    FOR EACH ROW
+    WHEN (OLD.application_id IS DISTINCT FROM NEW.application_id)
+    EXECUTE FUNCTION applicationround_statistics_trigger();
+    """
+
+    # The 0003 function comes back with its triggers
+    restore_application_statistics_trigger = [
+        """
+        DROP TRIGGER jobapplication_statistics_insert_delete ON interview_jobapplication;
+        DROP TRIGGER jobapplication_statistics_update ON interview_jobapplication;
+        """,
+        previous.application_statistics_trigger,
+    ]
+
+    operations = [
+        migrations.RunSQL(application_statistics_function, restore_application_statistics_trigger),
+        migrations.RunSQL(
+            round_statistics_trigger,
+            """
+            DROP TRIGGER applicationround_statistics_update ON interview_applicationround;
+            DROP FUNCTION applicationround_statistics_trigger;
+            """,
+        ),
+    ]
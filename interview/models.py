@@ -1,7 +1,10 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from account.models import TimeStampModel
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
+from interview.managers import JobQuerySet, JobApplicationQuerySet, ApplicationRoundQuerySet, FeedbackQuerySet
 
 # Create your models here.
 
@@ -22,6 +25,16 @@ class Job(TimeStampModel):
     department = models.CharField(max_length=50)
     position = models.CharField(max_length=30, choices=POSITION_CHOICES)
     is_open = models.BooleanField(default=True)
+    # Weighted title/department/description lexemes for ?search=, kept
+    # current by a trigger (see migration 0010)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='job_search_vector_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.get_position_display()}"
@@ -41,6 +54,22 @@ class JobApplication(TimeStampModel):
     # resume = models.FileField(upload_to='resumes/')
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='new')
     is_selected = models.BooleanField(default=False)
+    # Kept current by interview/signals.py; repair with reconcile_application_counters
+    rounds_count = models.PositiveIntegerField(default=0)
+    feedback_count = models.PositiveIntegerField(default=0)
+
+    objects = JobApplicationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['job', 'status'], name='application_job_status_idx'),
+            models.Index(fields=['candidate', 'applied_on'], name='application_cand_applied_idx'),
+            models.Index(fields=['applied_on', 'id'], name='application_applied_idx'),
+            models.Index(fields=['status', 'id'], name='application_status_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'candidate'], name='unique_job_application'),
+        ]
 
     def __str__(self):
         return f"{self.candidate.fullname} applied to {self.job.title}"
@@ -62,6 +91,15 @@ class ApplicationRound(TimeStampModel):
     interviewer = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'interviewer'})
     duration = models.IntegerField()
 
+    objects = ApplicationRoundQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['interviewer', 'scheduled_time'], name='round_interviewer_time_idx'),
+            models.Index(fields=['scheduled_time', 'id'], name='round_scheduled_idx'),
+            models.Index(fields=['interviewer', 'application'], name='round_interviewer_app_idx'),
+        ]
+
     def __str__(self):
         return f"{self.round.round_type} | {self.application.candidate.fullname}"
 
@@ -69,5 +107,131 @@ class Feedback(TimeStampModel):
     application_round = models.ForeignKey(ApplicationRound, on_delete=models.CASCADE, related_name='feedbacks')
     comments = models.TextField()
     rating = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
+    # The round's interviewer, so an interviewer's feedback list is one
+    # index range scan; kept current by triggers (see migration 0020)
+    interviewer = models.ForeignKey(User, on_delete=models.CASCADE, null=True, editable=False, db_index=False, related_name='+')
+
+    objects = FeedbackQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['application_round', 'created_at'], name='feedback_round_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='feedback_created_idx'),
+            models.Index(fields=['updated_at'], name='feedback_updated_idx'),
+            models.Index(fields=['interviewer', 'created_at', 'id'], name='feedback_interviewer_idx'),
+        ]
+
+
+
+class JobStatistics(TimeStampModel):
+    """
+    Per-job application and feedback totals, kept current by database
+    triggers on interview_jobapplication and interview_feedback (see the
+    job_statistics migration). Rebuild with `manage.py rebuild_job_statistics`.
+    """
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='statistics')
+    total_applications = models.IntegerField(default=0)
+    new_applications = models.IntegerField(default=0)
+    in_progress_applications = models.IntegerField(default=0)
+    closed_applications = models.IntegerField(default=0)
+    selected_applications = models.IntegerField(default=0)
+    feedback_count = models.IntegerField(default=0)
+    rating_sum = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Statistics for {self.job.title}"
+
+class InterviewReminder(TimeStampModel):
+    """
+    Ledger of reminder emails already sent. One row per application round
+    and interview time, so re-running the reminder task (or retrying it)
+    never emails the same reminder twice, while a rescheduled interview
+    gets a new one.
+    """
+    application_round = models.ForeignKey(ApplicationRound, on_delete=models.CASCADE, related_name='reminders')
+    scheduled_time = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['application_round', 'scheduled_time'], name='unique_interview_reminder'),
+        ]
+
+    def __str__(self):
+        return f"Reminder for round {self.application_round_id} at {self.scheduled_time}"
+
+
+class ApplicationStatusHistory(models.Model):
+    """
+    Append-only log of application status changes and selections, written
+    by a trigger in the transaction that makes the change, however it is
+    made. changed_by is empty for changes nobody is attributed to (see
+    interview.db_procedures.status_changed_by()), such as the automatic
+    close after the last feedback.
+
+    The table is partitioned by month on changed_at and created by SQL (see
+    the application_status_history migration), so Django doesn't manage it.
+    Partitions are created ahead and old ones detached with
+    `manage.py manage_status_history_partitions`.
+    """
+    # No foreign key constraint: inserts stay cheap, and the history
+    # outlives deleted applications
+    application = models.ForeignKey(
+        JobApplication, on_delete=models.DO_NOTHING, db_constraint=False, related_name='status_history'
+    )
+    old_status = models.CharField(max_length=20, null=True)
+    new_status = models.CharField(max_length=20)
+    is_selected = models.BooleanField(default=False)
+    changed_by = models.CharField(max_length=150)
+    changed_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'interview_applicationstatushistory'
+
+    def __str__(self):
+        return f"Application {self.application_id}: {self.old_status} -> {self.new_status}"
 
 
+class DailyHiringRollup(models.Model):
+    """
+    Hiring activity per job and day (UTC): applications received, status
+    changes (from the status history) and feedback given. Refreshed
+    incrementally by the refresh_hiring_rollups database function (see the
+    hiring_rollups migration), which Celery beat runs every few minutes;
+    rebuild with `manage.py refresh_hiring_rollups --full`.
+    """
+    day = models.DateField()
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='daily_rollups')
+    # The job's department, so rollups group by department without a join
+    department = models.CharField(max_length=50)
+    applications = models.IntegerField(default=0)
+    moved_to_inprogress = models.IntegerField(default=0)
+    closed = models.IntegerField(default=0)
+    selected = models.IntegerField(default=0)
+    feedback_count = models.IntegerField(default=0)
+    rating_sum = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day'], name='rollup_day_idx'),
+            models.Index(fields=['department', 'day'], name='rollup_department_day_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'day'], name='unique_daily_hiring_rollup'),
+        ]
+
+    def __str__(self):
+        return f"Hiring on {self.day} for job {self.job_id}"
+
+
+class RollupWatermark(models.Model):
+    """
+    How far a rollup has been refreshed: the next refresh picks up the rows
+    changed after refreshed_until (less a few minutes of overlap, for
+    transactions that committed late).
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    refreshed_until = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} refreshed until {self.refreshed_until}"
@@ -0,0 +1,41 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from interview.cache import invalidate_job_lists
+from interview.models import ApplicationRound, Feedback, Job, JobApplication
+
+
+@receiver([post_save, post_delete], sender=Job)
+@receiver([post_save, post_delete], sender=JobApplication)
+def invalidate_cached_job_lists(sender, **kwargs):
+    # Job listings show job fields and each job's application count
+    invalidate_job_lists()
+
+
+@receiver(post_save, sender=ApplicationRound)
+def count_created_round(sender, instance, created, **kwargs):
+    if created:
+        JobApplication.objects.filter(pk=instance.application_id).update(rounds_count=F('rounds_count') + 1)
+
+
+@receiver(post_delete, sender=ApplicationRound)
+def count_deleted_round(sender, instance, **kwargs):
+    JobApplication.objects.filter(pk=instance.application_id).update(rounds_count=F('rounds_count') - 1)
+
+
+@receiver(post_save, sender=Feedback)
+def count_created_feedback(sender, instance, created, **kwargs):
+    if created:
+        JobApplication.objects.filter(rounds=instance.application_round_id).update(
+            feedback_count=F('feedback_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Feedback)
+def count_deleted_feedback(sender, instance, **kwargs):
+    # Filtering through the round avoids loading it; when the round is being
+    # deleted too, its feedback is deleted first, so the join still matches
+    JobApplication.objects.filter(rounds=instance.application_round_id).update(
+        feedback_count=F('feedback_count') - 1
+    )
@@ -1,17 +1,37 @@
 # Import necessary libraries
 from celery import shared_task  # For creating background tasks
-from django.core.mail import send_mail  # For sending emails
+from celery.signals import worker_process_init  # To run code when a worker process starts
+from celery import group  # For running many tasks in parallel
+from django.core.mail import EmailMessage  # For building plain text emails
 from django.conf import settings  # To access Django settings
 from django.utils import timezone  # For working with dates and times
-from django.db import models  # For database operations
+from django.db import connection, models, transaction  # For database operations
 from datetime import datetime, timedelta  # For date calculations
-from interview.email_utils import render_feedback_email, send_feedback_notification_email  # Our own email functions
+from itertools import groupby  # For grouping a sorted stream of rows
+from interview.email_utils import (  # Our own email functions
+    render_feedback_email, build_feedback_notification_email, send_email_messages,
+    precompile_email_templates, render_interview_reminder_email, is_transient_smtp_error,
+)
+
+# How far ahead interviewers are reminded about their interviews
+REMINDER_LEAD_TIME = timedelta(hours=24)
+
+@worker_process_init.connect
+def compile_email_templates(**kwargs):
+    """
+    Compile the email templates once when each worker process starts,
+    instead of on the first email it sends.
+    """
+    precompile_email_templates()
 
 @shared_task
 def send_feedback_notification(feedback_id):
     """
     This task sends email notifications when feedback is submitted.
     It runs in the background, so the user doesn't have to wait for emails to send.
+    All emails are built first and then sent over a single SMTP connection.
+    Delivery errors that survive the retries are raised, so the task is
+    marked as failed instead of reporting success.
     
     Args:
         feedback_id: The ID of the feedback in the database
@@ -27,155 +47,227 @@ def send_feedback_notification(feedback_id):
             'application_round__interviewer',
             'application_round__application__job'
         ).get(id=feedback_id)
+    # Handle cases where the feedback doesn't exist
+    except Feedback.DoesNotExist:
+        return f"Feedback with ID {feedback_id} not found"
         
-        # Step 2: Extract the data we need for the emails
-        candidate = feedback.application_round.application.candidate
-        interviewer = feedback.application_round.interviewer
-        job = feedback.application_round.application.job
-        feedback_date = timezone.now().strftime('%Y-%m-%d %H:%M')
-        
-        # Step 3: Prepare the email for the candidate
-        candidate_subject = f"New feedback for your {job.title} application"
+    # Step 2: Extract the data we need for the emails
+    candidate = feedback.application_round.application.candidate
+    interviewer = feedback.application_round.interviewer
+    job = feedback.application_round.application.job
+    feedback_date = timezone.now().strftime('%Y-%m-%d %H:%M')
+    
+    # Step 3: Prepare the email for the candidate
+    candidate_subject = f"New feedback for your {job.title} application"
+    
+    # This dictionary contains all the data we want to show in the candidate's email
+    candidate_template_data = {
+        'subject': candidate_subject,
+        'recipient_name': candidate.first_name,
+        'job_title': job.title,
+        'interviewer_name': f"{interviewer.first_name} {interviewer.last_name}",
+        'feedback_date': feedback_date,
+        'show_rating': False  # We don't show the rating to candidates
+    }
+    
+    # Step 4: Render and build the candidate's email
+    # First, we fill in the template with our data
+    candidate_html = render_feedback_email(candidate_template_data, is_candidate=True)
+    # Then we build the email (it is sent together with the others in Step 6)
+    messages = [build_feedback_notification_email(candidate.email, candidate_subject, candidate_html)]
+    
+    # Step 5: Prepare emails to all admins
+    # First, get a list of all admin email addresses
+    admin_emails = list(
+        User.objects.filter(role='admin').values_list('email', flat=True)
+    )
+    
+    # If we found any admins, send them emails too
+    if admin_emails:
+        admin_subject = f"New feedback from {interviewer.first_name} for {candidate.first_name}"
         
-        # This dictionary contains all the data we want to show in the candidate's email
-        candidate_template_data = {
-            'subject': candidate_subject,
-            'recipient_name': candidate.first_name,
+        # This dictionary contains all the data for the admin emails
+        admin_template_data = {
+            'subject': admin_subject,
+            'recipient_name': "Admin",
+            'candidate_name': f"{candidate.first_name} {candidate.last_name}",
             'job_title': job.title,
             'interviewer_name': f"{interviewer.first_name} {interviewer.last_name}",
+            'rating': feedback.rating,
             'feedback_date': feedback_date,
-            'show_rating': False  # We don't show the rating to candidates
+            'comments': feedback.comments
         }
         
-        # Step 4: Render and send the candidate's email
-        # First, we fill in the template with our data
-        candidate_html = render_feedback_email(candidate_template_data, is_candidate=True)
-        # Then we send the email
-        send_feedback_notification_email(candidate.email, candidate_subject, candidate_html)
-        
-        # Step 5: Prepare and send emails to all admins
-        # First, get a list of all admin email addresses
-        admin_emails = list(
-            User.objects.filter(role='admin').values_list('email', flat=True)
-        )
-        
-        # If we found any admins, send them emails too
-        if admin_emails:
-            admin_subject = f"New feedback from {interviewer.first_name} for {candidate.first_name}"
-            
-            # This dictionary contains all the data for the admin emails
-            admin_template_data = {
-                'subject': admin_subject,
-                'recipient_name': "Admin",
-                'candidate_name': f"{candidate.first_name} {candidate.last_name}",
-                'job_title': job.title,
-                'interviewer_name': f"{interviewer.first_name} {interviewer.last_name}",
-                'rating': feedback.rating,
-                'feedback_date': feedback_date,
-                'comments': feedback.comments
-            }
-            
-            # Send an email to each admin
-            for admin_email in admin_emails:
-                # Render the template for this admin
-                admin_html = render_feedback_email(admin_template_data, is_candidate=False)
-                # Send the email
-                send_feedback_notification_email(admin_email, admin_subject, admin_html)
+        # Every admin gets the same content, so render the template only once
+        admin_html = render_feedback_email(admin_template_data, is_candidate=False)
         
-        # Return a success message
-        return f"Notification sent for feedback {feedback_id}"
+        # Build an email for each admin
+        for admin_email in admin_emails:
+            # Build the email
+            messages.append(build_feedback_notification_email(admin_email, admin_subject, admin_html))
     
-    # Handle cases where the feedback doesn't exist
-    except Feedback.DoesNotExist:
-        return f"Feedback with ID {feedback_id} not found"
-    # Handle any other errors
-    except Exception as e:
-        return f"Error sending notification: {str(e)}"
+    # Step 6: Send all the emails over one SMTP connection
+    sent = send_email_messages(messages)
+    
+    # Return a success message
+    return f"Notification sent for feedback {feedback_id} ({sent} emails)"
+
+def pending_reminders(now):
+    """
+    Rounds starting within REMINDER_LEAD_TIME of now that have no reminder
+    in the ledger for their current scheduled time yet.
+    """
+    from interview.models import ApplicationRound, InterviewReminder
+
+    already_sent = InterviewReminder.objects.filter(
+        application_round=models.OuterRef('pk'),
+        scheduled_time=models.OuterRef('scheduled_time'),
+    )
+    return ApplicationRound.objects.filter(
+        scheduled_time__gt=now,  # Greater than current time
+        scheduled_time__lte=now + REMINDER_LEAD_TIME,  # Within the reminder window
+    ).exclude(models.Exists(already_sent))
 
 @shared_task
 def send_interview_reminders():
     """
     This task sends reminder emails to interviewers about upcoming interviews.
-    It runs automatically once per day through Celery Beat.
+    It runs automatically every hour through Celery Beat.
+    
+    It only collects the work: rounds are streamed from the database
+    ordered by interviewer, and each interviewer's rounds are handed to a
+    send_interviewer_reminder subtask, all dispatched as one group.
+    Reminders already in the ledger are skipped, so running it again (or
+    every hour) does not send duplicates.
     """
-    from interview.models import ApplicationRound
+    # Step 1: Stream the pending rounds, sorted so each interviewer's rounds are adjacent
+    rows = pending_reminders(timezone.now()).order_by(
+        'interviewer_id', 'scheduled_time'
+    ).values_list('interviewer_id', 'id').iterator(chunk_size=2000)
     
-    # Step 1: Calculate the time window for reminders
-    now = timezone.now()  # Current time
-    next_24_hours = now + timedelta(hours=24)  # 24 hours from now
+    # Step 2: One subtask per interviewer, so each gets one consolidated email
+    subtasks = [
+        send_interviewer_reminder.s(interviewer_id, [round_id for _, round_id in interviewer_rows])
+        for interviewer_id, interviewer_rows in groupby(rows, key=lambda row: row[0])
+    ]
     
-    # Step 2: Find all interviews scheduled in the next 24 hours
-    upcoming_interviews = ApplicationRound.objects.filter(
-        scheduled_time__gt=now,  # Greater than current time
-        scheduled_time__lte=next_24_hours  # Less than or equal to 24 hours from now
-    ).select_related(
-        'interviewer',
-        'application__candidate',
-        'application__job'
-    )
+    # Step 3: Send them all in parallel
+    if subtasks:
+        group(subtasks).apply_async()
     
-    # Step 3: Group interviews by interviewer
-    # This way, each interviewer gets one email with all their interviews
-    interviewer_interviews = {}
-    for interview in upcoming_interviews:
-        interviewer = interview.interviewer
-        # If this is the first interview for this interviewer, create an entry
-        if interviewer.id not in interviewer_interviews:
-            interviewer_interviews[interviewer.id] = {
-                'interviewer': interviewer,
-                'interviews': []
-            }
-        # Add this interview to the interviewer's list
-        interviewer_interviews[interviewer.id]['interviews'].append(interview)
-    
-    # Step 4: Send reminder emails to each interviewer
-    for interviewer_data in interviewer_interviews.values():
-        interviewer = interviewer_data['interviewer']
-        interviews = interviewer_data['interviews']
-        
-        # Prepare the email subject
-        subject = f"Reminder: You have {len(interviews)} interview(s) scheduled in the next 24 hours"
-        
-        # Start building the email message
-        message = f"""
-        Hello {interviewer.first_name},
-        
-        This is a reminder that you have the following interview(s) scheduled in the next 24 hours:
-        
-        """
-        
-        # Add details for each interview
-        for interview in interviews:
-            candidate = interview.application.candidate
-            job = interview.application.job
-            interview_time = interview.scheduled_time
-            formatted_time = interview_time.strftime('%Y-%m-%d %H:%M')
-            
-            # Add this interview to the message
-            message += f"""
-        * {formatted_time} - {job.title}
-          Candidate: {candidate.first_name} {candidate.last_name}
-          Email: {candidate.email}
-          Phone: {candidate.phone}
-            """
-        
-        # Finish the message
-        message += f"""
-        
-        Please be prepared and on time for your interviews.
-        
-        Best regards,
-        {settings.COMPANY_NAME} Team
-        """
+    # Return a summary of what we did
+    return f"Queued interview reminders for {len(subtasks)} interviewers"
+
+@shared_task(bind=True, max_retries=3)
+def send_interviewer_reminder(self, interviewer_id, round_ids):
+    """
+    This task sends one interviewer a single reminder email for the given
+    rounds and records them in the reminder ledger.
+    
+    The rounds are claimed up front by inserting their ledger rows, which
+    are unique per round and interview time, and the claims are committed
+    before the email is sent, so no locks are held during the SMTP
+    exchange. A duplicate or retried subtask therefore finds nothing left
+    to claim, and any failure after the claim (loading the rounds,
+    rendering or sending the email) deletes the claims again so the rounds
+    are retried.
+    
+    Args:
+        interviewer_id: The ID of the interviewer to remind
+        round_ids: The IDs of the ApplicationRounds to remind them about
+    """
+    from interview.models import ApplicationRound, InterviewReminder
+    
+    # Step 1: Claim the rounds that are still pending, skipping any another run has claimed
+    now = timezone.now()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO interview_interviewreminder (application_round_id, scheduled_time, created_at, updated_at)
+            SELECT ar.id, ar.scheduled_time, %s, %s
+            FROM interview_applicationround ar
+            WHERE
+                ar.id = ANY(%s)
+                AND ar.interviewer_id = %s
+                AND ar.scheduled_time > %s
+                AND ar.scheduled_time <= %s
+            ON CONFLICT (application_round_id, scheduled_time) DO NOTHING
+            RETURNING id, application_round_id
+        """, [now, now, list(round_ids), interviewer_id, now, now + REMINDER_LEAD_TIME])
+        claims = cursor.fetchall()
+    if not claims:
+        return f"No reminders left to send for interviewer {interviewer_id}"
+    
+    # Steps 2-4 release the claims again if anything fails, so the rounds are retried
+    try:
+        # Step 2: Load the claimed rounds
+        interviews = list(
+            ApplicationRound.objects.filter(id__in=[round_id for _, round_id in claims]).select_related(
+                'interviewer',
+                'application__candidate',
+                'application__job'
+            ).order_by('scheduled_time')
+        )
+        if not interviews:
+            # The claimed rounds were deleted since, and their claims with them
+            return f"No reminders left to send for interviewer {interviewer_id}"
         
-        # Send the email
-        send_mail(
+        # Step 3: Build the email from the template
+        interviewer = interviews[0].interviewer
+        lead_time_hours = int(REMINDER_LEAD_TIME.total_seconds() // 3600)
+        subject = f"Reminder: You have {len(interviews)} interview(s) scheduled in the next {lead_time_hours} hours"
+        body = render_interview_reminder_email({
+            'interviewer_name': interviewer.first_name,
+            'lead_time_hours': lead_time_hours,
+            'interviews': [
+                {
+                    'time': interview.scheduled_time.strftime('%Y-%m-%d %H:%M'),
+                    'job_title': interview.application.job.title,
+                    'candidate_name': interview.application.candidate.fullname,
+                    'candidate_email': interview.application.candidate.email,
+                    'candidate_phone': interview.application.candidate.phone,
+                }
+                for interview in interviews
+            ],
+        })
+        message = EmailMessage(
             subject=subject,
-            message=message,
+            body=body,
             from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[interviewer.email],
-            fail_silently=False,
+            to=[interviewer.email],
         )
+        
+        # Step 4: Send the email
+        send_email_messages([message])
+    except Exception as error:
+        InterviewReminder.objects.filter(id__in=[claim_id for claim_id, _ in claims]).delete()
+        # Retry the whole task later on temporary failures
+        if is_transient_smtp_error(error):
+            raise self.retry(exc=error, countdown=60)
+        raise
     
-    # Return a summary of what we did
-    return f"Sent interview reminders to {len(interviewer_interviews)} interviewers" 
\ No newline at end of file
+    return f"Sent {len(interviews)} interview reminder(s) to interviewer {interviewer_id}"
+
+
+@shared_task
+def ensure_status_history_partitions():
+    """
+    Create the application status history partitions for the coming
+    months ahead of time, so status changes don't pile up in the default
+    partition. Old partitions are detached by hand, see
+    `manage.py manage_status_history_partitions --keep-months`.
+    """
+    from interview.db_procedures import create_status_history_partitions
+
+    create_status_history_partitions()
+
+
+@shared_task
+def refresh_hiring_rollups():
+    """
+    Bring the daily hiring rollups (DailyHiringRollup) up to date with the
+    applications, status changes and feedback since the last refresh.
+    """
+    from interview import db_procedures
+
+    db_procedures.refresh_hiring_rollups()
+
@@ -1,3 +1,1623 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import smtplib
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from importlib import import_module
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from account.api.serializers import RoleTokenObtainPairSerializer
+from account.models import User
+from ims import routers
+from ims.celery import app as celery_app
+from interview.api import throttling
+from ims.middleware import ReplicaRoutingMiddleware, brotli
+from ims.parsers import ORJSONParser
+from ims.renderers import ORJSONRenderer
+from interview.api.serializers import FeedbackSerializer
+from interview.api.views import (FeedbackListView, JobApplicationExportView, JobApplicationListView, MyApplicationsListView,
+                                 MyInterviewsView, OpenJobsListView, UpcomingInterviewsView)
+from interview.cache import get_job_list_cache_stats
+from interview.db_procedures import (detach_status_history_partitions, refresh_hiring_rollups, update_application_status,
+                                     update_application_statuses)
+from interview.models import (Job, JobApplication, InterviewRound, ApplicationRound, Feedback, InterviewReminder,
+                              ApplicationStatusHistory, DailyHiringRollup)
+from interview.tasks import send_feedback_notification, send_interview_reminders, send_interviewer_reminder
+
+
+def create_user(email, role):
+    return User.objects.create_user(
+        email=email, password='secret', first_name=email.split('@')[0], last_name='Test', role=role
+    )
+
+
+class JobListQueryCountTests(TestCase):
+    """
+    Listing N jobs (or N objects nesting a job) must cost a constant
+    number of queries, independent of N.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('admin@ims.com', 'admin')
+        cls.interviewer = create_user('interviewer@ims.com', 'interviewer')
+        cls.candidate = create_user('candidate@ims.com', 'candidate')
+        cls.other_candidate = create_user('other@ims.com', 'candidate')
+        cls.round_type = InterviewRound.objects.create(round_type='technical')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def seed_jobs(self, count):
+        for i in range(count):
+            job = Job.objects.create(
+                title=f'Job {i}', description='Build things', department='Engineering', position='intern'
+            )
+            JobApplication.objects.create(job=job, candidate=self.other_candidate)
+            application = JobApplication.objects.create(job=job, candidate=self.candidate)
+            application_round = ApplicationRound.objects.create(
+                application=application,
+                round=self.round_type,
+                interviewer=self.interviewer,
+                scheduled_time=timezone.now() + timedelta(days=1),
+                duration=60,
+            )
+            Feedback.objects.create(application_round=application_round, comments='Good', rating=4)
+
+    def count_queries(self, user, url):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def assertConstantQueries(self, user, url_factory):
+        self.seed_jobs(2)
+        small, _ = self.count_queries(user, url_factory())
+        self.seed_jobs(8)
+        large, response = self.count_queries(user, url_factory())
+        self.assertEqual(small, large)
+        return response
+
+    def test_job_list(self):
+        response = self.assertConstantQueries(self.admin, lambda: reverse('job-list-create'))
+        self.assertEqual({job['application_count'] for job in response.data}, {2})
+
+    def test_open_job_list(self):
+        self.assertConstantQueries(self.candidate, lambda: reverse('open-jobs'))
+
+    def test_my_applications(self):
+        response = self.assertConstantQueries(self.candidate, lambda: reverse('my-applications') + '?expand=job,candidate')
+        self.assertEqual({app['job_details']['application_count'] for app in response.data}, {2})
+
+    def test_feedback_list(self):
+        response = self.assertConstantQueries(self.admin, lambda: reverse('feedback-list') + '?expand=application_round.application.job')
+        counts = {
+            feedback['application_round_details']['application_details']['job_details']['application_count']
+            for feedback in response.data['results']
+        }
+        self.assertEqual(counts, {2})
+
+    def test_application_rounds(self):
+        self.seed_jobs(1)
+        application = JobApplication.objects.filter(candidate=self.candidate).first()
+        response = self.count_queries(self.admin, reverse('application-round-detail', args=[application.pk]) + '?expand=application.job')[1]
+        self.assertEqual(response.data['results'][0]['application_details']['job_details']['application_count'], 2)
+
+
+class ExpansionTests(TestCase):
+    """
+    Nested *_details blocks are only serialized (and loaded) when requested
+    with ?expand=, and ?fields= trims the top-level fields.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('admin@ims.com', 'admin')
+        interviewer = create_user('interviewer@ims.com', 'interviewer')
+        job = Job.objects.create(title='Job', description='Build things', department='Engineering', position='intern')
+        application = JobApplication.objects.create(job=job, candidate=create_user('candidate@ims.com', 'candidate'))
+        application_round = ApplicationRound.objects.create(
+            application=application,
+            round=InterviewRound.objects.create(round_type='technical'),
+            interviewer=interviewer,
+            scheduled_time=timezone.now() + timedelta(days=1),
+            duration=60,
+        )
+        Feedback.objects.create(application_round=application_round, comments='Good', rating=4)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get_feedback(self, query=''):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('feedback-list') + query)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results'][0], queries
+
+    def test_details_are_opt_in(self):
+        feedback, queries = self.get_feedback()
+        self.assertEqual(set(feedback), {'id', 'application_round', 'comments', 'rating'})
+        self.assertNotIn('interview_applicationround', ' '.join(query['sql'] for query in queries))
+
+    def test_nested_expansion(self):
+        feedback, _ = self.get_feedback('?expand=application_round.application.candidate,application_round.interviewer')
+        round_details = feedback['application_round_details']
+        self.assertNotIn('round_details', round_details)
+        self.assertEqual(round_details['interviewer_details']['email'], 'interviewer@ims.com')
+        application_details = round_details['application_details']
+        self.assertEqual(application_details['candidate_details']['email'], 'candidate@ims.com')
+        self.assertNotIn('job_details', application_details)
+
+    def test_sparse_fields(self):
+        feedback, _ = self.get_feedback('?fields=id,rating,application_round_details&expand=application_round')
+        self.assertEqual(set(feedback), {'id', 'rating', 'application_round_details'})
+        self.assertNotIn('application_details', feedback['application_round_details'])
+
+    def test_unknown_expansions_are_ignored(self):
+        feedback, _ = self.get_feedback('?expand=nothing.here,application_round.bogus')
+        self.assertEqual(set(feedback['application_round_details']) & {'application_details', 'round_details'}, set())
+
+
+class ValuesFastPathTests(TestCase):
+    """
+    The .values() list path must render exactly what the serializers do.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('admin@ims.com', 'admin')
+        cls.interviewer = create_user('interviewer@ims.com', 'interviewer')
+        round_type = InterviewRound.objects.create(round_type='technical')
+        for i in range(3):
+            job = Job.objects.create(title=f'Job {i}', description='Build things', department='Engineering', position='intern')
+            application = JobApplication.objects.create(job=job, candidate=create_user(f'candidate{i}@ims.com', 'candidate'))
+            application_round = ApplicationRound.objects.create(
+                application=application,
+                round=round_type,
+                interviewer=cls.interviewer,
+                scheduled_time=timezone.now() + timedelta(days=1),
+                duration=60,
+            )
+            Feedback.objects.create(application_round=application_round, comments=f'Feedback {i}', rating=i + 1)
+
+    def get_both(self, user, view, url):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as context:
+            fast = client.get(url)
+        fast_queries = list(context.captured_queries)
+        with mock.patch.object(view, 'values_fast_path', False):
+            slow = client.get(url)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+        return fast, fast_queries
+
+    def test_feedback_list_parity(self):
+        expand = 'application_round.application.job,application_round.application.candidate,application_round.interviewer,application_round.round'
+        for query in ('', f'?expand={expand}', '?fields=id,rating&page_size=2', '?expand=application_round&ordering=created_at'):
+            for user in (self.admin, self.interviewer):
+                self.get_both(user, FeedbackListView, reverse('feedback-list') + query)
+
+    def test_application_list_parity(self):
+        for query in ('', '?expand=job,candidate', '?ordering=status&page_size=2', '?fields=id,status,job_details&expand=job'):
+            self.get_both(self.admin, JobApplicationListView, reverse('applications-list') + query)
+
+    def test_nested_job_counts_need_no_prefetch(self):
+        response, queries = self.get_both(self.admin, JobApplicationListView, reverse('applications-list') + '?expand=job')
+        self.assertEqual(len(queries), 1)
+        self.assertEqual({row['job_details']['application_count'] for row in response.data['results']}, {1})
+
+
+class ORJSONTests(TestCase):
+
+    def test_renders_like_json_renderer(self):
+        data = {
+            'average_rating': Decimal('4.5'),
+            'created_at': datetime(2024, 5, 1, 9, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            'date': date(2024, 5, 1),
+            'label': gettext_lazy('Closed'),
+            'text': 'caf\u00e9 \u2028',
+            'nested': [{'id': 1, 'score': 2.5, 'missing': None}],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+
+    def test_parses_request_bodies(self):
+        parsed = ORJSONParser().parse(BytesIO('{"comments": "tr\u00e8s bien", "rating": 4}'.encode()))
+        self.assertEqual(parsed, {'comments': 'tr\u00e8s bien', 'rating': 4})
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"rating": '))
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('admin@ims.com', 'admin')
+        for i in range(20):
+            Job.objects.create(title=f'Job {i}', description='Build things ' * 10, department='Engineering', position='intern')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, accept_encoding, url=None):
+        return self.client.get(url or reverse('job-list-create'), HTTP_ACCEPT_ENCODING=accept_encoding)
+
+    def test_gzip(self):
+        plain = self.get('')
+        response = self.get('gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    @skipUnless(brotli, 'brotli is not installed')
+    def test_brotli_is_preferred(self):
+        plain = self.get('')
+        response = self.get('gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+        self.assertEqual(self.get('gzip, br;q=0')['Content-Encoding'], 'gzip')
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.get('gzip, br', reverse('job-detail', args=[Job.objects.first().pk]))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('admin@ims.com', 'admin')
+        job = Job.objects.create(title='Job', description='Build things', department='Engineering', position='intern')
+        for i in range(7):
+            JobApplication.objects.create(job=job, candidate=create_user(f'candidate{i}@ims.com', 'candidate'))
+        # Force ties on the ordering field so the id tiebreaker matters.
+        tied = timezone.now()
+        JobApplication.objects.filter(pk__in=JobApplication.objects.order_by('pk').values('pk')[:4]).update(applied_on=tied)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def walk(self, url, link='next'):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data[link]
+        return ids
+
+    def test_pages_follow_ordering_without_gaps_or_duplicates(self):
+        expected = list(JobApplication.objects.order_by('-applied_on', '-id').values_list('id', flat=True))
+        self.assertEqual(self.walk(reverse('applications-list') + '?page_size=2'), expected)
+
+    def test_ordering_filter_sets_the_key(self):
+        expected = list(JobApplication.objects.order_by('applied_on', 'id').values_list('id', flat=True))
+        self.assertEqual(self.walk(reverse('applications-list') + '?page_size=3&ordering=applied_on'), expected)
+
+    def test_previous_links_walk_back(self):
+        url = reverse('applications-list') + '?page_size=2'
+        while True:
+            response = self.client.get(url)
+            if not response.data['next']:
+                break
+            url = response.data['next']
+        back = [item['id'] for item in response.data['results']] + self.walk(response.data['previous'], 'previous')
+        expected = list(JobApplication.objects.order_by('-applied_on', '-id').values_list('id', flat=True))
+        self.assertEqual(sorted(back), sorted(expected))
+        self.assertEqual(len(back), len(expected))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('applications-list') + '?cursor=bogus')
+        self.assertEqual(response.status_code, 404)
+
+
+class AsyncViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.interviewer = create_user('interviewer@ims.com', 'interviewer')
+        cls.candidate = create_user('candidate@ims.com', 'candidate')
+        job = Job.objects.create(title='Job', description='Build things', department='Engineering', position='intern')
+        application = JobApplication.objects.create(job=job, candidate=cls.candidate)
+        round_type = InterviewRound.objects.create(round_type='technical')
+        for days in range(1, 6):
+            ApplicationRound.objects.create(
+                application=application,
+                round=round_type,
+                interviewer=cls.interviewer,
+                scheduled_time=timezone.now() + timedelta(days=days),
+                duration=60,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def headers(self, user):
+        token = RoleTokenObtainPairSerializer.get_token(user).access_token
+        return {'Authorization': f'Bearer {token}'}
+
+    def test_hot_read_views_are_async(self):
+        for view in (OpenJobsListView, MyApplicationsListView, MyInterviewsView, UpcomingInterviewsView):
+            with self.subTest(view=view.__name__):
+                self.assertTrue(view.view_is_async)
+
+    async def test_pages_are_loaded_asynchronously(self):
+        url, ids = reverse('upcoming-interviews') + '?page_size=2', []
+        while url:
+            response = await self.async_client.get(url, headers=self.headers(self.interviewer))
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.json()['results'])
+            url = response.json()['next']
+        expected = [pk async for pk in ApplicationRound.objects.order_by('scheduled_time', 'id').values_list('id', flat=True)]
+        self.assertEqual(ids, expected)
+
+    async def test_permissions_and_expansions(self):
+        response = await self.async_client.get(reverse('my-interviews'), headers=self.headers(self.candidate))
+        self.assertEqual(response.status_code, 403)
+
+        url = reverse('my-applications') + '?expand=job,candidate'
+        response = await self.async_client.get(url, headers=self.headers(self.candidate))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['job_details']['application_count'], 1)
+        response = await self.async_client.get(url, headers={**self.headers(self.candidate), 'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+        response = await self.async_client.get(reverse('open-jobs'), headers=self.headers(self.candidate))
+        self.assertEqual([job['title'] for job in response.json()], ['Job'])
+
+
+class JobStatisticsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('admin@ims.com', 'admin')
+        cls.interviewer = create_user('interviewer@ims.com', 'interviewer')
+        cls.job = Job.objects.create(title='Job', description='Build things', department='Engineering', position='intern')
+        Job.objects.create(title='Empty job', description='Nobody applied', department='Engineering', position='intern')
+        round_type = InterviewRound.objects.create(round_type='technical')
+        cls.applications = [
+            JobApplication.objects.create(job=cls.job, candidate=create_user(f'candidate{i}@ims.com', 'candidate'))
+            for i in range(3)
+        ]
+        for rating in (4, 5):
+            application_round = ApplicationRound.objects.create(
+                application=cls.applications[0],
+                round=round_type,
+                interviewer=cls.interviewer,
+                scheduled_time=timezone.now() + timedelta(days=1),
+                duration=60,
+            )
+            Feedback.objects.create(application_round=application_round, comments='Good', rating=rating)
+        cls.applications[1].status = 'inprogress'
+        cls.applications[1].save()
+        cls.applications[2].delete()
+
+    def get_statistics(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get(reverse('application-statistics'))
+        self.assertEqual(response.status_code, 200)
+        return {row['job_title']: row for row in response.data}
+
+    def test_counts_are_not_multiplied_by_rounds(self):
+        row = self.get_statistics()['Job']
+        self.assertEqual(row['total_applications'], 2)
+        self.assertEqual(row['new_applications'], 1)
+        self.assertEqual(row['in_progress_applications'], 1)
+        self.assertEqual(str(row['average_rating']), '4.5')
+
+    def test_jobs_without_applications_are_listed(self):
+        self.assertEqual(self.get_statistics()['Empty job']['total_applications'], 0)
+
+    def test_rebuild_matches_trigger_maintained_rows(self):
+        from interview.db_procedures import rebuild_job_statistics
+
+        before = self.get_statistics()
+        rebuild_job_statistics()
+        self.assertEqual(self.get_statistics(), before)
+
+    def test_reassignments_move_the_counts(self):
+        from interview.db_procedures import rebuild_job_statistics
+
+        empty_job = Job.objects.get(title='Empty job')
+        self.applications[0].job = empty_job
+        self.applications[0].save()
+        statistics = self.get_statistics()
+        self.assertEqual((statistics['Job']['total_applications'], str(statistics['Job']['average_rating'])), (1, '0.0'))
+        self.assertEqual((statistics['Empty job']['total_applications'], str(statistics['Empty job']['average_rating'])), (1, '4.5'))
+
+        # One round (rated 5) moves back to an application of the first job
+        ApplicationRound.objects.filter(feedbacks__rating=5).update(application=self.applications[1])
+        statistics = self.get_statistics()
+        self.assertEqual(str(statistics['Job']['average_rating']), '5.0')
+        self.assertEqual(str(statistics['Empty job']['average_rating']), '4.0')
+
+        rebuild_job_statistics()
+        self.assertEqual(self.get_statistics(), statistics)
+
+
+class JobListCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('admin@ims.com', 'admin')
+        cls.candidate = create_user('candidate@ims.com', 'candidate')
+        cls.job = Job.objects.create(title='Job', description='Build things', department='Engineering', position='intern')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.candidate)
+
+    def test_repeated_requests_hit_the_cache(self):
+        self.client.get(reverse('open-jobs'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('open-jobs'))
+        self.assertEqual(response.data[0]['title'], 'Job')
+        self.assertEqual(get_job_list_cache_stats()['hits'], 1)
+        self.assertEqual(get_job_list_cache_stats()['misses'], 1)
+
+    def test_cache_hits_answer_conditional_requests_without_queries(self):
+        self.client.force_authenticate(self.admin)
+        etag = self.client.get(reverse('job-list-create'))['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('job-list-create'))
+            self.assertEqual(response['ETag'], etag)
+            response = self.client.get(reverse('job-list-create'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_query_parameters_are_part_of_the_key(self):
+        self.client.get(reverse('open-jobs'))
+        self.client.get(reverse('open-jobs') + '?ordering=created_at')
+        self.assertEqual(get_job_list_cache_stats()['misses'], 2)
+
+    def test_job_changes_invalidate(self):
+        self.client.get(reverse('open-jobs'))
+        self.job.title = 'Renamed'
+        self.job.save()
+        self.assertEqual(self.client.get(reverse('open-jobs')).data[0]['title'], 'Renamed')
+
+    def test_applications_invalidate(self):
+        self.client.get(reverse('open-jobs'))
+        application = JobApplication.objects.create(job=self.job, candidate=self.candidate)
+        self.assertEqual(self.client.get(reverse('open-jobs')).data[0]['application_count'], 1)
+        application.delete()
+        self.assertEqual(self.client.get(reverse('open-jobs')).data[0]['application_count'], 0)
+
+    def test_stats_are_admin_only(self):
+        self.assertEqual(self.client.get(reverse('job-list-cache-stats')).status_code, 403)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get(reverse('job-list-cache-stats')).status_code, 200)
+
+
+class JobSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.interviewer = create_user('interviewer@ims.com', 'interviewer')
+        Job.objects.create(title='Office manager', description='Run the office for our developers', department='Operations', position='manager')
+        Job.objects.create(title='Backend developer', description='Build the APIs', department='Engineering', position='software_engineer')
+        Job.objects.create(title='Designer', description='Design things', department='Product', position='intern')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.interviewer)
+
+    def search(self, term, **params):
+        response = self.client.get(reverse('job-list-create'), {'search': term, **params})
+        self.assertEqual(response.status_code, 200)
+        return [job['title'] for job in response.data]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search('developer'), ['Backend developer', 'Office manager'])
+
+    def test_last_term_matches_as_a_prefix(self):
+        self.assertEqual(self.search('backend devel'), ['Backend developer'])
+        self.assertEqual(self.search('desig'), ['Designer'])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.search('developer operations'), ['Office manager'])
+        self.assertEqual(self.search('developer nursing'), [])
+
+    def test_tsquery_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search("engineering & !(build) | ' :"), ['Backend developer'])
+        self.assertEqual(len(self.search('!&|')), 3)
+
+    def test_explicit_ordering_wins(self):
+        self.assertEqual(self.search('developer', ordering='created_at'), ['Office manager', 'Backend developer'])
+
+    def test_vector_follows_updates(self):
+        Job.objects.filter(title='Designer').update(title='Frontend developer', description='Build the UI')
+        self.assertEqual(self.search('frontend'), ['Frontend developer'])
+        self.assertEqual(self.search('designer'), [])
+
+
+class ConditionalGetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('admin@ims.com', 'admin')
+        cls.interviewer = create_user('interviewer@ims.com', 'interviewer')
+        cls.candidate = create_user('candidate@ims.com', 'candidate')
+        cls.job = Job.objects.create(title='Job', description='Build things', department='Engineering', position='intern')
+        cls.application = JobApplication.objects.create(job=cls.job, candidate=cls.candidate)
+        ApplicationRound.objects.create(
+            application=cls.application,
+            round=InterviewRound.objects.create(round_type='technical'),
+            interviewer=cls.interviewer,
+            scheduled_time=timezone.now() + timedelta(days=1),
+            duration=60,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, user, url, **headers):
+        self.client.force_authenticate(user)
+        return self.client.get(url, **headers)
+
+    def test_unchanged_lists_are_not_modified(self):
+        # The job list is covered by JobListCacheTests (no query at all)
+        for user, url in [
+            (self.candidate, reverse('my-applications')),
+            (self.interviewer, reverse('my-interviews')),
+            (self.admin, reverse('application-statistics')),
+            (self.admin, reverse('job-detail', args=[self.job.pk])),
+            (self.admin, reverse('application-detail', args=[self.application.pk])),
+        ]:
+            with self.subTest(url=url):
+                response = self.get(user, url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['ETag'].startswith('W/"'))
+                # One aggregate query, nothing is loaded or serialized
+                with self.assertNumQueries(1):
+                    response = self.get(user, url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        response = self.get(self.candidate, reverse('my-applications'))
+        response = self.get(self.candidate, reverse('my-applications'), HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_make_a_new_etag(self):
+        etag = self.get(self.admin, reverse('job-list-create'))['ETag']
+        # Counted through the trigger-maintained statistics row
+        JobApplication.objects.create(job=self.job, candidate=create_user('other@ims.com', 'candidate'))
+        response = self.get(self.admin, reverse('job-list-create'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['application_count'], 2)
+
+        etag = response['ETag']
+        self.job.title = 'Renamed'
+        self.job.save()
+        response = self.get(self.admin, reverse('job-list-create'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_expanded_rows_make_a_new_etag(self):
+        url = reverse('my-interviews') + '?expand=application.job,interviewer'
+        etag = self.get(self.interviewer, url)['ETag']
+        # The nested job's application count, from the statistics row
+        JobApplication.objects.create(job=self.job, candidate=create_user('other@ims.com', 'candidate'))
+        response = self.get(self.interviewer, url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['application_details']['job_details']['application_count'], 2)
+
+        etag = response['ETag']
+        self.interviewer.first_name = 'Renamed'
+        self.interviewer.save()
+        response = self.get(self.interviewer, url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['interviewer_details']['first_name'], 'Renamed')
+
+    def test_statistics_change_with_applications(self):
+        url = reverse('application-statistics') + f'?job_id={self.job.pk}'
+        etag = self.get(self.admin, url)['ETag']
+        self.application.status = 'inprogress'
+        self.application.save()
+        self.assertEqual(self.get(self.admin, url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_depends_on_query(self):
+        etag = self.get(self.admin, reverse('job-list-create'))['ETag']
+        response = self.get(self.admin, reverse('job-list-create') + '?ordering=created_at', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_objects_are_not_answered_with_304(self):
+        response = self.get(self.admin, reverse('job-detail', args=[self.job.pk + 1000]), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+
+
+class DuplicateApplicationTests(TestCase):
+    """
+    Duplicate applications are rejected by the unique (job, candidate)
+    constraint rather than by a lookup before the insert.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.candidate = create_user('candidate@ims.com', 'candidate')
+        cls.job = Job.objects.create(title='Job', description='Build things', department='Engineering', position='intern')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.candidate)
+
+    def apply(self):
+        return self.client.post(
+            reverse('applications-list'), {'job': self.job.pk, 'candidate': self.candidate.pk}, format='json'
+        )
+
+    def test_duplicate_is_rejected(self):
+        self.assertEqual(self.apply().status_code, 201)
+        response = self.apply()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['non_field_errors'], ["Candidate has already applied to this job."])
+        self.assertEqual(JobApplication.objects.filter(job=self.job, candidate=self.candidate).count(), 1)
+
+    def test_no_lookup_before_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.apply().status_code, 201)
+        duplicate_lookups = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and '"interview_jobapplication"."candidate_id"' in query['sql']
+        ]
+        self.assertEqual(duplicate_lookups, [])
+
+    def test_moving_onto_an_existing_pair_is_rejected(self):
+        self.assertEqual(self.apply().status_code, 201)
+        other = JobApplication.objects.create(job=self.job, candidate=create_user('other@ims.com', 'candidate'))
+        self.client.force_authenticate(create_user('admin@ims.com', 'admin'))
+        response = self.client.patch(
+            reverse('application-detail', args=[other.pk]), {'candidate': self.candidate.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['non_field_errors'], ["Candidate has already applied to this job."])
+
+    def test_migration_merges_existing_duplicates(self):
+        migration = import_module('interview.migrations.0006_job_application_unique').Migration
+        round_type = InterviewRound.objects.create(round_type='technical')
+        interviewer = create_user('interviewer@ims.com', 'interviewer')
+        with connection.cursor() as cursor:
+            cursor.execute("ALTER TABLE interview_jobapplication DROP CONSTRAINT unique_job_application")
+        oldest, duplicate = [JobApplication.objects.create(job=self.job, candidate=self.candidate) for _ in range(2)]
+        other = JobApplication.objects.create(job=self.job, candidate=create_user('other@ims.com', 'candidate'))
+        application_round = ApplicationRound.objects.create(
+            application=duplicate, round=round_type, interviewer=interviewer, scheduled_time=timezone.now(), duration=60,
+        )
+        with connection.cursor() as cursor:
+            for sql in migration.merge_duplicate_applications:
+                cursor.execute(sql)
+        self.assertEqual(set(JobApplication.objects.values_list('pk', flat=True)), {oldest.pk, other.pk})
+        application_round.refresh_from_db()
+        self.assertEqual(application_round.application_id, oldest.pk)
+
+
+class SelectCandidateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('admin@ims.com', 'admin')
+        cls.jobs = [
+            Job.objects.create(title=f'Job {i}', description='Build things', department='Engineering', position='intern')
+            for i in range(2)
+        ]
+        cls.applications = {
+            (job.pk, i): JobApplication.objects.create(job=job, candidate=create_user(f'candidate{job.pk}-{i}@ims.com', 'candidate'))
+            for job in cls.jobs for i in range(3)
+        }
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def application(self, job, i):
+        return self.applications[(self.jobs[job].pk, i)]
+
+    def statuses(self, job):
+        return list(JobApplication.objects.filter(job=self.jobs[job]).order_by('pk').values_list('status', 'is_selected'))
+
+    def test_select_closes_the_jobs_other_applications_only(self):
+        response = self.client.put(reverse('select-candidate', args=[self.application(0, 1).pk]), {}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.statuses(0), [('closed', False), ('closed', True), ('closed', False)])
+        self.assertEqual(self.statuses(1), [('new', False)] * 3)
+
+    def test_batch_selects_across_jobs(self):
+        ids = [self.application(0, 0).pk, self.application(1, 2).pk]
+        response = self.client.post(reverse('select-candidates'), {'application_ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(row['id'], row['is_selected'], row['closed_applications']) for row in response.data],
+                         [(ids[0], True, 2), (ids[1], True, 2)])
+        self.assertEqual(self.statuses(0), [('closed', True), ('closed', False), ('closed', False)])
+        self.assertEqual(self.statuses(1), [('closed', False), ('closed', False), ('closed', True)])
+
+    def test_batch_is_all_or_nothing(self):
+        for ids in ([self.application(0, 0).pk, self.application(0, 1).pk],
+                    [self.application(1, 0).pk, self.application(0, 0).pk + 1000]):
+            response = self.client.post(reverse('select-candidates'), {'application_ids': ids}, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('application_ids', response.data)
+        self.assertEqual(self.statuses(0) + self.statuses(1), [('new', False)] * 6)
+
+    def test_batch_is_admin_only(self):
+        self.client.force_authenticate(create_user('interviewer@ims.com', 'interviewer'))
+        response = self.client.post(reverse('select-candidates'), {'application_ids': [self.application(0, 0).pk]}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class StatusHistoryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('admin@ims.com', 'admin')
+        job = Job.objects.create(title='Job', description='Build things', department='Engineering', position='intern')
+        cls.application = JobApplication.objects.create(job=job, candidate=create_user('candidate@ims.com', 'candidate'))
+        cls.other = JobApplication.objects.create(job=job, candidate=create_user('other@ims.com', 'candidate'))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def history(self, application, **params):
+        response = self.client.get(reverse('application-history', args=[application.pk]), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_procedures_record_changes(self):
+        update_application_status(self.application.pk, 'inprogress', 'admin@ims.com')
+        update_application_status(self.application.pk, 'inprogress', 'admin@ims.com')
+        self.client.put(reverse('select-candidate', args=[self.application.pk]), {}, format='json')
+
+        rows = self.history(self.application)['results']
+        self.assertEqual(
+            [(row['old_status'], row['new_status'], row['is_selected'], row['changed_by']) for row in rows],
+            [('inprogress', 'closed', True, 'admin@ims.com'), ('new', 'inprogress', False, 'admin@ims.com')],
+        )
+        [row] = self.history(self.other)['results']
+        self.assertEqual((row['old_status'], row['new_status'], row['is_selected']), ('new', 'closed', False))
+
+    def test_automatic_close_is_recorded(self):
+        application_round = ApplicationRound.objects.create(
+            application=self.application, round=InterviewRound.objects.create(round_type='technical'),
+            interviewer=create_user('interviewer@ims.com', 'interviewer'), scheduled_time=timezone.now(), duration=60,
+        )
+        serializer = FeedbackSerializer(data={'application_round': application_round.pk, 'comments': 'Good', 'rating': 4})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        [row] = self.history(self.application)['results']
+        self.assertEqual((row['old_status'], row['new_status'], row['changed_by']), ('new', 'closed', ''))
+
+    def test_edits_are_recorded(self):
+        response = self.client.patch(
+            reverse('application-detail', args=[self.application.pk]), {'status': 'inprogress'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        [row] = self.history(self.application)['results']
+        self.assertEqual((row['old_status'], row['new_status'], row['changed_by']), ('new', 'inprogress', 'admin@ims.com'))
+
+    def test_history_is_paginated(self):
+        for new_status in ('inprogress', 'new', 'closed'):
+            update_application_status(self.application.pk, new_status, 'admin@ims.com')
+        first = self.history(self.application, page_size=2)
+        self.assertEqual([row['new_status'] for row in first['results']], ['closed', 'new'])
+        response = self.client.get(first['next'])
+        self.assertEqual([row['new_status'] for row in response.data['results']], ['inprogress'])
+
+    def test_only_visible_applications(self):
+        self.client.force_authenticate(create_user('interviewer@ims.com', 'interviewer'))
+        self.assertEqual(self.client.get(reverse('application-history', args=[self.application.pk])).status_code, 404)
+        self.client.force_authenticate(self.application.candidate)
+        self.assertEqual(self.client.get(reverse('application-history', args=[self.application.pk])).status_code, 403)
+
+    def test_rows_land_in_monthly_partitions(self):
+        update_application_status(self.application.pk, 'inprogress', 'admin@ims.com')
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT tableoid::regclass::text FROM interview_applicationstatushistory")
+            self.assertEqual(cursor.fetchone()[0], 'interview_applicationstatushistory_p' + timezone.now().strftime('%Y%m'))
+
+    def test_old_partitions_can_be_detached(self):
+        ApplicationStatusHistory.objects.create(
+            application=self.application, new_status='closed', changed_by='admin@ims.com',
+            changed_at=datetime(2020, 1, 15, tzinfo=dt_timezone.utc),
+        )
+        with connection.cursor() as cursor:
+            # Moves the row out of the default partition
+            cursor.execute("SELECT create_application_status_history_partition('2020-01-01')")
+        self.assertEqual(detach_status_history_partitions(date(2020, 2, 1)), ['interview_applicationstatushistory_p202001'])
+        self.assertFalse(ApplicationStatusHistory.objects.exists())
+        out = StringIO()
+        call_command('manage_status_history_partitions', keep_months=0, stdout=out)
+        self.assertIn('0 partition(s) detached', out.getvalue())
+
+
+class BulkStatusUpdateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('admin@ims.com', 'admin')
+        job = Job.objects.create(title='Job', description='Build things', department='Engineering', position='intern')
+        cls.applications = [
+            JobApplication.objects.create(job=job, candidate=create_user(f'candidate{i}@ims.com', 'candidate'))
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def patch(self, changes):
+        return self.client.patch(reverse('application-status-update'), {'changes': changes}, format='json')
+
+    def test_one_statement_with_per_row_outcomes(self):
+        first, second, third = self.applications
+        changes = [
+            {'id': third.pk, 'status': 'inprogress'},
+            {'id': first.pk, 'status': 'new'},
+            {'id': third.pk + 1000, 'status': 'closed'},
+            {'id': second.pk, 'status': 'closed'},
+        ]
+        with self.assertNumQueries(1):
+            response = self.patch(changes)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [
+            {'id': third.pk, 'old_status': 'new', 'status': 'inprogress', 'outcome': 'updated'},
+            {'id': first.pk, 'old_status': 'new', 'status': 'new', 'outcome': 'unchanged'},
+            {'id': third.pk + 1000, 'old_status': None, 'status': 'closed', 'outcome': 'not_found'},
+            {'id': second.pk, 'old_status': 'new', 'status': 'closed', 'outcome': 'updated'},
+        ])
+        self.assertEqual(
+            list(JobApplication.objects.order_by('pk').values_list('status', flat=True)), ['new', 'closed', 'inprogress']
+        )
+        self.assertEqual(
+            sorted(ApplicationStatusHistory.objects.values_list('application_id', 'old_status', 'new_status', 'changed_by')),
+            [(second.pk, 'new', 'closed', 'admin@ims.com'), (third.pk, 'new', 'inprogress', 'admin@ims.com')],
+        )
+
+    def test_invalid_changes_are_rejected(self):
+        application = self.applications[0]
+        for changes in ([], [{'id': application.pk, 'status': 'hired'}],
+                        [{'id': application.pk, 'status': 'closed'}, {'id': application.pk, 'status': 'new'}]):
+            self.assertEqual(self.patch(changes).status_code, 400)
+        self.assertEqual(JobApplication.objects.get(pk=application.pk).status, 'new')
+
+    def test_admin_only(self):
+        self.client.force_authenticate(create_user('interviewer@ims.com', 'interviewer'))
+        self.assertEqual(self.patch([{'id': self.applications[0].pk, 'status': 'closed'}]).status_code, 403)
+
+
+class BulkStatusUpdateLockTests(TransactionTestCase):
+
+    def test_jobs_are_locked_before_the_applications_change(self):
+        # Concurrent calls then take the job statistics rows in job order
+        job = Job.objects.create(title='Job', description='Build things', department='Engineering', position='intern')
+        application = JobApplication.objects.create(job=job, candidate=create_user('candidate@ims.com', 'candidate'))
+        other = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            with transaction.atomic():
+                update_application_statuses([(application.pk, 'inprogress')], 'admin@ims.com')
+                with other.cursor() as cursor, self.assertRaises(OperationalError):
+                    cursor.execute("SELECT 1 FROM interview_job WHERE id = %s FOR NO KEY UPDATE NOWAIT", [job.pk])
+        finally:
+            other.close()
+
+
+class HiringRollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('admin@ims.com', 'admin')
+        cls.interviewer = create_user('interviewer@ims.com', 'interviewer')
+        cls.engineering = Job.objects.create(title='Engineer', description='Build things', department='Engineering', position='intern')
+        cls.product = Job.objects.create(title='Designer', description='Design things', department='Product', position='intern')
+        cls.today = timezone.now().date()
+        cls.yesterday = cls.today - timedelta(days=1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def apply(self, job, day=None):
+        application = JobApplication.objects.create(job=job, candidate=create_user(f'c{User.objects.count()}@ims.com', 'candidate'))
+        if day is not None:
+            moment = datetime.combine(day, datetime.min.time(), tzinfo=dt_timezone.utc) + timedelta(hours=12)
+            JobApplication.objects.filter(pk=application.pk).update(applied_on=moment, updated_at=moment)
+        return application
+
+    def rollups(self):
+        return {
+            (rollup.day, rollup.job_id): (rollup.applications, rollup.moved_to_inprogress, rollup.closed,
+                                          rollup.selected, rollup.feedback_count, rollup.rating_sum)
+            for rollup in DailyHiringRollup.objects.all()
+        }
+
+    def test_refresh_rolls_up_each_day(self):
+        old = self.apply(self.engineering, self.yesterday)
+        new = self.apply(self.engineering)
+        self.apply(self.product)
+        update_application_statuses([(old.pk, 'inprogress'), (new.pk, 'closed')], 'admin@ims.com')
+        round_type = InterviewRound.objects.create(round_type='technical')
+        application_round = ApplicationRound.objects.create(
+            application=old, round=round_type, interviewer=self.interviewer, scheduled_time=timezone.now(), duration=60
+        )
+        Feedback.objects.create(application_round=application_round, comments='Good', rating=4)
+
+        self.assertEqual(refresh_hiring_rollups(), 2)
+        self.assertEqual(self.rollups(), {
+            (self.yesterday, self.engineering.pk): (1, 0, 0, 0, 0, 0),
+            (self.today, self.engineering.pk): (1, 1, 1, 0, 1, 4),
+            (self.today, self.product.pk): (1, 0, 0, 0, 0, 0),
+        })
+
+    def test_refresh_is_incremental(self):
+        self.apply(self.engineering)
+        refresh_hiring_rollups()
+        self.assertEqual(refresh_hiring_rollups(), 1)  # Only the overlap with the last refresh
+        self.apply(self.engineering)
+        refresh_hiring_rollups()
+        self.assertEqual(self.rollups()[(self.today, self.engineering.pk)][0], 2)
+
+        # Rows changed before the watermark are left to a full refresh
+        self.apply(self.product, self.today - timedelta(days=10))
+        refresh_hiring_rollups()
+        self.assertNotIn((self.today - timedelta(days=10), self.product.pk), self.rollups())
+        refresh_hiring_rollups(full=True)
+        self.assertEqual(self.rollups()[(self.today - timedelta(days=10), self.product.pk)][0], 1)
+
+    def test_full_refresh_keeps_status_counts_of_detached_months(self):
+        day = date(2020, 1, 15)
+        application = self.apply(self.engineering, day)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT create_application_status_history_partition('2020-01-01')")
+        ApplicationStatusHistory.objects.create(
+            application=application, old_status='new', new_status='closed', changed_by='admin@ims.com',
+            changed_at=datetime(2020, 1, 15, 12, tzinfo=dt_timezone.utc),
+        )
+        refresh_hiring_rollups(full=True)
+        self.assertEqual(self.rollups()[(day, self.engineering.pk)], (1, 0, 1, 0, 0, 0))
+
+        detach_status_history_partitions(date(2020, 2, 1))
+        self.apply(self.engineering, day)
+        refresh_hiring_rollups(full=True)
+        self.assertEqual(self.rollups()[(day, self.engineering.pk)], (2, 0, 1, 0, 0, 0))
+
+    def test_endpoint_reads_only_rollups(self):
+        for job, day in ((self.engineering, self.yesterday), (self.engineering, self.today), (self.product, self.today)):
+            self.apply(job, day)
+        refresh_hiring_rollups()
+        url = reverse('application-daily-statistics')
+        params = {'start': self.yesterday, 'end': self.today}
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual([query['sql'].count('interview_dailyhiringrollup') > 0 for query in context.captured_queries], [True])
+        self.assertNotIn('interview_jobapplication', context.captured_queries[0]['sql'])
+        self.assertEqual([(row['day'], row['applications']) for row in response.data], [(self.yesterday, 1), (self.today, 2)])
+
+        response = self.client.get(url, {**params, 'group_by': 'department'})
+        self.assertEqual([(row['department'], row['applications']) for row in response.data], [('Engineering', 2), ('Product', 1)])
+        response = self.client.get(url, {**params, 'group_by': 'job', 'department': 'Engineering', 'start': self.today})
+        self.assertEqual([(row['job_id'], row['applications']) for row in response.data], [(self.engineering.pk, 1)])
+
+    def test_endpoint_validates_the_range(self):
+        url = reverse('application-daily-statistics')
+        for params in ({}, {'start': self.today, 'end': self.yesterday},
+                       {'start': self.today - timedelta(days=400), 'end': self.today},
+                       {'start': self.today, 'end': self.today, 'group_by': 'week'}):
+            self.assertEqual(self.client.get(url, params).status_code, 400)
+        self.client.force_authenticate(self.interviewer)
+        self.assertEqual(self.client.get(url, {'start': self.today, 'end': self.today}).status_code, 403)
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('admin@ims.com', 'admin')
+        cls.interviewer = create_user('interviewer@ims.com', 'interviewer')
+        other_interviewer = create_user('other-interviewer@ims.com', 'interviewer')
+        round_type = InterviewRound.objects.create(round_type='technical')
+        job = Job.objects.create(title='Job', description='Build things', department='Engineering', position='intern')
+        cls.applications = [
+            JobApplication.objects.create(job=job, candidate=create_user(f'candidate{i}@ims.com', 'candidate'))
+            for i in range(3)
+        ]
+        cls.feedback = []
+        for application, interviewer in zip(cls.applications, (cls.interviewer, other_interviewer, cls.interviewer)):
+            application_round = ApplicationRound.objects.create(
+                application=application, round=round_type, interviewer=interviewer,
+                scheduled_time=timezone.now(), duration=60,
+            )
+            cls.feedback.append(Feedback.objects.create(application_round=application_round, comments='Good, "solid"', rating=4))
+        JobApplication.objects.filter(pk=cls.applications[1].pk).update(status='closed')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def export(self, user, name, query=''):
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse(name) + query)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_applications_csv(self):
+        response, content = self.export(self.admin, 'applications-export', '?status=new')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="applications.csv"')
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual([int(row['id']) for row in rows], [self.applications[0].pk, self.applications[2].pk])
+        self.assertEqual(rows[0]['candidate_email'], 'candidate0@ims.com')
+        self.assertEqual((rows[0]['job_title'], rows[0]['status'], rows[0]['is_selected']), ('Job', 'new', 'False'))
+
+    def test_feedback_ndjson_is_scoped_like_the_list(self):
+        response, content = self.export(self.interviewer, 'feedback-export', '?format=ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="feedback.ndjson"')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.feedback[0].pk, self.feedback[2].pk])
+        self.assertEqual(rows[0]['comments'], 'Good, "solid"')
+        self.assertEqual(rows[0]['application'], self.applications[0].pk)
+        self.assertTrue(rows[0]['created_at'].endswith('Z'))
+
+    def test_candidates_are_refused(self):
+        self.client.force_authenticate(User.objects.get(email='candidate0@ims.com'))
+        response = self.client.get(reverse('feedback-export'), HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('detail', json.loads(response.content))
+
+    def test_rows_are_streamed_in_batches(self):
+        with mock.patch.object(JobApplicationExportView, 'export_chunk_size', 2):
+            self.client.force_authenticate(self.admin)
+            response = self.client.get(reverse('applications-export'))
+            chunks = list(response.streaming_content)
+        # The header, then two batches
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [1, 2, 1])
+
+    async def test_rows_are_streamed_in_batches_under_asgi(self):
+        token = RoleTokenObtainPairSerializer.get_token(self.admin).access_token
+        with mock.patch.object(JobApplicationExportView, 'export_chunk_size', 2):
+            response = await self.async_client.get(
+                reverse('applications-export'), headers={'Authorization': f'Bearer {token}'}
+            )
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [1, 2, 1])
+
+    @override_settings(EXPORT_MAX_SECONDS=-1)
+    def test_exports_are_cut_off_after_the_time_limit(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(reverse('applications-export'))
+        with self.assertRaises(TimeoutError):
+            list(response.streaming_content)
+
+
+class ThrottlingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.candidate = create_user('candidate@ims.com', 'candidate')
+        cls.jobs = [
+            Job.objects.create(title=f'Job {i}', description='Build things', department='Engineering', position='intern')
+            for i in range(11)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.candidate)
+
+    def apply(self, job):
+        return self.client.post(reverse('applications-list'), {'job': job.pk, 'candidate': self.candidate.pk}, format='json')
+
+    def test_reports_the_limit_that_was_hit(self):
+        for job in self.jobs[:10]:
+            self.assertEqual(self.apply(job).status_code, 201)
+        response = self.apply(self.jobs[10])
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('daily limit for job applications', response.data['detail'])
+        self.assertGreater(response.data['wait'], 23 * 60 * 60)
+
+    def test_redis_script_decides_and_reports_the_wait(self):
+        script = mock.Mock(return_value=[0, '12.5'])
+        with mock.patch.object(throttling, 'get_sliding_window_script', return_value=script):
+            response = self.client.get(reverse('open-jobs'))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.data['wait'], 13)
+        self.assertEqual(response.data['detail'], 'Too many requests. Please try again in 13 seconds.')
+        self.assertEqual(script.call_args.kwargs['args'][:2], [100, 3600])
+
+    def test_falls_back_to_the_cache_when_redis_is_down(self):
+        script = mock.Mock(side_effect=throttling.redis.ConnectionError)
+        with mock.patch.object(throttling, 'get_sliding_window_script', return_value=script):
+            self.assertEqual(self.apply(self.jobs[0]).status_code, 201)
+
+    @skipUnless(settings.THROTTLE_REDIS_URL, 'THROTTLE_REDIS_URL is not set')
+    def test_workers_share_the_request_log(self):
+        throttling.get_sliding_window_script.cache_clear()
+        script = throttling.get_sliding_window_script()
+        script.registered_client.delete(f'throttle_user_{self.candidate.pk}')
+        # Each request builds new throttle instances, as separate workers would
+        for job in self.jobs[:10]:
+            self.assertEqual(self.apply(job).status_code, 201)
+        self.assertEqual(self.apply(self.jobs[10]).status_code, 429)
+
+
+class ApplicationCountersTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.interviewer = create_user('interviewer@ims.com', 'interviewer')
+        cls.round_type = InterviewRound.objects.create(round_type='technical')
+        job = Job.objects.create(title='Job', description='Build things', department='Engineering', position='intern')
+        cls.application = JobApplication.objects.create(job=job, candidate=create_user('candidate@ims.com', 'candidate'))
+
+    def create_round(self):
+        return ApplicationRound.objects.create(
+            application=self.application,
+            round=self.round_type,
+            interviewer=self.interviewer,
+            scheduled_time=timezone.now() + timedelta(days=1),
+            duration=60,
+        )
+
+    def give_feedback(self, application_round):
+        serializer = FeedbackSerializer(data={'application_round': application_round.pk, 'comments': 'Good', 'rating': 4})
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def assertCounters(self, rounds_count, feedback_count):
+        self.application.refresh_from_db()
+        self.assertEqual((self.application.rounds_count, self.application.feedback_count), (rounds_count, feedback_count))
+
+    def test_counters_follow_creates_and_deletes(self):
+        first, second = self.create_round(), self.create_round()
+        feedback = self.give_feedback(first)
+        self.assertCounters(2, 1)
+        feedback.delete()
+        self.assertCounters(2, 0)
+        self.give_feedback(second)
+        second.delete()
+        self.assertCounters(1, 0)
+
+    def test_closes_once_every_round_has_feedback(self):
+        first, second = self.create_round(), self.create_round()
+        self.give_feedback(first)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'new')
+        self.give_feedback(second)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'closed')
+
+    def test_reconcile_repairs_drift(self):
+        self.give_feedback(self.create_round())
+        JobApplication.objects.filter(pk=self.application.pk).update(rounds_count=7, feedback_count=0)
+        out = StringIO()
+        call_command('reconcile_application_counters', stdout=out)
+        self.assertIn('Repaired counters on 1 application(s).', out.getvalue())
+        self.assertCounters(1, 1)
+        self.assertEqual(JobApplication.objects.reconcile_counters(), 0)
+
+    def test_reconcile_only_touches_the_queryset(self):
+        other_job = Job.objects.create(title='Other', description='Build things', department='Engineering', position='intern')
+        other = JobApplication.objects.create(job=other_job, candidate=create_user('other@ims.com', 'candidate'))
+        JobApplication.objects.update(rounds_count=3)
+        self.assertEqual(JobApplication.objects.filter(job=self.application.job).reconcile_counters(), 1)
+        self.assertCounters(0, 0)
+        other.refresh_from_db()
+        self.assertEqual(other.rounds_count, 3)
+
+
+class VisibilityTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('admin@ims.com', 'admin')
+        cls.interviewer = create_user('interviewer@ims.com', 'interviewer')
+        cls.other_interviewer = create_user('other-interviewer@ims.com', 'interviewer')
+        cls.candidate = create_user('candidate@ims.com', 'candidate')
+        round_type = InterviewRound.objects.create(round_type='technical')
+        job = Job.objects.create(title='Job', description='Build things', department='Engineering', position='intern')
+        cls.own = JobApplication.objects.create(job=job, candidate=cls.candidate)
+        cls.other = JobApplication.objects.create(job=job, candidate=create_user('other@ims.com', 'candidate'))
+        # Two rounds on the same application must not duplicate it
+        for interviewer in (cls.interviewer, cls.interviewer, cls.other_interviewer):
+            ApplicationRound.objects.create(
+                application=cls.own, round=round_type, interviewer=interviewer,
+                scheduled_time=timezone.now() + timedelta(days=1), duration=60,
+            )
+
+    def test_applications(self):
+        self.assertEqual(list(JobApplication.objects.visible_to(self.interviewer)), [self.own])
+        self.assertEqual(list(JobApplication.objects.visible_to(self.candidate)), [self.own])
+        self.assertEqual(JobApplication.objects.visible_to(self.admin).count(), 2)
+
+    def test_rounds(self):
+        self.assertEqual(ApplicationRound.objects.visible_to(self.interviewer).count(), 2)
+        self.assertEqual(ApplicationRound.objects.visible_to(self.other_interviewer).count(), 1)
+        self.assertEqual(ApplicationRound.objects.visible_to(self.candidate).count(), 3)
+
+    def test_feedback_follows_its_round(self):
+        rounds = list(ApplicationRound.objects.order_by('id'))
+        Feedback.objects.bulk_create([Feedback(application_round=application_round, comments='Good', rating=3) for application_round in rounds])
+        self.assertEqual(Feedback.objects.visible_to(self.interviewer).count(), 2)
+        self.assertEqual(Feedback.objects.visible_to(self.other_interviewer).count(), 1)
+        rounds[0].interviewer = self.other_interviewer
+        rounds[0].save()
+        self.assertEqual(Feedback.objects.visible_to(self.interviewer).count(), 1)
+        self.assertEqual(Feedback.objects.visible_to(self.other_interviewer).count(), 2)
+
+    def test_unknown_role_sees_nothing(self):
+        self.candidate.role = 'guest'
+        self.assertFalse(JobApplication.objects.visible_to(self.candidate).exists())
+
+
+class FlakyEmailBackend(locmem.EmailBackend):
+    """
+    Locmem backend that drops the connection on the first message it is
+    asked to send, and counts how many connections were opened.
+    """
+    opened = 0
+    failures_left = 0
+
+    def open(self):
+        FlakyEmailBackend.opened += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        if FlakyEmailBackend.failures_left:
+            FlakyEmailBackend.failures_left -= 1
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='interview.tests.FlakyEmailBackend')
+class FeedbackNotificationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            create_user(f'admin{i}@ims.com', 'admin')
+        interviewer = create_user('interviewer@ims.com', 'interviewer')
+        candidate = create_user('candidate@ims.com', 'candidate')
+        job = Job.objects.create(title='Job', description='Build things', department='Engineering', position='intern')
+        application_round = ApplicationRound.objects.create(
+            application=JobApplication.objects.create(job=job, candidate=candidate),
+            round=InterviewRound.objects.create(round_type='technical'),
+            interviewer=interviewer,
+            scheduled_time=timezone.now() + timedelta(days=1),
+            duration=60,
+        )
+        cls.feedback = Feedback.objects.create(application_round=application_round, comments='Good', rating=4)
+
+    def setUp(self):
+        FlakyEmailBackend.opened = 0
+        FlakyEmailBackend.failures_left = 0
+
+    def test_all_emails_share_one_connection(self):
+        send_feedback_notification(self.feedback.id)
+        self.assertEqual(len(mail.outbox), 6)
+        self.assertEqual(FlakyEmailBackend.opened, 1)
+
+    @mock.patch('interview.email_utils.time.sleep')
+    def test_transient_errors_are_retried_without_duplicates(self, sleep):
+        FlakyEmailBackend.failures_left = 2
+        send_feedback_notification(self.feedback.id)
+        self.assertEqual(len(mail.outbox), 6)
+        self.assertEqual(len({message.to[0] for message in mail.outbox}), 6)
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [1, 2])
+
+    @mock.patch('interview.email_utils.time.sleep')
+    def test_persistent_errors_are_raised(self, sleep):
+        FlakyEmailBackend.failures_left = 10
+        with self.assertRaises(smtplib.SMTPServerDisconnected):
+            send_feedback_notification(self.feedback.id)
+
+
+class InterviewReminderTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.interviewers = [create_user(f'interviewer{i}@ims.com', 'interviewer') for i in range(2)]
+        job = Job.objects.create(title='Job', description='Build things', department='Engineering', position='intern')
+        round_type = InterviewRound.objects.create(round_type='technical')
+        cls.rounds = []
+        for i, hours in enumerate([2, 5, 10, 48]):
+            cls.rounds.append(ApplicationRound.objects.create(
+                application=JobApplication.objects.create(job=job, candidate=create_user(f'candidate{i}@ims.com', 'candidate')),
+                round=round_type,
+                interviewer=cls.interviewers[i % 2],
+                scheduled_time=timezone.now() + timedelta(hours=hours),
+                duration=60,
+            ))
+
+    def setUp(self):
+        # Run the subtask group in-process
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', False)
+
+    def test_one_email_per_interviewer(self):
+        send_interview_reminders()
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['interviewer0@ims.com', 'interviewer1@ims.com'])
+        body = next(message.body for message in mail.outbox if message.to == ['interviewer0@ims.com'])
+        self.assertIn('Candidate: candidate0 Test', body)
+        self.assertIn('Candidate: candidate2 Test', body)
+        self.assertNotIn('candidate3', ''.join(message.body for message in mail.outbox))
+
+    def test_reruns_do_not_send_duplicates(self):
+        send_interview_reminders()
+        send_interview_reminders()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(InterviewReminder.objects.count(), 3)
+
+    def test_rescheduled_interviews_are_reminded_again(self):
+        send_interview_reminders()
+        self.rounds[1].scheduled_time += timedelta(hours=1)
+        self.rounds[1].save()
+        send_interview_reminders()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[-1].to, ['interviewer1@ims.com'])
+
+    @override_settings(EMAIL_BACKEND='interview.tests.FlakyEmailBackend')
+    @mock.patch('interview.email_utils.time.sleep')
+    def test_failed_sends_release_their_claims(self, sleep):
+        FlakyEmailBackend.failures_left = 10
+        self.addCleanup(setattr, FlakyEmailBackend, 'failures_left', 0)
+        round_ids = [self.rounds[0].id, self.rounds[2].id]
+        with self.assertRaises(smtplib.SMTPServerDisconnected):
+            send_interviewer_reminder(self.interviewers[0].id, round_ids)
+        self.assertFalse(InterviewReminder.objects.exists())
+        FlakyEmailBackend.failures_left = 0
+        send_interviewer_reminder(self.interviewers[0].id, round_ids)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(InterviewReminder.objects.count(), 2)
+
+    def test_failures_before_sending_release_their_claims(self):
+        round_ids = [self.rounds[0].id, self.rounds[2].id]
+        with mock.patch('interview.tasks.render_interview_reminder_email', side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                send_interviewer_reminder(self.interviewers[0].id, round_ids)
+        self.assertFalse(InterviewReminder.objects.exists())
+        send_interviewer_reminder(self.interviewers[0].id, round_ids)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class ListViewQueryPlanTests(TestCase):
+    """
+    Runs EXPLAIN on every query issued by the list views in
+    interview/api/views.py, against seeded and analyzed tables, and fails if
+    any of them reads an application, round or feedback table with a
+    sequential scan. The job and round type catalogues are small and listed
+    in full by design, so they are not checked.
+    """
+    checked_tables = {'interview_jobapplication', 'interview_applicationround', 'interview_feedback'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('admin@ims.com', 'admin')
+        cls.interviewer = create_user('interviewer@ims.com', 'interviewer')
+        cls.candidate = create_user('candidate@ims.com', 'candidate')
+        candidates = User.objects.bulk_create([
+            User(email=f'seed{i}@ims.com', first_name='Seed', last_name=str(i), role='candidate') for i in range(1000)
+        ])
+        interviewers = User.objects.bulk_create([
+            User(email=f'seed-interviewer{i}@ims.com', first_name='Seed', last_name=str(i), role='interviewer') for i in range(20)
+        ]) + [cls.interviewer]
+        jobs = Job.objects.bulk_create([
+            Job(title=f'Job {i}', description='Build things', department='Engineering', position='intern') for i in range(50)
+        ])
+        round_type = InterviewRound.objects.create(round_type='technical')
+        applications = JobApplication.objects.bulk_create([
+            JobApplication(job=job, candidate=candidate) for job in jobs for candidate in candidates[:400]
+        ] + [JobApplication(job=jobs[0], candidate=cls.candidate)])
+        rounds = ApplicationRound.objects.bulk_create([
+            ApplicationRound(
+                application=application,
+                round=round_type,
+                interviewer=interviewers[i % len(interviewers)],
+                scheduled_time=timezone.now() + timedelta(hours=i % 500),
+                duration=60,
+            )
+            for i, application in enumerate(applications)
+        ])
+        Feedback.objects.bulk_create([
+            Feedback(application_round=application_round, comments='Good', rating=3) for application_round in rounds[::2]
+        ])
+        cls.application = applications[-1]
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def capture_queries(self, user, url):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return [query['sql'] for query in context.captured_queries if query['sql'].startswith('SELECT')]
+
+    def seq_scans(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+            plan = cursor.fetchone()[0][0]['Plan']
+
+        found, nodes = [], [plan]
+        while nodes:
+            node = nodes.pop()
+            if node['Node Type'] == 'Seq Scan' and node['Relation Name'] in self.checked_tables:
+                found.append(node['Relation Name'])
+            nodes.extend(node.get('Plans', []))
+        return found
+
+    def assertNoSeqScans(self, user, url):
+        for sql in self.capture_queries(user, url):
+            self.assertEqual(self.seq_scans(sql), [], f'{url} runs a sequential scan:\n{sql}')
+
+    def test_job_lists(self):
+        self.assertNoSeqScans(self.admin, reverse('job-list-create'))
+        self.assertNoSeqScans(self.candidate, reverse('open-jobs'))
+        self.assertNoSeqScans(self.admin, reverse('job-applications', args=[self.application.job_id]))
+
+    def test_application_lists(self):
+        for user in (self.admin, self.interviewer):
+            self.assertNoSeqScans(user, reverse('applications-list'))
+            self.assertNoSeqScans(user, reverse('applications-list') + '?ordering=status')
+        self.assertNoSeqScans(self.admin, reverse('applications-list') + f'?job={self.application.job_id}&status=new')
+        self.assertNoSeqScans(self.candidate, reverse('my-applications'))
+
+    def test_round_lists(self):
+        self.assertNoSeqScans(self.admin, reverse('application-round-detail', args=[self.application.pk]))
+        self.assertNoSeqScans(self.interviewer, reverse('application-round-detail', args=[self.application.pk]))
+        self.assertNoSeqScans(self.admin, reverse('upcoming-interviews'))
+        self.assertNoSeqScans(self.interviewer, reverse('upcoming-interviews'))
+
+    def test_feedback_lists(self):
+        for user in (self.admin, self.interviewer):
+            self.assertNoSeqScans(user, reverse('feedback-list'))
+        self.assertNoSeqScans(self.admin, reverse('feedback-list') + f'?application={self.application.pk}')
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRouterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.router = routers.PrimaryReplicaRouter()
+
+    def route(self, method, user_id=None):
+        state, token = routers.start_request(method)
+        try:
+            routers.set_request_user(user_id)
+            return [self.router.db_for_read(Job) for _ in range(5)], state, token
+        finally:
+            routers._routing.reset(token)
+
+    def test_safe_requests_read_from_one_replica(self):
+        aliases = self.route('GET')[0]
+        self.assertIn(aliases[0], ['replica1', 'replica2'])
+        self.assertEqual(set(aliases), {aliases[0]})
+
+    def test_writes_and_background_work_use_the_primary(self):
+        self.assertEqual(set(self.route('POST')[0]), {None})
+        self.assertIsNone(self.router.db_for_read(Job))
+        self.assertEqual(self.router.db_for_write(Job), 'default')
+        self.assertFalse(self.router.allow_migrate('replica1', 'interview'))
+
+    def test_users_who_wrote_are_pinned_to_the_primary(self):
+        state, token = routers.start_request('POST')
+        routers.set_request_user(7)
+        routers.end_request(state, token, mock.Mock(status_code=201))
+        self.assertEqual(set(self.route('GET', user_id=7)[0]), {None})
+        self.assertIn(self.route('GET', user_id=8)[0][0], ['replica1', 'replica2'])
+
+    def test_failed_writes_do_not_pin(self):
+        state, token = routers.start_request('POST')
+        routers.set_request_user(7)
+        routers.end_request(state, token, mock.Mock(status_code=400))
+        self.assertIn(self.route('GET', user_id=7)[0][0], ['replica1', 'replica2'])
+
+    def test_primary_reads(self):
+        state, token = routers.start_request('GET')
+        try:
+            with routers.primary_reads():
+                self.assertIsNone(self.router.db_for_read(Job))
+            self.assertIsNotNone(self.router.db_for_read(Job))
+        finally:
+            routers._routing.reset(token)
+
+    async def test_middleware_keeps_async_requests_async(self):
+        seen = []
+
+        async def view(request):
+            seen.append(self.router.db_for_read(Job))
+            return mock.Mock(status_code=200)
+
+        middleware = ReplicaRoutingMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        await middleware(mock.Mock(method='GET'))
+        self.assertIn(seen[0], ['replica1', 'replica2'])
+        self.assertIsNone(routers._routing.get())
+
+
+@skipUnless('replica1' in settings.DATABASES, 'DB_REPLICAS is not set')
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    End to end against a replica database (a mirror of the test database),
+    e.g. DB_REPLICAS=ims@localhost.
+    """
+    # Without replicas configured, the class is skipped but still collected
+    databases = {'default', *settings.DATABASE_REPLICAS[:1]}
+
+    def setUp(self):
+        cache.clear()
+        self.admin = create_user('admin@ims.com', 'admin')
+        self.candidate = create_user('candidate@ims.com', 'candidate')
+        self.job = Job.objects.create(title='Job', description='Build things', department='Engineering', position='intern')
+        self.client = APIClient()
+
+    def login(self, user):
+        token = RoleTokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def get(self, url):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica1']) as replica:
+            response = self.client.get(url)
+            queries = [q['sql'] for q in primary.captured_queries], [q['sql'] for q in replica.captured_queries]
+        self.assertEqual(response.status_code, 200)
+        return queries
+
+    def test_reads_go_to_the_replica_until_the_user_writes(self):
+        self.login(self.candidate)
+        primary, replica = self.get(reverse('my-applications'))
+        # Only the authentication lookup reads from the primary
+        self.assertEqual(len(primary), 1)
+        self.assertIn('"account_user"', primary[0])
+        self.assertTrue(replica)
+
+        response = self.client.post(reverse('applications-list'), {'job': self.job.pk, 'candidate': self.candidate.pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+        primary, replica = self.get(reverse('my-applications'))
+        self.assertEqual(replica, [])
+        self.assertTrue(any('"interview_jobapplication"' in sql for sql in primary))
+
+    def test_statistics_are_read_from_the_replica(self):
+        self.login(self.admin)
+        primary, replica = self.get(reverse('application-statistics'))
+        self.assertTrue(any('get_application_statistics' in sql for sql in replica))
+        self.assertFalse(any('get_application_statistics' in sql for sql in primary))
+
+    def test_job_list_cache_is_filled_from_the_primary(self):
+        self.login(self.candidate)
+        primary, replica = self.get(reverse('open-jobs'))
+        self.assertTrue(any('"interview_job"' in sql for sql in primary))
+        self.assertFalse(any('"interview_job"' in sql for sql in replica))